@@ -0,0 +1,26 @@
+# ==========================================================
+# 🔐 ACESSO ADMINISTRATIVO
+# ==========================================================
+# Rotas e cabeçalhos de diagnóstico (perfis, memória...) só valem com o token
+# de ROBO_ADMIN_TOKEN no cabeçalho X-Admin-Token. Sem token configurado, o
+# modo admin fica desligado e as rotas respondem 404.
+import hmac
+import os
+
+from flask import abort, request
+
+ADMIN_TOKEN = os.environ.get("ROBO_ADMIN_TOKEN", "")
+ADMIN_CABECALHO = "X-Admin-Token"
+
+
+def requisicao_admin():
+    """True se a requisição atual traz o token admin correto."""
+    if not ADMIN_TOKEN:
+        return False
+    return hmac.compare_digest(request.headers.get(ADMIN_CABECALHO, ""), ADMIN_TOKEN)
+
+
+def exigir_admin():
+    """Interrompe com 404 (rota "inexistente") se a requisição não for admin."""
+    if not requisicao_admin():
+        abort(404)
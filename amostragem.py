@@ -0,0 +1,113 @@
+# ==========================================================
+# 📉 REDUÇÃO DE PONTOS EM SÉRIES TEMPORAIS (LTTB)
+# ==========================================================
+# Séries de linha com mais pontos que ROBO_GRAFICO_MAX_PONTOS são reduzidas no
+# servidor com LTTB (Largest-Triangle-Three-Buckets): em cada balde fica o
+# ponto que forma o maior triângulo com o escolhido no balde anterior e a
+# média do seguinte, o que preserva picos e vales (a forma da curva) com uma
+# fração dos pontos. Primeiro e último pontos são sempre mantidos.
+#
+# Resolução total só no zoom: o relayoutData do gráfico diz a faixa visível,
+# a página recorta a série nessa faixa e reduz de novo dentro do mesmo
+# orçamento; faixas pequenas voltam com todos os pontos.
+import os
+
+GRAFICO_MAX_PONTOS = int(os.environ.get("ROBO_GRAFICO_MAX_PONTOS", "500"))  # por traço
+LIMITE_MARCADORES = 60  # acima disso a linha vai sem marcadores
+
+
+def lttb(x, y, limite):
+    """Índices (ordenados) dos pontos que o LTTB mantém de (x, y); tudo se len(x) <= limite."""
+    import numpy as np
+
+    x = np.asarray(x, dtype="float64")
+    y = np.nan_to_num(np.asarray(y, dtype="float64"))
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+
+    # Baldes internos (sem o primeiro e o último ponto), de tamanho quase igual
+    bordas = np.linspace(1, n - 1, limite - 1).astype("int64")
+    escolhidos = np.empty(limite, dtype="int64")
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        if i + 2 < len(bordas):
+            prox_inicio, prox_fim = bordas[i + 1], bordas[i + 2]
+        else:
+            prox_inicio, prox_fim = n - 1, n
+        media_x, media_y = x[prox_inicio:prox_fim].mean(), y[prox_inicio:prox_fim].mean()
+        # Área (x2) do triângulo anterior -> candidato -> média do próximo balde
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(areas.argmax())
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+
+def _eixo_numerico(serie):
+    """Eixo x como float (datas em ns; rótulos "2025-09" viram data; o resto, posição)."""
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.astype("int64").to_numpy(dtype="float64")
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(dtype="float64")
+    datas = pd.to_datetime(serie, errors="coerce")
+    if datas.notna().all():
+        return datas.astype("int64").to_numpy(dtype="float64")
+    return np.arange(len(serie), dtype="float64")
+
+
+def reduzir_serie(df, x, y, limite=None, por=None):
+    """Linhas de `df` que sobrevivem ao LTTB em (x, y), traço a traço (`por` = coluna da cor)."""
+    import numpy as np
+
+    limite = limite or GRAFICO_MAX_PONTOS
+    if df is None or df.empty:
+        return df
+    grupos = df.groupby(por, sort=False, observed=True) if por else [(None, df)]
+    mantidos = []
+    for _, traco in grupos:
+        if len(traco) <= limite:
+            mantidos.append(traco.index.to_numpy())
+            continue
+        traco = traco.sort_values(x, kind="stable")
+        mantidos.append(traco.index.to_numpy()[lttb(_eixo_numerico(traco[x]), traco[y], limite)])
+    return df.loc[np.sort(np.concatenate(mantidos))]
+
+
+# ==========================================================
+# 🔍 ZOOM (relayoutData)
+# ==========================================================
+ZOOM_RESET = "reset"
+
+
+def faixa_zoom(relayout):
+    """relayoutData -> (inicio, fim) do eixo x, ZOOM_RESET no duplo clique/autoscale, ou None se não for zoom em x."""
+    if not relayout:
+        return None
+    if relayout.get("xaxis.autorange"):
+        return ZOOM_RESET
+    if "xaxis.range[0]" in relayout and "xaxis.range[1]" in relayout:
+        return relayout["xaxis.range[0]"], relayout["xaxis.range[1]"]
+    if isinstance(relayout.get("xaxis.range"), list) and len(relayout["xaxis.range"]) == 2:
+        return tuple(relayout["xaxis.range"])
+    return None
+
+
+def recortar_faixa(df, x, faixa):
+    """Linhas de `df` (ordenado por x) com x dentro da faixa visível, mais um vizinho de cada lado (a linha chega às bordas)."""
+    import numpy as np
+    import pandas as pd
+
+    if df is None or df.empty or faixa is None or faixa == ZOOM_RESET:
+        return df
+    valores = df[x] if pd.api.types.is_datetime64_any_dtype(df[x]) else pd.to_datetime(df[x], errors="coerce")
+    inicio, fim = sorted(pd.Timestamp(limite) for limite in faixa)
+    dentro = np.flatnonzero(((valores >= inicio) & (valores <= fim)).to_numpy())
+    if len(dentro) == 0:
+        return df.iloc[0:0]
+    return df.iloc[max(dentro[0] - 1, 0):min(dentro[-1] + 2, len(df))]
@@ -0,0 +1,115 @@
+# ==========================================================
+# 🔌 API JSON DE AGREGAÇÕES (SOMENTE LEITURA)
+# ==========================================================
+# GET /api/v1/<aba>/aggregate?<dimensão>=<valor>&group_by=<dimensão>&measure=sum:<coluna>
+#   - filtros e group_by: colunas de dimensão da aba (ESQUEMA_ABAS)
+#   - measure: count | sum:<medida> | mean:<medida> (pode repetir; padrão = count)
+# GET /api/v1/consultores
+#   - cruzamento por consultor entre abas (leads, processos, contratos, produção), por id
+# As respostas saem do backend de consultas (consultas.py) e levam um ETag ligado ao
+# workbook e ao conteúdo do snapshot (não à versão, que é um contador de cada worker),
+# então clientes podem revalidar com If-None-Match (304) em qualquer worker.
+import hashlib
+import json
+
+from flask import Response, abort, request
+from werkzeug.exceptions import HTTPException
+
+from consultas import agregar, parse_medida
+from consultores import painel_consultores
+from exportacao import filtros_da_query
+from utils import ESQUEMA_ABAS, dimensoes_da_aba, info_snapshot, obter_snapshot
+
+FUNCOES_MEDIDA = ("sum", "mean", "count")
+
+
+def _lista_param(nome):
+    """Aceita `?p=a&p=b` e `?p=a,b`."""
+    return [v.strip() for valor in request.args.getlist(nome) for v in valor.split(",") if v.strip()]
+
+
+def interpretar_medidas(aba, medidas):
+    """['count', 'sum:cotacoes'] -> [(função, coluna|None, nome_saida)]; inválidas = 400."""
+    permitidas = ESQUEMA_ABAS[aba]["medidas"]
+    resultado = []
+    for medida in medidas or ["count"]:
+        funcao, coluna, nome = parse_medida(medida)
+        if funcao not in FUNCOES_MEDIDA:
+            abort(400, description=f"Função '{funcao}' inválida. Use: {', '.join(FUNCOES_MEDIDA)}")
+        if funcao != "count" and coluna not in permitidas:
+            abort(400, description=f"Medida '{coluna}' não disponível para '{aba}'. Use: {', '.join(permitidas) or '(apenas count)'}")
+        resultado.append((funcao, coluna, nome))
+    return resultado
+
+
+def calcular_etag(aba, info):
+    consulta = json.dumps(sorted((k, request.args.getlist(k)) for k in request.args), ensure_ascii=False)
+    digest = hashlib.sha1(f"{info['workbook']}|{aba}|{consulta}".encode("utf-8")).hexdigest()[:16]
+    return f'"{(info["impressao"] or "vazio")[:16]}-{digest}"'
+
+
+def registrar_rotas_api(server):
+    @server.route("/api/v1/<path:aba>/aggregate")
+    def api_aggregate(aba):
+        try:
+            return _responder_agregacao(aba)
+        except HTTPException as e:
+            return Response(json.dumps({"erro": e.description}, ensure_ascii=False), status=e.code, mimetype="application/json")
+
+    def _responder_agregacao(aba):
+        if aba not in ESQUEMA_ABAS:
+            abort(404, description=f"Aba '{aba}' não disponível na API.")
+
+        group_by = _lista_param("group_by")
+        invalidas = [c for c in group_by if c not in dimensoes_da_aba(aba)]
+        if invalidas:
+            abort(400, description=f"group_by inválido: {', '.join(invalidas)}. Use: {', '.join(dimensoes_da_aba(aba))}")
+        medidas = interpretar_medidas(aba, _lista_param("measure"))
+        filtros = filtros_da_query(aba, request.args)
+
+        if aba not in obter_snapshot()["abas"]:  # também garante o snapshot carregado antes de ler a versão
+            abort(404, description=f"Aba '{aba}' indisponível na planilha atual.")
+        info = info_snapshot()
+        etag = calcular_etag(aba, info)
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=304, headers={"ETag": etag})
+
+        tabela = agregar(aba, filtros, group_by, medidas)
+        corpo = {
+            "aba": aba,
+            "workbook": info["workbook"],
+            "versao_snapshot": info["versao"],
+            "impressao_snapshot": info["impressao"],
+            "stale": info["stale"],
+            "filtros": filtros,
+            "group_by": group_by,
+            "measures": [nome for _, _, nome in medidas],
+            "linhas": json.loads(tabela.to_json(orient="records", date_format="iso", force_ascii=False)),
+        }
+        return Response(
+            json.dumps(corpo, ensure_ascii=False),
+            mimetype="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+    @server.route("/api/v1/consultores")
+    def api_consultores():
+        obter_snapshot()
+        info = info_snapshot()
+        etag = calcular_etag("consultores", info)
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=304, headers={"ETag": etag})
+        corpo = {
+            "workbook": info["workbook"],
+            "versao_snapshot": info["versao"],
+            "impressao_snapshot": info["impressao"],
+            "stale": info["stale"],
+            "linhas": json.loads(painel_consultores().to_json(orient="records", force_ascii=False)),
+        }
+        return Response(
+            json.dumps(corpo, ensure_ascii=False),
+            mimetype="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+    return api_aggregate
@@ -1,7 +1,17 @@
 import dash
 from dash import html, dcc
 import dash_bootstrap_components as dbc
+from flask_compress import Compress
 from utils import TEMA_DARK
+from exportacao import registrar_rotas_exportacao
+from api import registrar_rotas_api
+from payload import registrar_orcamento_payload
+from perfil import registrar_perfil
+from memoria import registrar_rotas_memoria
+from eventos import registrar_eventos_snapshot
+from aquecimento import registrar_aquecimento
+from workbooks import registrar_workbooks
+from historico import registrar_historico
 
 # ---------------- DASH APP (RAIZ) ----------------
 app = dash.Dash(
@@ -12,6 +22,23 @@ app = dash.Dash(
 )
 
 server = app.server  # Necessário para o Render rodar via gunicorn
+
+# Compressão (brotli/gzip) das respostas de callback, layout e assets JS/CSS
+server.config.update(
+    COMPRESS_ALGORITHM=["br", "gzip"],
+    COMPRESS_LEVEL=6,
+    COMPRESS_BR_LEVEL=5,
+    COMPRESS_MIN_SIZE=500,
+)
+Compress(server)
+registrar_workbooks(server)  # workbook da requisição (?workbook=, X-Workbook, página de origem, cookie) em flask.g
+registrar_orcamento_payload(server)  # mede o payload antes da compressão (ROBO_PAYLOAD_ORCAMENTO_KB)
+registrar_perfil(server)  # cProfile sob demanda (ROBO_PERFIL=1 ou X-Perfil + X-Admin-Token)
+registrar_rotas_memoria(server)  # /admin/memoria + log e orçamento após cada snapshot (ROBO_MEMORIA_MAX_MB)
+registrar_eventos_snapshot(server)  # /eventos/snapshot (SSE): avisa as abas abertas quando os dados mudam
+registrar_rotas_exportacao(server)  # /exportar/<aba>?formato=csv|parquet
+registrar_rotas_api(server)  # /api/v1/<aba>/aggregate
+registrar_historico(server)  # deltas por linha a cada snapshot + /api/v1/mudancas?desde= e /api/v1/historico
 app.title = "ROBÔ POWER BI IA EDITION"
 
 # ---------------- NAVBAR DINÂMICA ----------------
@@ -30,10 +57,13 @@ navbar = dbc.NavbarSimple(
 # ---------------- LAYOUT PRINCIPAL ----------------
 app.layout = dbc.Container([
     dcc.Location(id="url", refresh=False),
+    dcc.Store(id="snapshot_evento"),  # atualizado por assets/eventos_snapshot.js a cada snapshot com dados novos
     navbar,
     html.Div(dash.page_container, className="mt-4"),
 ], fluid=True)
 
+registrar_aquecimento(app)  # aquece as páginas no primeiro snapshot + /health (ROBO_AQUECIMENTO)
+
 # ---------------- EXECUÇÃO ----------------
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8050, debug=True)
@@ -0,0 +1,232 @@
+# ==========================================================
+# 🔥 AQUECIMENTO NA SUBIDA DO WORKER + HEALTH CHECK
+# ==========================================================
+# Depois do primeiro snapshot, cada página de dash.page_registry tem seus
+# callbacks executados como o navegador faria (via test client do próprio
+# servidor): uma vez sem filtros e outra com o `mes` mais recente oferecido no
+# dropdown da página. Isso preenche os derivados do snapshot (abas limpas,
+# índices, rollups, top-N, coortes, SLA...), importa plotly e sobe o pool de
+# renderização antes do primeiro visitante.
+#
+# Aquece o workbook inicial (ROBO_WORKBOOK_PADRAO); os demais carregam no
+# primeiro acesso da equipe.
+#
+# GET /health responde 503 enquanto o worker aquece (ou está sem dados) e 200
+# quando pronto, para o health check do gunicorn / balanceador.
+# ROBO_AQUECIMENTO: "inicio" (padrão, só o primeiro snapshot), "sempre"
+# (a cada snapshot novo) ou "0" (desligado; /health carrega o snapshot e só exige ele).
+import os
+import threading
+import time
+import unicodedata
+
+import dash
+from flask import jsonify
+
+import utils
+
+AQUECIMENTO = os.environ.get("ROBO_AQUECIMENTO", "inicio").lower()
+SUFIXO_FILTRO_MES = "_filtro_mes"
+MESES_PT = ["janeiro", "fevereiro", "marco", "abril", "maio", "junho",
+            "julho", "agosto", "setembro", "outubro", "novembro", "dezembro"]
+
+_estado = {"status": "aguardando", "pid": None, "inicio": None, "fim": None, "versao": None, "paginas": {}, "erro": None,
+           "concluido": False}
+_lock = threading.Lock()
+_lock_execucao = threading.Lock()  # um aquecimento por vez (modo "sempre")
+
+
+# ==========================================================
+# 📅 MÊS MAIS RECENTE DE UM DROPDOWN
+# ==========================================================
+def ordem_mes(valor):
+    """Chave ordenável para os formatos de mês das abas (202509, "2025-09-25", "Setembro/2025", "MAIO"); None se não reconhece."""
+    import pandas as pd
+
+    if isinstance(valor, (int, float)) and 190001 <= valor <= 299912:
+        return (int(valor) // 100, int(valor) % 100)
+    texto = unicodedata.normalize("NFKD", str(valor)).encode("ascii", "ignore").decode().strip().lower()
+    for i, nome in enumerate(MESES_PT, start=1):
+        if texto.startswith(nome) or texto.startswith(nome[:3] + "/") or texto == nome[:3]:
+            digitos = "".join(ch for ch in texto if ch.isdigit())
+            return (int(digitos[-4:]) if len(digitos) >= 4 else 0, i)
+    data = pd.to_datetime(texto, errors="coerce", dayfirst=False)
+    if pd.notna(data):
+        return (data.year, data.month)
+    return None
+
+
+def mes_mais_recente(opcoes):
+    ordenaveis = [(ordem_mes(o["value"]), o["value"]) for o in opcoes or [] if isinstance(o, dict)]
+    ordenaveis = [(chave, valor) for chave, valor in ordenaveis if chave is not None]
+    return max(ordenaveis, key=lambda item: item[0])[1] if ordenaveis else None
+
+
+# ==========================================================
+# 🧭 CALLBACKS DE CADA PÁGINA
+# ==========================================================
+def _componentes(layout):
+    """{id: componente} de um layout (função ou componente)."""
+    raiz = layout() if callable(layout) else layout
+    componentes = {getattr(raiz, "id", None): raiz}
+    componentes.update({getattr(c, "id", None): c for c in raiz._traverse()})
+    componentes.pop(None, None)
+    return componentes
+
+
+def _callbacks_da_pagina(dependencias, ids_pagina, ids_globais):
+    """Callbacks server-side cujas entradas existem na página (ou no layout principal) e que tocam a página."""
+    selecionados = []
+    for dep in dependencias:
+        if dep.get("clientside_function") or dep.get("long"):
+            continue
+        ids_entrada = {e["id"] for e in dep["inputs"] + dep.get("state", [])}
+        if not isinstance(next(iter(ids_entrada), ""), str):
+            continue  # ids com padrão (pattern-matching) ficam de fora
+        if ids_entrada <= ids_pagina | ids_globais and ids_entrada & ids_pagina:
+            selecionados.append(dep)
+    return selecionados
+
+
+def _payload(dep, valores):
+    def spec(e):
+        return {"id": e["id"], "property": e["property"], "value": valores.get((e["id"], e["property"]))}
+
+    saida = dep["output"]
+    if saida.startswith(".."):
+        saidas = [{"id": s.split(".")[0], "property": s.split(".")[1]} for s in saida.strip(".").split("...") if s]
+    else:
+        saidas = {"id": saida.split(".")[0], "property": saida.split(".")[1]}
+    return {
+        "output": saida,
+        "outputs": saidas,
+        "inputs": [spec(e) for e in dep["inputs"]],
+        "state": [spec(e) for e in dep.get("state", [])],
+        "changedPropIds": [],
+    }
+
+
+def _aquecer_pagina(cliente, pagina, dependencias, ids_globais):
+    componentes = _componentes(pagina["layout"])
+    callbacks = _callbacks_da_pagina(dependencias, set(componentes), ids_globais)
+    valores = {}
+    for dep in callbacks:
+        for e in dep["inputs"] + dep.get("state", []):
+            componente = componentes.get(e["id"])
+            valores[(e["id"], e["property"])] = getattr(componente, e["property"], None) if componente else None
+
+    resultado = {"callbacks": len(callbacks), "status": [], "mes": None}
+    inicio = time.perf_counter()
+    opcoes = {}
+    for dep in callbacks:  # 1) visão padrão (sem filtros)
+        resposta = cliente.post("/_dash-update-component", json=_payload(dep, valores))
+        resultado["status"].append(resposta.status_code)
+        if resposta.status_code == 200:
+            for id_, props in (resposta.get_json() or {}).get("response", {}).items():
+                if "options" in props:
+                    opcoes[id_] = props["options"]
+
+    filtros_mes = [id_ for id_ in componentes if str(id_).endswith(SUFIXO_FILTRO_MES)]
+    for id_ in filtros_mes:  # 2) mês mais recente
+        mes = mes_mais_recente(opcoes.get(id_))
+        if mes is None:
+            continue
+        resultado["mes"] = mes
+        com_mes = {**valores, (id_, "value"): mes}
+        for dep in callbacks:
+            if any(e["id"] == id_ for e in dep["inputs"]):
+                resultado["status"].append(cliente.post("/_dash-update-component", json=_payload(dep, com_mes)).status_code)
+    resultado["ms"] = round((time.perf_counter() - inicio) * 1000)
+    return resultado
+
+
+def aquecer(app):
+    """Executa os callbacks de todas as páginas registradas (bloqueante)."""
+    if not _lock_execucao.acquire(blocking=False):
+        return
+    try:
+        _aquecer(app)
+    finally:
+        _lock_execucao.release()
+
+
+def _aquecer(app):
+    with _lock:
+        _estado.update(status="aquecendo", inicio=time.time(), fim=None, paginas={}, erro=None)
+    try:
+        snapshot = utils.obter_snapshot()
+        if not snapshot["abas"]:
+            raise RuntimeError(snapshot["ultimo_erro"] or "snapshot indisponível")
+        cliente = app.server.test_client()
+        dependencias = cliente.get("/_dash-dependencies").get_json()
+        ids_globais = set(_componentes(app.layout))
+        for pagina in dash.page_registry.values():
+            try:
+                _estado["paginas"][pagina["path"]] = _aquecer_pagina(cliente, pagina, dependencias, ids_globais)
+            except Exception as e:
+                _estado["paginas"][pagina["path"]] = {"erro": str(e)}
+        with _lock:
+            _estado.update(status="pronto", fim=time.time(), versao=snapshot["versao"], concluido=True)
+        total = round((_estado["fim"] - _estado["inicio"]) * 1000)
+        print(f"🔥 Aquecimento concluído em {total}ms (snapshot v{snapshot['versao']}, {len(_estado['paginas'])} páginas)")
+    except Exception as e:
+        with _lock:
+            _estado.update(status="falhou", fim=time.time(), erro=str(e), concluido=True)
+        print(f"⚠️ Falha no aquecimento: {e}")
+
+
+def _iniciar_em_segundo_plano(app):
+    """Uma thread de aquecimento por processo (a flag herdada do master no fork não vale)."""
+    with _lock:
+        if _estado["pid"] == os.getpid():
+            return
+        _estado["pid"] = os.getpid()
+        _estado["status"] = "aguardando"
+    threading.Thread(target=aquecer, args=(app,), name="aquecimento", daemon=True).start()
+
+
+def worker_pronto():
+    if not utils.snapshot_atual()["abas"]:
+        return False
+    if AQUECIMENTO == "0":
+        return True
+    # Pronto após o primeiro aquecimento terminar (um que falhou não segura o worker fora do
+    # balanceador para sempre; reaquecimentos do modo "sempre" não o tiram de volta)
+    return _estado["concluido"]
+
+
+def registrar_aquecimento(app):
+    server = app.server
+
+    if AQUECIMENTO != "0":
+        @server.before_request
+        def disparar_aquecimento():
+            # Primeira requisição do worker (o próprio health check serve): só custa checar o pid depois
+            _iniciar_em_segundo_plano(app)
+
+    if AQUECIMENTO == "sempre":
+        def reaquecer():
+            if utils.workbook_atual() != utils.WORKBOOK_INICIAL:
+                return
+            if _estado["concluido"] and _estado["versao"] != utils.snapshot_atual()["versao"]:
+                threading.Thread(target=aquecer, args=(app,), name="aquecimento", daemon=True).start()
+        utils.registrar_ao_publicar(reaquecer)
+
+    @server.route("/health")
+    def health():
+        if AQUECIMENTO == "0":
+            # Sem aquecimento nada mais carrega o snapshot antes do primeiro visitante: o próprio
+            # health check carrega (e depois só dispara a revalidação pelo TTL)
+            utils.obter_snapshot()
+        info = utils.info_snapshot()
+        pronto = worker_pronto()
+        corpo = {
+            "status": "ok" if pronto else "aquecendo",
+            "pid": os.getpid(),
+            "aquecimento": {k: _estado[k] for k in ("status", "inicio", "fim", "versao", "erro")},
+            "paginas": _estado["paginas"],
+            "snapshot": {k: info[k] for k in ("versao", "idade_segundos", "stale", "disjuntor_aberto")},
+        }
+        return jsonify(corpo), 200 if pronto else 503
+
+    return health
@@ -0,0 +1,91 @@
+// ==========================================================
+// 📡 AVISO DE SNAPSHOT NOVO (CLIENTE SSE)
+// ==========================================================
+// Uma conexão por aba em /eventos/snapshot (eventos.py). Quando o servidor
+// anuncia dados novos, grava a impressão no dcc.Store "snapshot_evento" do
+// layout principal; os callbacks das páginas escutam esse Store no lugar dos
+// antigos dcc.Interval. O primeiro aviso de cada conexão só registra o estado.
+// A conexão leva o workbook da página em ?workbook= (workbooks.py) e é refeita
+// quando a navegação do Dash troca de workbook sem recarregar a aba.
+(function () {
+    "use strict";
+
+    var URL_EVENTOS = "/eventos/snapshot";
+    var ESPERA_APOS_ERRO_MS = 60000;  // EventSource desiste após 503/erro HTTP: tentamos de novo por conta própria
+    var CHECAGEM_WORKBOOK_MS = 1000;  // troca de workbook na navegação client-side (sem requisição ao servidor)
+    var PARAMETRO_WORKBOOK = "workbook";
+    var COOKIE_WORKBOOK = "robo_workbook";
+    var ultimaImpressao = null;
+    var fonte = null;
+    var workbookConectado = null;
+    var reconexao = null;
+
+    function workbookDaPagina() {
+        // Mesma ordem do servidor: ?workbook= da URL, senão o cookie da última escolha
+        var pedido = new URLSearchParams(window.location.search).get(PARAMETRO_WORKBOOK);
+        if (pedido) {
+            return pedido.toLowerCase();
+        }
+        var cookie = document.cookie.split("; ").filter(function (c) {
+            return c.indexOf(COOKIE_WORKBOOK + "=") === 0;
+        })[0];
+        return cookie ? decodeURIComponent(cookie.split("=")[1]).toLowerCase() : "";
+    }
+
+    function avisarPaginas(impressao) {
+        if (window.dash_clientside && window.dash_clientside.set_props) {
+            window.dash_clientside.set_props("snapshot_evento", {data: impressao});
+        }
+    }
+
+    function conectar() {
+        if (!window.EventSource) {
+            return;
+        }
+        if (fonte) {
+            fonte.close();
+        }
+        clearTimeout(reconexao);
+        workbookConectado = workbookDaPagina();
+        ultimaImpressao = null;  // outro workbook: o primeiro aviso só registra o estado
+        var url = URL_EVENTOS + (workbookConectado ? "?" + PARAMETRO_WORKBOOK + "=" + encodeURIComponent(workbookConectado) : "");
+        var esta = fonte = new EventSource(url);
+
+        fonte.addEventListener("snapshot", function (evento) {
+            var dados = JSON.parse(evento.data);
+            if (!dados.impressao) {
+                return;
+            }
+            if (ultimaImpressao !== null && dados.impressao !== ultimaImpressao) {
+                avisarPaginas(dados.impressao);
+            }
+            ultimaImpressao = dados.impressao;
+        });
+
+        fonte.onerror = function () {
+            // CONNECTING = o navegador já está reconectando sozinho (queda de rede / fim da conexão)
+            if (esta === fonte && fonte.readyState === EventSource.CLOSED) {
+                reconexao = setTimeout(conectar, ESPERA_APOS_ERRO_MS);
+            }
+        };
+    }
+
+    function vigiarWorkbook() {
+        setInterval(function () {
+            if (fonte && workbookDaPagina() !== workbookConectado) {
+                conectar();
+            }
+        }, CHECAGEM_WORKBOOK_MS);
+    }
+
+    function iniciar() {
+        conectar();
+        vigiarWorkbook();
+    }
+
+    if (document.readyState === "loading") {
+        document.addEventListener("DOMContentLoaded", iniciar);
+    } else {
+        iniciar();
+    }
+})();
@@ -0,0 +1,160 @@
+# ==========================================================
+# 🗃️ BACKEND SQLITE (ALTERNATIVA AO PANDAS PARA CONSULTAS)
+# ==========================================================
+# A cada snapshot, as abas limpas do ESQUEMA_ABAS são gravadas num SQLite local
+# (WAL) com índice em cada coluna de filtro/dimensão. Cada versão (de cada
+# workbook) vai para um arquivo próprio: leitores da versão anterior não são
+# afetados pela troca.
+import os
+import re
+import sqlite3
+import tempfile
+
+from utils import ESQUEMA_ABAS, aba_limpa, derivado, dimensoes_da_aba, info_snapshot
+
+SQLITE_DIR = os.environ.get("ROBO_SQLITE_DIR", os.path.join(tempfile.gettempdir(), "robo_excel_sqlite"))
+SQLITE_VERSOES_MANTIDAS = 2
+
+
+def _q(nome):
+    """Identificador SQL entre aspas (nomes de aba têm espaço, colunas têm '+')."""
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def _para_sqlite(df):
+    """Valores que o sqlite3 não sabe gravar (Timestamp em coluna object, etc.) viram texto."""
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if v is None or isinstance(v, (str, int, float)) else str(v))
+    return df
+
+
+def construir_banco(abas):
+    """Grava as abas limpas num arquivo novo por versão e devolve o caminho."""
+    info = info_snapshot()
+    versao, workbook = info["versao"], re.sub(r"\W", "-", info["workbook"])
+    os.makedirs(SQLITE_DIR, exist_ok=True)
+    # A versão é contada por processo e workbook: pid e workbook no nome evitam atropelos
+    caminho = os.path.join(SQLITE_DIR, f"snapshot_{os.getpid()}_{workbook}_v{versao}.db")
+    # Temporário com nome único: nenhuma outra construção grava, renomeia ou apaga este arquivo
+    descritor, temporario = tempfile.mkstemp(prefix=os.path.basename(caminho) + ".", suffix=".tmp", dir=SQLITE_DIR)
+    os.close(descritor)
+
+    con = sqlite3.connect(temporario)
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.execute("PRAGMA synchronous=OFF")  # arquivo descartável, reconstruído a cada snapshot
+        for aba in ESQUEMA_ABAS:
+            df = aba_limpa(aba)
+            if df is None:
+                continue
+            _para_sqlite(df).to_sql(aba, con, index=False, if_exists="replace")
+            for col in dimensoes_da_aba(aba):
+                if col in df.columns:
+                    nome_indice = f"ix_{abs(hash((aba, col)))}"
+                    con.execute(f"CREATE INDEX {_q(nome_indice)} ON {_q(aba)} ({_q(col)})")
+        con.execute("ANALYZE")
+        con.commit()
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except BaseException:
+        con.close()
+        os.remove(temporario)
+        raise
+    con.close()
+    os.replace(temporario, caminho)
+    _limpar_versoes_antigas(workbook, versao)
+    print(f"🗃️ SQLite [{workbook}] v{versao} pronto em {caminho}")
+    return caminho
+
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def _limpar_versoes_antigas(workbook_atual, versao_atual):
+    """Remove versões antigas do workbook neste processo e arquivos de processos que já morreram."""
+    for nome in os.listdir(SQLITE_DIR):
+        if not nome.startswith("snapshot_"):
+            continue
+        try:
+            prefixo, versao = nome[len("snapshot_"):].split(".")[0].rsplit("_v", 1)
+            pid, workbook = prefixo.split("_", 1)
+            pid, versao = int(pid), int(versao)
+        except ValueError:
+            continue
+        # Fora da janela mantida (inclusive versões "do futuro", de antes do workbook sair da memória)
+        mantida = versao_atual - SQLITE_VERSOES_MANTIDAS < versao <= versao_atual
+        antiga = pid == os.getpid() and workbook == workbook_atual and not mantida
+        if antiga or not _processo_vivo(pid):
+            try:
+                os.remove(os.path.join(SQLITE_DIR, nome))
+            except OSError:
+                pass
+
+
+def banco_atual():
+    return derivado("banco_sqlite", construir_banco)
+
+
+def conectar():
+    """Conexão somente-leitura ao banco do snapshot atual (uma por consulta; é barato no SQLite)."""
+    return sqlite3.connect(f"file:{banco_atual()}?mode=ro", uri=True, check_same_thread=False)
+
+
+def _where(filtros, nao_nulos=(), excluir_vazios=()):
+    """{coluna: valor(es)} -> (cláusula WHERE, parâmetros).
+
+    `nao_nulos` imita o dropna do groupby do pandas; `excluir_vazios` também descarta "".
+    """
+    condicoes, parametros = [], []
+    for col, valor in filtros.items():
+        if valor is None or valor == "" or valor == []:
+            continue
+        valores = list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+        condicoes.append(f"{_q(col)} IN ({', '.join('?' * len(valores))})")
+        parametros.extend(v.item() if hasattr(v, "item") else v for v in valores)  # numpy -> Python
+    for col in nao_nulos:
+        condicoes.append(f"{_q(col)} IS NOT NULL")
+    for col in excluir_vazios:
+        condicoes.append(f"{_q(col)} IS NOT NULL AND {_q(col)} != ''")
+    return (" WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+
+# SUM vazio é NULL no SQLite e 0 no pandas
+FUNCOES_SQL = {"count": "COUNT(*)", "sum": "COALESCE(SUM({}), 0)", "mean": "AVG({})"}
+
+
+def agregar_sql(aba, filtros, group_by, medidas, excluir_vazios=()):
+    """Mesma semântica de consultas.agregar (pandas), resolvida com GROUP BY no SQLite."""
+    import pandas as pd
+
+    selecao = [_q(c) for c in group_by]
+    for funcao, col, nome in medidas:
+        selecao.append(f"{FUNCOES_SQL[funcao].format(_q(col))} AS {_q(nome)}")
+    where, parametros = _where(filtros, group_by, excluir_vazios)
+    sql = f"SELECT {', '.join(selecao)} FROM {_q(aba)}{where}"
+    if group_by:
+        colunas = ", ".join(_q(c) for c in group_by)
+        sql += f" GROUP BY {colunas} ORDER BY {colunas}"
+    with conectar() as con:
+        return pd.read_sql_query(sql, con, params=parametros)
+
+
+def linhas_sql(aba, filtros, colunas, limite=None, ordenar_por=None, colunas_data=()):
+    """Linhas da aba (tabelas das páginas), na ordem original da planilha salvo `ordenar_por`."""
+    import pandas as pd
+
+    where, parametros = _where(filtros)
+    ordem = f" ORDER BY {_q(ordenar_por)}, rowid" if ordenar_por else " ORDER BY rowid"
+    sql = f"SELECT {', '.join(_q(c) for c in colunas)} FROM {_q(aba)}{where}{ordem}"
+    if limite:
+        sql += f" LIMIT {int(limite)}"
+    with conectar() as con:
+        return pd.read_sql_query(sql, con, params=parametros, parse_dates=list(colunas_data))
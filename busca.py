@@ -0,0 +1,174 @@
+# ==========================================================
+# 🔎 BUSCA NOS DROPDOWNS (ÍNDICE DE TOKENS POR SNAPSHOT)
+# ==========================================================
+# Filtros de alta cardinalidade (responsável, consultor, leads por nome ou
+# telefone) não mandam mais a lista inteira de opções a cada callback: o
+# dropdown pede opções conforme o usuário digita (search_value) e o servidor
+# devolve só as melhores ROBO_BUSCA_MAX_OPCOES.
+#
+# Por snapshot, cada (aba, coluna) ganha um índice: os valores distintos, a
+# frequência de cada um e um vetor ORDENADO de tokens normalizados (sem
+# acento, minúsculos; telefones só com dígitos) apontando para o valor. Busca
+# por prefixo = duas buscas binárias no vetor; com vários termos, o valor
+# precisa casar todos. Ordenação: valor que começa com a busca, depois os
+# mais frequentes.
+import os
+import re
+
+from utils import aba_limpa, derivado
+
+BUSCA_MAX_OPCOES = int(os.environ.get("ROBO_BUSCA_MAX_OPCOES", "20"))
+DIGITOS_TELEFONE_LOCAL = (8, 9)  # busca sem DDD/DDI: o número local também vira token
+
+_RE_TOKEN = re.compile(r"[a-z0-9]+")
+_RE_NAO_DIGITO = re.compile(r"\D+")
+
+
+def normalizar(texto):
+    """"João  D'Ávila" -> "joao d'avila" (sem acento, minúsculo)."""
+    import unidecode
+
+    return unidecode.unidecode(str(texto)).lower().strip()
+
+
+def tokens_texto(texto):
+    return _RE_TOKEN.findall(normalizar(texto))
+
+
+def tokens_telefone(telefone):
+    """"+55 (11) 99887-7665" -> ["5511998877665", "98877665", "998877665"]."""
+    if isinstance(telefone, float) and telefone.is_integer():
+        telefone = int(telefone)  # célula numérica: 11998877665.0 não pode ganhar um dígito a mais
+    digitos = _RE_NAO_DIGITO.sub("", str(telefone))
+    if not digitos:
+        return []
+    return [digitos] + [digitos[-n:] for n in DIGITOS_TELEFONE_LOCAL if len(digitos) > n]
+
+
+def tokens_busca(texto):
+    """Termos digitados; sem letras, a busca é um número só ("11 9988" -> "119988")."""
+    normalizado = normalizar(texto)
+    if not re.search(r"[a-z]", normalizado):
+        digitos = _RE_NAO_DIGITO.sub("", normalizado)
+        return [digitos] if digitos else []
+    return _RE_TOKEN.findall(normalizado)
+
+
+# ==========================================================
+# 🧱 ÍNDICE
+# ==========================================================
+def construir_indice(df, coluna, telefones=None, rotulo=None):
+    """{"valores", "posicao", "rotulos", "frequencia", "normalizados", "tokens" (ordenados), "donos"} da coluna.
+
+    `telefones`: coluna cujos números também encontram o valor (ex.: o nome do lead
+    pelo telefone). `rotulo(valor, telefones)` monta o texto exibido na opção. Os valores
+    das opções são o texto da célula (sem espaços nas pontas).
+    """
+    import numpy as np
+
+    if df is None or coluna not in df.columns:
+        return None
+    # Índice sobre o texto da célula (a coluna pode misturar texto, número e data)
+    texto = df[coluna].where(df[coluna].notna(), "").astype(str).str.strip()
+    validos = texto != ""
+    contagem = texto[validos].value_counts().sort_index(kind="stable")
+    valores = contagem.index.tolist()
+    por_valor = {}
+    if telefones is not None and telefones in df.columns:
+        pares = df.loc[validos, [telefones]].assign(**{coluna: texto[validos]}).dropna().drop_duplicates()
+        por_valor = pares.groupby(coluna, sort=False)[telefones].agg(list).to_dict()
+
+    tokens, donos = [], []
+    for i, valor in enumerate(valores):
+        termos = set(tokens_texto(valor))
+        for telefone in por_valor.get(valor, []):
+            termos.update(tokens_telefone(telefone))
+        tokens.extend(termos)
+        donos.extend([i] * len(termos))
+
+    tokens = np.array(tokens, dtype=str)
+    ordem = np.argsort(tokens, kind="stable")
+    return {
+        "valores": valores,
+        "posicao": {valor: i for i, valor in enumerate(valores)},
+        "rotulos": [rotulo(v, por_valor.get(v, [])) if rotulo else str(v) for v in valores],
+        "frequencia": contagem.to_numpy(),
+        "normalizados": [normalizar(v) for v in valores],
+        "tokens": tokens[ordem],
+        "donos": np.array(donos, dtype="int64")[ordem],
+    }
+
+
+def indice_busca(aba, coluna, telefones=None, rotulo=None):
+    """Índice de busca da coluna da aba limpa, construído uma vez por snapshot."""
+    return derivado(f"busca:{aba}:{coluna}:{telefones}", lambda abas: construir_indice(aba_limpa(aba), coluna, telefones, rotulo))
+
+
+def _casam_prefixo(indice, termo):
+    import numpy as np
+
+    tokens = indice["tokens"]
+    inicio = np.searchsorted(tokens, termo, side="left")
+    fim = np.searchsorted(tokens, termo + "\uffff", side="left")  # fim da faixa de tokens com esse prefixo
+    return set(indice["donos"][inicio:fim].tolist())
+
+
+def buscar(indice, texto, limite=None):
+    """Posições (no índice) dos melhores valores para o texto digitado; sem texto, os mais frequentes."""
+    import numpy as np
+
+    limite = limite or BUSCA_MAX_OPCOES
+    if indice is None or not indice["valores"]:
+        return []
+    termos = tokens_busca(texto or "")
+    if not termos:
+        return np.argsort(-indice["frequencia"], kind="stable")[:limite].tolist()
+
+    candidatos = None
+    for termo in termos:
+        casados = _casam_prefixo(indice, termo)
+        candidatos = casados if candidatos is None else candidatos & casados
+        if not candidatos:
+            return []
+    busca = normalizar(texto)
+    return sorted(candidatos, key=lambda i: (not indice["normalizados"][i].startswith(busca), -indice["frequencia"][i], i))[:limite]
+
+
+def opcoes_busca(indice, texto, selecionado=None, limite=None):
+    """Opções do dcc.Dropdown para o texto digitado, mantendo o(s) valor(es) já escolhido(s)."""
+    if indice is None:
+        return []
+    posicoes = buscar(indice, texto, limite)
+    opcoes = [{"label": indice["rotulos"][i], "value": indice["valores"][i]} for i in posicoes]
+    if texto:
+        # O dropdown ainda filtra no navegador (com acento/sem telefone no rótulo, "joao" esconderia "João"):
+        # o texto de busca de cada opção começa pelo que foi digitado, então o que o servidor escolheu aparece
+        for opcao in opcoes:
+            opcao["search"] = f"{texto} {opcao['label']}"
+    # O dropdown apaga o valor escolhido se ele sumir das opções
+    mostrados = {o["value"] for o in opcoes}
+    escolhidos = selecionado if isinstance(selecionado, list) else [selecionado] if selecionado not in (None, "") else []
+    rotulo = lambda v: indice["rotulos"][indice["posicao"][v]] if v in indice["posicao"] else str(v)
+    return [{"label": rotulo(v), "value": v} for v in escolhidos if v not in mostrados] + opcoes
+
+
+# ==========================================================
+# 🔌 CALLBACK DO DROPDOWN
+# ==========================================================
+def registrar_busca(id_dropdown, aba, coluna, telefones=None, rotulo=None):
+    """Opções de `id_dropdown` servidas pela busca (no lugar da lista inteira vinda do callback da página)."""
+    import dash
+    from dash import Input, Output, State
+
+    @dash.callback(
+        Output(id_dropdown, "options"),
+        [
+            Input(id_dropdown, "search_value"),
+            Input("snapshot_evento", "data"),  # dados novos: refaz as opções com o índice do snapshot novo
+        ],
+        State(id_dropdown, "value"),
+    )
+    def atualizar_opcoes(texto, evento_snapshot, selecionado):
+        return opcoes_busca(indice_busca(aba, coluna, telefones, rotulo), texto, selecionado)
+
+    return atualizar_opcoes
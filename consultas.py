@@ -0,0 +1,292 @@
+# ==========================================================
+# 🧮 CONSULTAS AGREGADAS (PANDAS OU SQLITE)
+# ==========================================================
+# Ponto único para as consultas de KPI, gráfico e tabela: o mesmo pedido
+# (aba, filtros, group_by, medidas) é respondido pela aba limpa + índices do
+# snapshot (pandas) ou pelo SQLite do snapshot (banco_sqlite), conforme ROBO_BACKEND.
+# `python consultas.py --verificar` roda as consultas das páginas nos dois
+# backends e aponta qualquer diferença.
+import sys
+
+from resumos import VALORES_DISTRIBUIDO
+from utils import (
+    BACKEND_CONSULTAS, ESQUEMA_ABAS, registrar_ao_publicar, aba_limpa, filtrar_aba,
+    CP_SHEET_NAME, CP_COL_AREA, CP_COL_STATUS, CP_COL_UF, CP_COL_MES_COMP, CP_COL_RESPONSAVEL,
+    CP_COL_CONSULTOR, CP_COL_DISTRIBUIDO, CP_COL_SLA, CP_COL_DATA_DIST,
+    FP_SHEET_NAME, FP_COL_CONSULTOR, FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_PLATFORM, FP_COL_UF,
+    FP_COL_ORIGEM, FP_COL_MES, FP_COL_NOME, FP_COL_TELEFONE,
+    FM_SHEET_NAME, FM_COL_MES, FM_COL_AREA_PASTA_PROXY, FM_COL_META_ATINGIDA, FM_COL_CONTRATOS_REAL,
+    FM_COL_TAXA_CONVERSAO_REAL,
+    MP_SHEET_NAME, MP_COL_MES, MP_COL_META_MENSAL, MP_COL_META_ATINGIDA, MP_COL_TAXA_CONVERSAO,
+    MP_COL_POTENCIAL_50, MP_COL_POTENCIAL_100,
+    RK_SHEET_NAME, RK_COL_CONSULTOR, RK_COL_CONTRATOS, RK_COL_TAXA_CONVERSAO, RK_COL_ATINGIMENTO,
+    RK_COL_REUNIOES,
+    PD_SHEET_NAME, PD_COL_CONSULTOR, PD_COL_DATA, PD_COL_LIGACOES, PD_COL_COTACAO,
+    SUFIXO_ANO_MES, SUFIXO_DIA,
+)
+
+BACKENDS = ("pandas", "sqlite")
+
+if BACKEND_CONSULTAS == "sqlite":
+    from banco_sqlite import banco_atual
+
+    # O banco é montado logo após cada snapshot, fora do caminho das requisições
+    registrar_ao_publicar(banco_atual)
+
+
+def parse_medida(medida):
+    """'count' | 'sum:col' | 'mean:col' -> (função, coluna|None, nome_saida)."""
+    funcao, _, coluna = medida.partition(":")
+    if funcao == "count":
+        return ("count", None, "count")
+    return (funcao, coluna, f"{funcao}_{coluna}")
+
+
+def _colunas_existentes(aba, filtros):
+    """Descarta filtros de colunas que a aba não tem (mesmo comportamento de aplicar_filtros)."""
+    df = aba_limpa(aba)
+    colunas = set(df.columns) if df is not None else set()
+    return {col: valor for col, valor in filtros.items() if col in colunas}
+
+
+def _usar_sqlite(aba, backend, colunas=()):
+    # Aba ou coluna ausente na planilha não vira tabela/coluna no SQLite: o pandas devolve o resultado vazio
+    df = aba_limpa(aba)
+    return (backend or BACKEND_CONSULTAS) == "sqlite" and df is not None and all(c in df.columns for c in colunas)
+
+
+def _agregar_pandas(aba, filtros, group_by, medidas, excluir_vazios):
+    import pandas as pd
+
+    df = filtrar_aba(aba, filtros)
+    for col in excluir_vazios:
+        if col in df.columns:
+            df = df[df[col].notna() & (df[col] != "")]
+    if not group_by:
+        # Aba ou coluna ausente na planilha: o mesmo resultado de "sem dados" (count/sum 0, mean NaN)
+        linha = {nome: (len(df) if funcao == "count" else getattr(df[col] if col in df.columns else pd.Series(dtype=float), funcao)())
+                 for funcao, col, nome in medidas}
+        return pd.DataFrame([linha])
+    if df.empty or any(c not in df.columns for c in list(group_by) + [col for _, col, _ in medidas if col]):
+        return pd.DataFrame(columns=list(group_by) + [nome for _, _, nome in medidas])
+    grupos = df.groupby(list(group_by), sort=True)
+    colunas = {}
+    for funcao, col, nome in medidas:
+        colunas[nome] = grupos.size() if funcao == "count" else grupos[col].agg(funcao)
+    return pd.DataFrame(colunas).reset_index()
+
+
+def _linhas_pandas(aba, filtros, colunas, limite, ordenar_por):
+    df = filtrar_aba(aba, filtros)[list(colunas)]
+    if ordenar_por:
+        df = df.sort_values(ordenar_por, kind="mergesort", na_position="first")
+    return (df.head(limite) if limite else df).reset_index(drop=True)
+
+
+def agregar(aba, filtros=None, group_by=(), medidas=("count",), excluir_vazios=(), backend=None):
+    """Agrega a aba filtrada; `medidas` em texto ('sum:col') ou já interpretadas.
+
+    Sem group_by devolve sempre uma linha (count 0 / sum 0 / mean NaN quando não há dados).
+    """
+    medidas = [parse_medida(m) if isinstance(m, str) else m for m in medidas]
+    medidas = list({nome: (funcao, col, nome) for funcao, col, nome in medidas}.values())  # aliases repetidos
+    filtros = _colunas_existentes(aba, filtros or {})
+    if _usar_sqlite(aba, backend, list(group_by) + [col for _, col, _ in medidas if col]):
+        from banco_sqlite import agregar_sql
+
+        return agregar_sql(aba, filtros, list(group_by), medidas, excluir_vazios)
+    return _agregar_pandas(aba, filtros, list(group_by), medidas, excluir_vazios)
+
+
+def linhas(aba, filtros=None, colunas=None, limite=None, ordenar_por=None, backend=None):
+    """Linhas da aba filtrada (tabelas das páginas), na ordem da planilha."""
+    df = aba_limpa(aba)
+    if df is None:
+        import pandas as pd
+
+        return pd.DataFrame()
+    colunas = [c for c in (colunas or df.columns) if c in df.columns]
+    filtros = _colunas_existentes(aba, filtros or {})
+    if _usar_sqlite(aba, backend):
+        from banco_sqlite import linhas_sql
+
+        datas = [c for c in colunas if str(df[c].dtype).startswith("datetime")]
+        return linhas_sql(aba, filtros, colunas, limite, ordenar_por, datas)
+    return _linhas_pandas(aba, filtros, colunas, limite, ordenar_por)
+
+
+# ==========================================================
+# 📋 CONSULTAS DAS PÁGINAS
+# ==========================================================
+# KPIs, gráficos e tabelas das seis páginas como pedidos declarativos.
+# "filtros" fixos somam-se aos dropdowns da página; "tipo": "linhas" = tabela.
+# O KPI "SLA Atrasado" e o gráfico de aging do Controle ficam de fora: saem de
+# sla.py (dias contados até hoje contra o limite de cada área, materializados no
+# snapshot), não de uma coluna da planilha que os dois backends possam consultar.
+CONSULTAS_PAGINAS = {
+    "controle": {
+        "aba": CP_SHEET_NAME,
+        "consultas": {
+            "kpi_total": {"medidas": ["count"]},
+            "kpi_distribuidos": {"filtros": {CP_COL_DISTRIBUIDO: VALORES_DISTRIBUIDO}, "medidas": ["count"]},
+            "kpi_em_andamento": {"filtros": {CP_COL_STATUS: "EM ANDAMENTO"}, "medidas": ["count"]},
+            "graf_area": {"group_by": [CP_COL_AREA], "excluir_vazios": [CP_COL_AREA]},
+            "graf_status": {"group_by": [CP_COL_STATUS], "excluir_vazios": [CP_COL_STATUS]},
+            "graf_tempo": {"group_by": [CP_COL_DATA_DIST + SUFIXO_ANO_MES]},
+            "graf_responsavel": {"group_by": [CP_COL_RESPONSAVEL], "excluir_vazios": [CP_COL_RESPONSAVEL]},
+            "tabela": {"tipo": "linhas", "limite": 30, "colunas": [
+                CP_COL_MES_COMP, CP_COL_RESPONSAVEL, CP_COL_CONSULTOR, CP_COL_AREA, CP_COL_UF,
+                CP_COL_DISTRIBUIDO, CP_COL_STATUS, CP_COL_SLA]},
+        },
+    },
+    "funil": {
+        "aba": FP_SHEET_NAME,
+        "consultas": {
+            "kpi_total": {"medidas": ["count"]},
+            "kpi_pendentes": {"filtros": {FP_COL_STATUS: "Pendente"}, "medidas": ["count"]},
+            "kpi_em_andamento": {"filtros": {FP_COL_STATUS: "Em Andamento"}, "medidas": ["count"]},
+            "kpi_convertidos": {"filtros": {FP_COL_STATUS: ["Fechado", "Distribuído", "Processo Distribuído"]}, "medidas": ["count"]},
+            "graf_status": {"group_by": [FP_COL_STATUS], "excluir_vazios": [FP_COL_STATUS]},
+            "graf_origem": {"group_by": [FP_COL_ORIGEM], "excluir_vazios": [FP_COL_ORIGEM]},
+            "graf_motivos": {"group_by": [FP_COL_MOTIVO], "excluir_vazios": [FP_COL_MOTIVO]},
+            "tabela": {"tipo": "linhas", "limite": 30, "colunas": [
+                FP_COL_NOME, FP_COL_CONSULTOR, FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_PLATFORM, FP_COL_UF,
+                FP_COL_TELEFONE, FP_COL_MES]},
+        },
+    },
+    "funil_metas_crosstab": {
+        "aba": FM_SHEET_NAME,
+        "consultas": {
+            "kpis": {"medidas": [f"sum:{FM_COL_CONTRATOS_REAL}", f"sum:{FM_COL_META_ATINGIDA}",
+                                 f"mean:{FM_COL_TAXA_CONVERSAO_REAL}"]},
+            "graf_taxa": {"group_by": [FM_COL_AREA_PASTA_PROXY, FM_COL_MES], "medidas": [f"mean:{FM_COL_TAXA_CONVERSAO_REAL}"]},
+            "graf_contratos": {"group_by": [FM_COL_AREA_PASTA_PROXY, FM_COL_MES],
+                               "medidas": [f"sum:{FM_COL_CONTRATOS_REAL}", f"sum:{FM_COL_META_ATINGIDA}"]},
+            "tabela": {"tipo": "linhas", "limite": 30},
+        },
+    },
+    "metas": {
+        "aba": MP_SHEET_NAME,
+        "consultas": {
+            "kpis": {"medidas": [f"sum:{MP_COL_META_ATINGIDA}", f"sum:{MP_COL_META_MENSAL}", f"mean:{MP_COL_TAXA_CONVERSAO}"]},
+            "graf_atingimento": {"group_by": [MP_COL_META_MENSAL], "medidas": [f"sum:{MP_COL_META_ATINGIDA}"]},
+            "graf_conversao": {"group_by": [MP_COL_MES], "medidas": [f"mean:{MP_COL_TAXA_CONVERSAO}"]},
+            "graf_potencial": {"group_by": [MP_COL_META_MENSAL],
+                               "medidas": [f"sum:{MP_COL_POTENCIAL_50}", f"sum:{MP_COL_POTENCIAL_100}"]},
+            "tabela": {"tipo": "linhas", "limite": 30},
+        },
+    },
+    "ranking": {
+        "aba": RK_SHEET_NAME,
+        "consultas": {
+            "kpis": {"medidas": [f"sum:{RK_COL_CONTRATOS}", f"mean:{RK_COL_TAXA_CONVERSAO}",
+                                 f"sum:{RK_COL_REUNIOES}", f"mean:{RK_COL_ATINGIMENTO}"]},
+            "ranking": {"group_by": [RK_COL_CONSULTOR],
+                        "medidas": [f"sum:{RK_COL_CONTRATOS}", f"mean:{RK_COL_TAXA_CONVERSAO}",
+                                    f"mean:{RK_COL_ATINGIMENTO}", f"sum:{RK_COL_REUNIOES}"]},
+        },
+    },
+    "producao_diaria": {
+        "aba": PD_SHEET_NAME,
+        "consultas": {
+            "kpis": {"medidas": ["count", f"sum:{PD_COL_LIGACOES}", f"sum:{PD_COL_COTACAO}"]},
+            "graf_consultor": {"group_by": [PD_COL_CONSULTOR], "medidas": [f"sum:{PD_COL_LIGACOES}", f"sum:{PD_COL_COTACAO}"]},
+            "graf_tendencia": {"group_by": [PD_COL_DATA + SUFIXO_DIA], "medidas": [f"sum:{PD_COL_LIGACOES}", f"sum:{PD_COL_COTACAO}"]},
+            "tabela": {"tipo": "linhas", "ordenar_por": PD_COL_DATA},
+        },
+    },
+}
+
+
+def executar_consulta(pagina, nome, filtros=None, backend=None):
+    """Roda uma consulta declarada em CONSULTAS_PAGINAS com os filtros da página."""
+    spec = CONSULTAS_PAGINAS[pagina]
+    consulta = spec["consultas"][nome]
+    filtros = {**(filtros or {}), **consulta.get("filtros", {})}
+    if consulta.get("tipo") == "linhas":
+        return linhas(spec["aba"], filtros, consulta.get("colunas"), consulta.get("limite"),
+                      consulta.get("ordenar_por"), backend=backend)
+    return agregar(spec["aba"], filtros, consulta.get("group_by", ()), consulta.get("medidas", ("count",)),
+                   consulta.get("excluir_vazios", ()), backend=backend)
+
+
+# ==========================================================
+# ✅ VERIFICAÇÃO ENTRE BACKENDS
+# ==========================================================
+def _normalizar(df):
+    """Tipos neutros e ordem estável para comparar resultados de backends diferentes."""
+    import pandas as pd
+
+    df = df.reset_index(drop=True).copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime("%Y-%m-%d %H:%M:%S")
+        elif df[col].isna().all():
+            df[col] = float("nan")  # coluna toda vazia: NaN no pandas, None no SQLite
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            numerico = pd.to_numeric(df[col], errors="coerce")
+            if numerico.notna().sum() == df[col].notna().sum() and df[col].notna().any():
+                df[col] = numerico
+            else:
+                df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df
+
+
+def resultados_equivalentes(a, b, ordenado=False):
+    """Mesmas colunas e linhas; números com tolerância (AVG/mean podem diferir no último bit)."""
+    import numpy as np
+    import pandas as pd
+
+    a, b = _normalizar(a), _normalizar(b)
+    if list(a.columns) != list(b.columns) or len(a) != len(b):
+        return False
+    if not ordenado and len(a):
+        chave = lambda d: d.astype(str).agg("|".join, axis=1)
+        a = a.iloc[chave(a).argsort(kind="mergesort")].reset_index(drop=True)
+        b = b.iloc[chave(b).argsort(kind="mergesort")].reset_index(drop=True)
+    for col in a.columns:
+        x, y = a[col], b[col]
+        if pd.api.types.is_numeric_dtype(x) and pd.api.types.is_numeric_dtype(y):
+            if not np.allclose(x.astype(float), y.astype(float), equal_nan=True):
+                return False
+        elif not (x.astype(str) == y.astype(str)).all():
+            return False
+    return True
+
+
+def _filtros_exemplo(aba):
+    """Primeiro valor não vazio de cada filtro da página, para exercitar o WHERE."""
+    df = aba_limpa(aba)
+    filtros = {}
+    for col in ESQUEMA_ABAS[aba]["filtros"]:
+        if df is not None and col in df.columns:
+            valores = [v for v in df[col].dropna().unique() if v != ""]
+            if valores:
+                filtros[col] = [valores[0]]
+    return filtros
+
+
+def verificar_backends():
+    """Compara pandas x SQLite em todas as consultas das páginas (sem filtro e com cada filtro)."""
+    from banco_sqlite import banco_atual
+
+    banco_atual()
+    divergencias = []
+    for pagina, spec in CONSULTAS_PAGINAS.items():
+        cenarios = [{}] + [{col: valor} for col, valor in _filtros_exemplo(spec["aba"]).items()]
+        for nome, consulta in spec["consultas"].items():
+            for filtros in cenarios:
+                via_pandas = executar_consulta(pagina, nome, filtros, backend="pandas")
+                via_sqlite = executar_consulta(pagina, nome, filtros, backend="sqlite")
+                ordenado = consulta.get("tipo") == "linhas"
+                if not resultados_equivalentes(via_pandas, via_sqlite, ordenado):
+                    divergencias.append((pagina, nome, filtros))
+                    print(f"❌ {pagina}.{nome} {filtros}\n{via_pandas.head()}\n{via_sqlite.head()}")
+        print(f"✅ {pagina}: {len(spec['consultas'])} consultas x {len(cenarios)} cenários")
+    return divergencias
+
+
+if __name__ == "__main__":
+    if "--verificar" in sys.argv:
+        sys.exit(1 if verificar_backends() else 0)
+    print("Uso: python consultas.py --verificar")
@@ -0,0 +1,156 @@
+# ==========================================================
+# 👥 DIMENSÃO DE CONSULTORES (CHAVES INTEIRAS ENTRE ABAS)
+# ==========================================================
+# Cada aba escreve o consultor de um jeito ("JOÃO ROSA", "Joao Rosa",
+# "DRª INGRID", "Dra. Ingrid", "Rafaela (Indicação)"...). Por snapshot, todas
+# as grafias viram uma chave canônica (sem acento, caixa, título Dr/Dra ou
+# observação entre parênteses) e cada chave ganha um id inteiro; o id 0 é
+# "Não Atribuído". As abas limpas recebem a coluna `consultor_id` (int32).
+#
+# Cruzamentos entre abas (esforço x contratos x leads) somam por id com
+# np.bincount: nada de merge por texto na requisição. Os ids valem dentro do
+# snapshot; para guardar fora dele, use o nome ou a chave.
+import re
+
+from resumos import VALORES_DISTRIBUIDO
+from utils import (
+    aba_limpa, derivado, CP_SHEET_NAME, CP_COL_DISTRIBUIDO, FP_SHEET_NAME, RK_SHEET_NAME, RK_COL_CONTRATOS,
+    RK_COL_REUNIOES, PD_SHEET_NAME, PD_COL_LIGACOES, PD_COL_COTACAO
+)
+
+COL_CONSULTOR = "consultor"
+COL_CONSULTOR_ID = "consultor_id"
+ID_NAO_ATRIBUIDO = 0
+NOME_NAO_ATRIBUIDO = "Não Atribuído"
+VAZIOS = {"", "nan", "na", "none", "nao atribuido", "0"}
+
+_RE_TITULO = re.compile(r"^dr[aª]?(?:\.\s*|\s+)", re.IGNORECASE)
+_RE_PARENTESES = re.compile(r"\([^)]*\)")
+_RE_BARRA = re.compile(r"\s*/\s*")
+_RE_ESPACOS = re.compile(r"\s+")
+
+
+def _sem_adornos(nome):
+    """Tira título (Dr/Dra), observações entre parênteses e espaços sobrando; mantém acentos."""
+    partes = _RE_BARRA.split(_RE_PARENTESES.sub(" ", str(nome)).strip())  # "Larissa/Dr. Deborah": dupla
+    return "/".join(_RE_ESPACOS.sub(" ", _RE_TITULO.sub("", p.strip())).strip() for p in partes)
+
+
+def chave_consultor(nome):
+    """Grafia qualquer -> chave canônica ("" = não atribuído). "DRª João  Rosa" -> "joao rosa"."""
+    import unidecode
+
+    chave = unidecode.unidecode(_sem_adornos(nome)).lower()
+    return "" if chave in VAZIOS else chave
+
+
+def _colunas_consultor(df):
+    # O ranking vem em duas metades lado a lado: consultor e consultor.1
+    return [c for c in df.columns if str(c).split(".")[0] == COL_CONSULTOR]
+
+
+def construir_dimensao(abas):
+    """{"tabela": DataFrame(consultor_id, consultor, chave), "ids": {chave: id}, "nomes": array por id}."""
+    import collections
+
+    import numpy as np
+    import pandas as pd
+
+    grafias = collections.Counter()
+    for df in abas.values():
+        for col in _colunas_consultor(df):
+            grafias.update(df[col].dropna().astype(str).str.strip().value_counts().to_dict())
+
+    # Nome exibido: a grafia (sem adornos, em Title Case) mais frequente de cada chave
+    variantes = collections.defaultdict(collections.Counter)
+    for grafia, quantidade in grafias.items():
+        chave = chave_consultor(grafia)
+        if chave:
+            variantes[chave][_sem_adornos(grafia).title()] += quantidade
+
+    chaves = sorted(variantes)
+    nomes = [NOME_NAO_ATRIBUIDO] + [max(sorted(variantes[c]), key=variantes[c].get) for c in chaves]
+    tabela = pd.DataFrame({
+        COL_CONSULTOR_ID: np.arange(len(nomes), dtype="int32"),
+        COL_CONSULTOR: nomes,
+        "chave": [""] + chaves,
+    })
+    return {
+        "tabela": tabela,
+        "ids": {chave: i for i, chave in enumerate(chaves, start=1)},
+        "nomes": np.array(nomes, dtype=object),
+    }
+
+
+def dimensao_consultores():
+    return derivado("dimensao_consultores", construir_dimensao)
+
+
+def codificar_consultores(serie):
+    """Série de nomes (qualquer grafia) -> ids int32 da dimensão; só os valores distintos são normalizados."""
+    ids = dimensao_consultores()["ids"]
+    mapa = {valor: ids.get(chave_consultor(valor), ID_NAO_ATRIBUIDO) for valor in serie.unique()}
+    return serie.map(mapa).fillna(ID_NAO_ATRIBUIDO).astype("int32")
+
+
+def nomes_consultores(ids):
+    """ids -> nomes de exibição (indexação de array, sem merge)."""
+    import numpy as np
+
+    return dimensao_consultores()["nomes"][np.asarray(ids, dtype="int64")]
+
+
+def id_consultor(nome):
+    """Nome em qualquer grafia -> id (0 se não estiver na dimensão)."""
+    return dimensao_consultores()["ids"].get(chave_consultor(nome), ID_NAO_ATRIBUIDO)
+
+
+# ==========================================================
+# 🔗 CRUZAMENTO ENTRE ABAS POR ID
+# ==========================================================
+def _somar_por_id(df, n, coluna=None):
+    """Contagem (ou soma de `coluna`) por consultor_id, alinhada aos ids 0..n-1."""
+    import numpy as np
+    import pandas as pd
+
+    if df is None or df.empty or COL_CONSULTOR_ID not in df.columns:
+        return np.zeros(n)
+    pesos = None
+    if coluna is not None:
+        if coluna not in df.columns:
+            return np.zeros(n)
+        pesos = pd.to_numeric(df[coluna], errors="coerce").fillna(0).to_numpy(dtype="float64")
+    return np.bincount(df[COL_CONSULTOR_ID].to_numpy(), weights=pesos, minlength=n)[:n]
+
+
+def construir_painel(abas):
+    """Uma linha por consultor: leads do funil, processos/distribuídos, contratos/reuniões e produção."""
+    import numpy as np
+
+    dimensao = dimensao_consultores()
+    n = len(dimensao["tabela"])
+    controle = aba_limpa(CP_SHEET_NAME)
+    distribuidos = None
+    if controle is not None and CP_COL_DISTRIBUIDO in controle.columns:
+        distribuidos = controle[controle[CP_COL_DISTRIBUIDO].isin(VALORES_DISTRIBUIDO)]
+
+    painel = dimensao["tabela"][[COL_CONSULTOR_ID, COL_CONSULTOR]].copy()
+    painel["leads"] = _somar_por_id(aba_limpa(FP_SHEET_NAME), n)
+    painel["processos"] = _somar_por_id(controle, n)
+    painel["distribuidos"] = _somar_por_id(distribuidos, n)
+    painel["contratos"] = _somar_por_id(aba_limpa(RK_SHEET_NAME), n, RK_COL_CONTRATOS)
+    painel["reunioes"] = _somar_por_id(aba_limpa(RK_SHEET_NAME), n, RK_COL_REUNIOES)
+    painel["ligacoes"] = _somar_por_id(aba_limpa(PD_SHEET_NAME), n, PD_COL_LIGACOES)
+    painel["cotacoes"] = _somar_por_id(aba_limpa(PD_SHEET_NAME), n, PD_COL_COTACAO)
+
+    metricas = ["leads", "processos", "distribuidos", "contratos", "reunioes", "ligacoes", "cotacoes"]
+    painel[metricas] = painel[metricas].astype("int64")
+    contratos = painel["contratos"].replace(0, np.nan)
+    painel["ligacoes_por_contrato"] = (painel["ligacoes"] / contratos).round(1)
+    painel["leads_por_contrato"] = (painel["leads"] / contratos).round(1)
+    return painel[painel[metricas].sum(axis=1) > 0].reset_index(drop=True)
+
+
+def painel_consultores():
+    """Cruzamento esforço x resultados por consultor, por snapshot (ver construir_painel)."""
+    return derivado("painel_consultores", construir_painel)
@@ -0,0 +1,132 @@
+# ==========================================================
+# 📡 AVISO DE SNAPSHOT NOVO (SERVER-SENT EVENTS)
+# ==========================================================
+# Em vez de cada aba aberta rodar um dcc.Interval por página (um callback
+# completo a cada tique, mudando ou não os dados), o navegador mantém uma
+# conexão SSE em GET /eventos/snapshot. O servidor só escreve nela quando um
+# snapshot com conteúdo diferente é publicado; o script em assets/ repassa o
+# aviso ao dcc.Store "snapshot_evento" e só então as páginas recarregam.
+#
+# Enquanto houver alguém conectado, uma única thread por worker mantém o
+# snapshot em dia (uma consulta à planilha por TTL, não uma por aba). Cada
+# conexão ocupa uma thread: o gunicorn roda com worker gthread (Procfile).
+# Avisos e vigia são por workbook: o script conecta com ?workbook= da página e
+# reconecta quando a navegação troca de workbook (senão ficaria no antigo até
+# SSE_DURACAO_MAX_SEGUNDOS).
+import json
+import os
+import threading
+import time
+
+from flask import Response, stream_with_context
+
+import utils
+
+SSE_MAX_CONEXOES = int(os.environ.get("ROBO_SSE_MAX_CONEXOES", "40"))  # por worker; deixe folga nas threads do gunicorn
+SSE_KEEPALIVE_SEGUNDOS = 20  # comentário periódico para proxies não derrubarem a conexão
+SSE_DURACAO_MAX_SEGUNDOS = int(os.environ.get("ROBO_SSE_DURACAO_MAX", "600"))  # o navegador reconecta sozinho
+SSE_RETRY_MS = 10000
+
+_estado = {"conexoes": 0}
+_anuncios = {}  # {workbook: {"impressao", "carregado_em", "anuncio", "conexoes"}}
+_condicao = threading.Condition()
+_vigia = {"thread": None}
+
+
+def _anuncio(workbook):
+    # Chamado com _condicao adquirida
+    if workbook not in _anuncios:
+        _anuncios[workbook] = {"impressao": None, "carregado_em": None, "anuncio": 0, "conexoes": 0}
+    return _anuncios[workbook]
+
+
+def _evento_atual(anuncio):
+    # Sem a versão: é um contador de cada worker; o
+    # navegador, que pode reconectar em outro worker, compara a impressão do conteúdo
+    return {"impressao": anuncio["impressao"], "carregado_em": anuncio["carregado_em"]}
+
+
+def _ao_publicar():
+    """Hook pós-snapshot: anuncia só quando o conteúdo mudou (aos clientes do workbook publicado)."""
+    workbook = utils.workbook_atual()
+    snapshot = utils.snapshot_atual()
+    impressao = snapshot["impressao"]  # hash do conteúdo, calculado ao gravar o snapshot
+    with _condicao:
+        anuncio = _anuncio(workbook)
+        anuncio["carregado_em"] = snapshot["carregado_em"]
+        if impressao == anuncio["impressao"]:
+            return
+        anuncio["impressao"] = impressao
+        anuncio["anuncio"] += 1
+        _condicao.notify_all()
+    print(f"📡 [{workbook}] Snapshot v{snapshot['versao']} com dados novos: avisando {anuncio['conexoes']} conexão(ões)")
+
+
+def _vigiar_snapshot():
+    """Com clientes conectados, mantém o snapshot de cada workbook assistido revalidando no ritmo do TTL."""
+    while True:
+        time.sleep(utils.CACHE_TTL_SEGUNDOS + 1)
+        with _condicao:
+            assistidos = [workbook for workbook, anuncio in _anuncios.items() if anuncio["conexoes"] > 0]
+        for workbook in assistidos:
+            with utils.usando_workbook(workbook):
+                utils.obter_snapshot()  # passado o TTL, dispara a revalidação em segundo plano
+
+
+def _garantir_vigia():
+    # Criada no primeiro cliente (depois do fork dos workers do gunicorn)
+    with _condicao:
+        if _vigia["thread"] is None:
+            _vigia["thread"] = threading.Thread(target=_vigiar_snapshot, name="vigia-snapshot", daemon=True)
+            _vigia["thread"].start()
+
+
+def _formatar(evento, dados):
+    return f"event: {evento}\ndata: {json.dumps(dados)}\n\n"
+
+
+def _fluxo_eventos(workbook):
+    inicio = time.monotonic()
+    with _condicao:
+        anuncio = _anuncio(workbook)
+        _estado["conexoes"] += 1
+        anuncio["conexoes"] += 1
+    try:
+        with _condicao:
+            visto = anuncio["anuncio"]
+            evento = _evento_atual(anuncio)
+        yield f"retry: {SSE_RETRY_MS}\n" + _formatar("snapshot", evento)
+        while time.monotonic() - inicio < SSE_DURACAO_MAX_SEGUNDOS:
+            with _condicao:
+                _condicao.wait_for(lambda: anuncio["anuncio"] != visto, timeout=SSE_KEEPALIVE_SEGUNDOS)
+                novo = anuncio["anuncio"] != visto
+                visto = anuncio["anuncio"]
+                evento = _evento_atual(anuncio)
+            yield _formatar("snapshot", evento) if novo else ": ping\n\n"
+    finally:
+        with _condicao:
+            _estado["conexoes"] -= 1
+            anuncio["conexoes"] -= 1
+
+
+def registrar_eventos_snapshot(server):
+    utils.registrar_ao_publicar(_ao_publicar)
+    for estado in utils.workbooks_carregados():  # snapshot carregado antes do registro (--preload)
+        if estado["snapshot"]["abas"]:
+            with utils.usando_workbook(estado["id"]):
+                _ao_publicar()
+
+    @server.route("/eventos/snapshot")
+    def eventos_snapshot():
+        if _estado["conexoes"] >= SSE_MAX_CONEXOES:
+            # O script do navegador tenta de novo mais tarde (EventSource não reconecta após erro HTTP)
+            return Response("Muitas conexões abertas", status=503, headers={"Retry-After": "60"})
+        _garantir_vigia()
+        utils.obter_snapshot()
+        return Response(
+            stream_with_context(_fluxo_eventos(utils.workbook_atual())),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return eventos_snapshot
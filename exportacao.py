@@ -0,0 +1,147 @@
+# ==========================================================
+# 📤 EXPORTAÇÃO EM STREAMING (CSV / PARQUET)
+# ==========================================================
+# GET /exportar/<aba>?formato=csv|parquet&<coluna>=<valor>...
+# Os filtros são os mesmos dos dropdowns da página (ESQUEMA_ABAS) e os dados vêm
+# da aba limpa do snapshot em memória. A resposta é gerada em blocos, sem montar o arquivo
+# inteiro na memória, e o número de exportações simultâneas é limitado.
+import os
+import threading
+
+from flask import Response, abort, jsonify, request
+
+from utils import ESQUEMA_ABAS, dimensoes_da_aba, filtrar_aba
+
+EXPORT_MAX_SIMULTANEAS = int(os.environ.get("ROBO_EXPORT_MAX", "2"))
+EXPORT_LINHAS_POR_BLOCO = int(os.environ.get("ROBO_EXPORT_BLOCO", "5000"))
+
+_vagas = threading.BoundedSemaphore(EXPORT_MAX_SIMULTANEAS)
+PARAMETROS_RESERVADOS = {"formato", "group_by", "measure", "workbook"}  # workbook: escolhido em workbooks.py
+
+
+def _nome_arquivo(aba, formato):
+    import unidecode
+
+    return f"{unidecode.unidecode(aba).strip().lower().replace(' ', '_')}.{formato}"
+
+
+def filtros_da_query(aba, args):
+    """Query string -> {coluna: [valores]} só com as dimensões da aba; coluna desconhecida = 400."""
+    permitidos = dimensoes_da_aba(aba)
+    filtros = {}
+    for col in args:
+        if col in PARAMETROS_RESERVADOS:
+            continue
+        if col not in permitidos:
+            abort(400, description=f"Filtro '{col}' não disponível para '{aba}'. Use: {', '.join(permitidos)}")
+        filtros[col] = args.getlist(col)
+    return filtros
+
+
+def dados_filtrados(aba, filtros):
+    """Mesma limpeza e filtros da página, a partir da aba limpa e dos índices do snapshot."""
+    return filtrar_aba(aba, filtros)
+
+
+def _blocos(df):
+    for inicio in range(0, len(df), EXPORT_LINHAS_POR_BLOCO):
+        yield df.iloc[inicio:inicio + EXPORT_LINHAS_POR_BLOCO]
+
+
+def gerar_csv(df):
+    yield df.iloc[:0].to_csv(index=False)
+    for bloco in _blocos(df):
+        yield bloco.to_csv(index=False, header=False)
+
+
+def gerar_parquet(df):
+    """Escreve um row group por bloco e devolve os bytes assim que cada um fica pronto."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    class _Saida:
+        """Arquivo só-escrita que acumula os bytes até o próximo yield."""
+        def __init__(self):
+            self.partes, self.posicao, self.closed = [], 0, False
+
+        def write(self, dados):
+            self.partes.append(bytes(dados))
+            self.posicao += len(dados)
+            return len(dados)
+
+        def tell(self):
+            return self.posicao
+
+        def flush(self):
+            pass
+
+        def close(self):
+            self.closed = True
+
+        def retirar(self):
+            dados, self.partes = b"".join(self.partes), []
+            return dados
+
+    # Colunas de texto misto (ex.: CPF) viram string para o schema ficar estável entre blocos
+    texto = {c: "string" for c in df.columns if df[c].dtype == object}
+    df = df.astype(texto)
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+
+    saida = _Saida()
+    with pq.ParquetWriter(saida, schema) as escritor:
+        for bloco in _blocos(df):
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=schema, preserve_index=False))
+            yield saida.retirar()
+    yield saida.retirar()
+
+
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", gerar_csv),
+    "parquet": ("application/vnd.apache.parquet", gerar_parquet),
+}
+
+
+def registrar_rotas_exportacao(server):
+    @server.route("/exportar/<path:aba>")
+    def exportar(aba):
+        if aba not in ESQUEMA_ABAS:
+            abort(404, description=f"Aba '{aba}' não exportável.")
+        formato = request.args.get("formato", "csv").lower()
+        if formato not in FORMATOS:
+            abort(400, description=f"Formato '{formato}' inválido. Use: {', '.join(FORMATOS)}")
+        if formato == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                abort(501, description="Exportação Parquet requer o pacote 'pyarrow'.")
+        filtros = filtros_da_query(aba, request.args)
+
+        if not _vagas.acquire(blocking=False):
+            resposta = jsonify(erro="Muitas exportações em andamento, tente novamente em instantes.")
+            resposta.status_code = 429
+            resposta.headers["Retry-After"] = "10"
+            return resposta
+
+        try:
+            df = dados_filtrados(aba, filtros)
+        except Exception:
+            _vagas.release()
+            raise
+        tipo, gerar = FORMATOS[formato]
+
+        resposta = Response(gerar(df), mimetype=tipo, headers={
+            "Content-Disposition": f'attachment; filename="{_nome_arquivo(aba, formato)}"',
+            "X-Snapshot-Linhas": str(len(df)),
+        })
+        # A vaga é liberada quando o servidor fecha a resposta: fim do streaming, cliente que
+        # desconectou ou HEAD (o gerador pode nem ter começado, então não dá para usar o finally dele)
+        liberada = threading.Lock()
+
+        def liberar_vaga():
+            if liberada.acquire(blocking=False):
+                _vagas.release()
+
+        resposta.call_on_close(liberar_vaga)
+        return resposta
+
+    return exportar
@@ -0,0 +1,128 @@
+# ==========================================================
+# 🧪 FUNIL POR COORTE (CONVERSÃO ENTRE ETAPAS)
+# ==========================================================
+# Cada lead pertence à coorte do seu `mes` e está na etapa do seu status atual.
+# Como as etapas são ordenadas, quem está numa etapa passou por todas as
+# anteriores: "alcançou a etapa i" = status na etapa i ou depois. Perdidos
+# saem do funil sem registro de onde pararam e contam só como entrada.
+#
+# A matriz (fatia x coorte x etapa alcançada) é montada uma vez por snapshot.
+# Trocar de coorte, plataforma, UF ou origem só soma linhas já contadas; as
+# taxas etapa -> etapa saem dessas somas.
+from utils import (
+    aba_limpa, derivado, selecionar_fatias, FP_SHEET_NAME, FP_COL_STATUS, FP_COL_MES, FP_COL_CONSULTOR,
+    FP_COL_PLATFORM, FP_COL_UF, FP_COL_ORIGEM
+)
+
+ETAPAS_FUNIL = ["Pendente", "Follow-Up", "Em Andamento", "Negociação", "Fechado"]
+STATUS_EQUIVALENTES = {"Distribuído": "Fechado", "Processo Distribuído": "Fechado"}  # mesma conversão do KPI da página
+STATUS_PERDIDOS = ["Perdido", "Encerrado"]
+COL_PERDIDOS = "Perdido"
+
+# Consultor também é fatia para o funil da página continuar exato com o filtro de consultor
+FATIAS_COORTE = [FP_COL_PLATFORM, FP_COL_UF, FP_COL_ORIGEM, FP_COL_CONSULTOR]
+
+
+def rotulo_transicao(origem, destino):
+    return f"{origem} → {destino}"
+
+
+TRANSICOES = [rotulo_transicao(a, b) for a, b in zip(ETAPAS_FUNIL, ETAPAS_FUNIL[1:])]
+COL_CONVERSAO_TOTAL = "Conversão Total"
+
+
+def construir_matriz_coortes(df, fatias):
+    """Linhas (fatia..., mes, <etapa>..., Perdido) com quantos leads alcançaram cada etapa.
+
+    As contagens são cumulativas por etapa (Pendente = todos os leads da linha),
+    então somar linhas de fatias/coortes diferentes continua exato.
+    """
+    import pandas as pd
+
+    status = df[FP_COL_STATUS].replace(STATUS_EQUIVALENTES)
+    no_funil = status != ""
+    posicao = status.map({etapa: i for i, etapa in enumerate(ETAPAS_FUNIL)})
+    # Perdidos e status fora da ordem entraram no funil, mas não se sabe até onde foram
+    posicao = posicao.fillna(0).astype("int8")[no_funil]
+
+    alcancou = pd.DataFrame(
+        {etapa: (posicao >= i).astype("int32") for i, etapa in enumerate(ETAPAS_FUNIL)},
+        index=posicao.index,
+    )
+    alcancou[COL_PERDIDOS] = status[no_funil].isin(STATUS_PERDIDOS).astype("int32")
+    chaves = [df.loc[no_funil, col] for col in fatias + [FP_COL_MES]]
+    return alcancou.groupby(chaves, sort=False, dropna=False).sum().reset_index()
+
+
+def matriz_coortes():
+    """{"fatias", "contagens"} do Funil de Precatório, por snapshot (None sem a aba)."""
+    def construir(abas):
+        df = aba_limpa(FP_SHEET_NAME)
+        if df is None or FP_COL_STATUS not in df.columns or FP_COL_MES not in df.columns:
+            return None
+        fatias = [c for c in FATIAS_COORTE if c in df.columns]
+        return {"fatias": fatias, "contagens": construir_matriz_coortes(df, fatias)}
+    return derivado("coortes_funil", construir)
+
+
+def taxas_conversao(contagens):
+    """Acrescenta as taxas etapa -> etapa (%) e a conversão total a um DataFrame de contagens."""
+    import numpy as np
+
+    taxas = contagens.copy()
+    for (origem, destino), rotulo in zip(zip(ETAPAS_FUNIL, ETAPAS_FUNIL[1:]), TRANSICOES):
+        base = contagens[origem].replace(0, np.nan)
+        taxas[rotulo] = (contagens[destino] / base * 100).round(2)
+    taxas[COL_CONVERSAO_TOTAL] = (contagens[ETAPAS_FUNIL[-1]] / contagens[ETAPAS_FUNIL[0]].replace(0, np.nan) * 100).round(2)
+    return taxas
+
+
+def _ordenar_coortes(tabela):
+    import pandas as pd
+
+    datas = pd.to_datetime(tabela[FP_COL_MES], errors="coerce", format="mixed")
+    return tabela.assign(_data=datas).sort_values(["_data", FP_COL_MES], kind="mergesort").drop(columns="_data")
+
+
+def coortes(filtros=None):
+    """Uma linha por coorte (mes) com leads por etapa alcançada e as taxas de conversão.
+
+    `filtros` aceita plataforma, UF, origem, consultor e o próprio mes.
+    """
+    import pandas as pd
+
+    matriz = matriz_coortes()
+    if matriz is None or matriz["contagens"].empty:
+        return pd.DataFrame()
+    linhas = selecionar_fatias(matriz["contagens"], filtros or {})
+    somadas = linhas.groupby(FP_COL_MES, sort=False)[ETAPAS_FUNIL + [COL_PERDIDOS]].sum().reset_index()
+    somadas = somadas[somadas[FP_COL_MES] != ""]
+    return taxas_conversao(_ordenar_coortes(somadas)).reset_index(drop=True)
+
+
+def funil_etapas(filtros=None):
+    """Funil agregado das coortes selecionadas: DataFrame(Etapa, Leads, Taxa Etapa, Taxa Acumulada)."""
+    import pandas as pd
+
+    matriz = matriz_coortes()
+    if matriz is None or matriz["contagens"].empty:
+        return pd.DataFrame()
+    totais = selecionar_fatias(matriz["contagens"], filtros or {})[ETAPAS_FUNIL].sum()
+    if totais.iloc[0] == 0:
+        return pd.DataFrame()
+    anteriores = totais.shift(1).fillna(totais.iloc[0]).replace(0, float("nan"))
+    return pd.DataFrame({
+        "Etapa": ETAPAS_FUNIL,
+        "Leads": totais.values,
+        "Taxa Etapa": (totais / anteriores * 100).round(2).values,
+        "Taxa Acumulada": (totais / totais.iloc[0] * 100).round(2).values,
+    })
+
+
+def valores_fatia(coluna):
+    """Valores distintos (não vazios) de uma fatia da matriz, para dropdowns."""
+    matriz = matriz_coortes()
+    if matriz is None or coluna not in matriz["contagens"].columns:
+        return []
+    valores = matriz["contagens"][coluna]
+    return sorted(v for v in valores.unique() if isinstance(v, str) and v != "")
@@ -0,0 +1,457 @@
+# ==========================================================
+# 🕓 HISTÓRICO DE SNAPSHOTS (DELTAS POR LINHA EM DISCO)
+# ==========================================================
+# A cada snapshot publicado, cada linha de cada aba ganha uma impressão: uma
+# chave estável (colunas de CHAVES_HISTORICO + ocorrência, para linhas
+# repetidas) e um hash do conteúdo. Comparando com a base gravada no
+# snapshot anterior, sai um delta compacto por aba:
+#   - adicionadas: chave nova (linha inteira)
+#   - removidas:   chave que sumiu (linha inteira, como estava)
+#   - alteradas:   mesma chave, hash diferente (só as colunas que mudaram: antes/depois)
+# Deltas vazios não são gravados. O histórico é limitado (ROBO_HISTORICO_MAX_DELTAS
+# arquivos e ROBO_HISTORICO_DIAS dias) e separado por workbook.
+#
+# "O que mudou desde X" compõe os deltas gravados depois de X (linha
+# adicionada e depois removida some, alterações seguidas viram uma só); nada
+# de comparar abas inteiras na requisição.
+#   - GET /api/v1/mudancas?desde=<epoch|ISO>&aba=<aba>
+#   - GET /api/v1/historico     (deltas disponíveis e totais)
+#
+# Vários workers publicam o mesmo conteúdo: a base em disco é atualizada sob
+# trava de arquivo, então só o primeiro a ver a mudança grava o delta.
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from flask import Response, abort, request
+from werkzeug.exceptions import HTTPException
+
+import utils
+from utils import (
+    CP_SHEET_NAME, FM_SHEET_NAME, FP_SHEET_NAME, FP_COL_NOME, FP_COL_TELEFONE, MP_SHEET_NAME, MP_COL_MES,
+    MP_COL_META_MENSAL, PD_SHEET_NAME, PD_COL_CONSULTOR, PD_COL_DATA, RK_SHEET_NAME, RK_COL_CONSULTOR, RK_COL_MES,
+    RK_COL_PASTA, SUFIXO_ANO_MES, SUFIXO_DIA, SUFIXO_SEMANA
+)
+
+HISTORICO_DIR = os.environ.get("ROBO_HISTORICO_DIR", os.path.join(tempfile.gettempdir(), "robo_historico"))
+HISTORICO_MAX_DELTAS = int(os.environ.get("ROBO_HISTORICO_MAX_DELTAS", "500"))  # por workbook
+HISTORICO_DIAS = int(os.environ.get("ROBO_HISTORICO_DIAS", "14"))
+HISTORICO_MAX_LINHAS = int(os.environ.get("ROBO_HISTORICO_MAX_LINHAS", "2000"))  # por aba e tipo, em cada delta
+MUDANCAS_JANELA_PADRAO = 24 * 3600  # /api/v1/mudancas sem `desde`
+
+# Colunas que identificam a linha de cada aba (normalizadas); aba sem chave usa o conteúdo inteiro
+# (aí só existem adicionadas/removidas)
+CHAVES_HISTORICO = {
+    CP_SHEET_NAME: ["cpf", "nome_cliente"],
+    FP_SHEET_NAME: [FP_COL_NOME, FP_COL_TELEFONE],
+    FM_SHEET_NAME: [FP_COL_NOME, FP_COL_TELEFONE],
+    MP_SHEET_NAME: [MP_COL_MES, MP_COL_META_MENSAL],
+    RK_SHEET_NAME: [RK_COL_CONSULTOR, RK_COL_MES, RK_COL_PASTA],
+    PD_SHEET_NAME: [PD_COL_CONSULTOR, PD_COL_DATA],
+    "Por UF": ["uf"],
+    "Por Área": ["area_pasta"],
+    "Status Final": ["status_final"],
+    "Resumo de Métricas": ["unnamed_0"],
+}
+SUFIXOS_DERIVADOS = (SUFIXO_ANO_MES, SUFIXO_SEMANA, SUFIXO_DIA)  # chaves de tempo criadas no download
+COL_CHAVE = "_chave"
+TIPOS = ("adicionadas", "removidas", "alteradas")
+ARQUIVO_BASE = "base.json"
+PREFIXO_DELTA = "delta_"
+
+_deltas_lidos = {}  # {workbook: {arquivo: delta}}: cada arquivo é lido do disco uma vez por processo
+_lock_leitura = threading.Lock()
+
+
+def _pasta(workbook):
+    pasta = os.path.join(HISTORICO_DIR, "".join(ch if ch.isalnum() or ch in "-_" else "-" for ch in workbook))
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+@contextlib.contextmanager
+def _trava(pasta):
+    with open(os.path.join(pasta, ".trava"), "w") as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+# ==========================================================
+# 🧬 IMPRESSÃO POR LINHA
+# ==========================================================
+def para_exibicao(df):
+    """Colunas originais da aba como texto (datas ISO, vazio = None): o que a base guarda e o delta mostra."""
+    import pandas as pd
+
+    saida = {}
+    for col in df.columns:
+        if str(col).endswith(SUFIXOS_DERIVADOS):
+            continue
+        serie = df[col]
+        if pd.api.types.is_datetime64_any_dtype(serie):
+            texto = serie.dt.strftime("%Y-%m-%dT%H:%M:%S").str.replace("T00:00:00", "", regex=False)
+        else:
+            texto = serie.astype(str).str.strip()
+        saida[str(col)] = texto.astype(object).where(serie.notna() & (texto != ""), None)
+    return pd.DataFrame(saida, index=df.index).reset_index(drop=True)
+
+
+def impressao_linhas(aba, exibicao, colunas):
+    """(chaves, hashes) uint64 por linha; o hash cobre só `colunas` (as comuns aos dois snapshots comparados)."""
+    import numpy as np
+    import pandas as pd
+
+    if not len(exibicao) or not len(colunas):
+        vazio = np.zeros(len(exibicao), dtype="uint64")
+        return vazio, vazio
+    conteudo = pd.util.hash_pandas_object(exibicao[colunas].fillna("\x00"), index=False).to_numpy()
+    chave_cols = [c for c in CHAVES_HISTORICO.get(aba, []) if c in colunas]
+    base = exibicao[chave_cols].fillna("\x00") if chave_cols else pd.DataFrame({"_conteudo": conteudo})
+    # Linhas com a mesma chave (duplicadas na planilha) são distinguidas pela ordem de aparição
+    ocorrencia = base.groupby(list(base.columns), sort=False).cumcount().to_numpy()
+    chaves = pd.util.hash_pandas_object(base.assign(_ocorrencia=ocorrencia), index=False).to_numpy()
+    return chaves, conteudo
+
+
+# ==========================================================
+# 🧮 DELTA ENTRE A BASE E O SNAPSHOT NOVO
+# ==========================================================
+def _registros(df, chaves):
+    linhas = json.loads(df.to_json(orient="records", force_ascii=False))
+    for linha, chave in zip(linhas, chaves):
+        linha[COL_CHAVE] = f"{chave:x}"
+    return linhas
+
+
+def comparar_aba(aba, anterior, atual):
+    """Delta {"chave", tipo: [...], "totais", "truncado"} entre duas versões da aba (formato de exibição)."""
+    import numpy as np
+    import pandas as pd
+
+    anterior = pd.DataFrame() if anterior is None else anterior
+    atual = pd.DataFrame() if atual is None else atual
+    comuns = [c for c in atual.columns if c in anterior.columns]
+    # Aba nova ou sumida (nenhuma coluna em comum): as linhas entram/saem inteiras, com chave pelas próprias colunas
+    chaves_ant, hash_ant = impressao_linhas(aba, anterior, comuns or list(anterior.columns))
+    chaves_atu, hash_atu = impressao_linhas(aba, atual, comuns or list(atual.columns))
+
+    novas = np.flatnonzero(~np.isin(chaves_atu, chaves_ant))
+    sumidas = np.flatnonzero(~np.isin(chaves_ant, chaves_atu))
+    _, i_atu, i_ant = np.intersect1d(chaves_atu, chaves_ant, assume_unique=True, return_indices=True)
+    mudou = hash_atu[i_atu] != hash_ant[i_ant]
+    i_atu, i_ant = i_atu[mudou], i_ant[mudou]
+
+    limite = HISTORICO_MAX_LINHAS
+    chave_cols = [c for c in CHAVES_HISTORICO.get(aba, []) if c in comuns]
+    alteradas = []
+    for a, b in zip(i_atu[:limite], i_ant[:limite]):
+        depois, antes = atual.iloc[a], anterior.iloc[b]
+        alteradas.append({
+            COL_CHAVE: f"{chaves_atu[a]:x}",
+            "id": {c: depois[c] for c in chave_cols},
+            "colunas": {c: [antes[c], depois[c]] for c in comuns if antes[c] != depois[c]},
+        })
+
+    totais = {"adicionadas": len(novas), "removidas": len(sumidas), "alteradas": len(i_atu)}
+    return {
+        "chave": chave_cols,
+        "adicionadas": _registros(atual.iloc[novas[:limite]], chaves_atu[novas[:limite]]),
+        "removidas": _registros(anterior.iloc[sumidas[:limite]], chaves_ant[sumidas[:limite]]),
+        "alteradas": alteradas,
+        "totais": totais,
+        "truncado": any(n > limite for n in totais.values()),
+    }
+
+
+# ==========================================================
+# 💾 BASE (ÚLTIMO SNAPSHOT) E DELTAS EM DISCO
+# ==========================================================
+def _ler_base(pasta):
+    """(metadados, {aba: DataFrame}) do último snapshot registrado; (None, {}) no primeiro."""
+    import pandas as pd
+
+    caminho = os.path.join(pasta, ARQUIVO_BASE)
+    if not os.path.exists(caminho):
+        return None, {}
+    with open(caminho, encoding="utf-8") as arquivo:
+        meta = json.load(arquivo)
+    return meta, {aba: pd.read_parquet(os.path.join(pasta, nome)) for aba, nome in meta["abas"].items()}
+
+
+def _gravar_base(pasta, exibicoes, carregado_em, versao, cobertura_desde):
+    nomes = {}
+    for aba, df in exibicoes.items():
+        nome = f"base_{hashlib.sha1(aba.encode('utf-8')).hexdigest()[:12]}.parquet"
+        df.to_parquet(os.path.join(pasta, nome + ".tmp"), index=False)
+        os.replace(os.path.join(pasta, nome + ".tmp"), os.path.join(pasta, nome))
+        nomes[aba] = nome
+    meta = {"carregado_em": carregado_em, "versao": versao, "cobertura_desde": cobertura_desde, "abas": nomes}
+    _gravar_json(os.path.join(pasta, ARQUIVO_BASE), meta)
+    for nome in os.listdir(pasta):  # abas que sumiram da planilha
+        if nome.startswith("base_") and nome.endswith(".parquet") and nome not in nomes.values():
+            os.remove(os.path.join(pasta, nome))
+
+
+def _gravar_json(caminho, conteudo):
+    with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump(conteudo, arquivo, ensure_ascii=False)
+    os.replace(caminho + ".tmp", caminho)
+
+
+def _arquivos_delta(pasta):
+    """Deltas do mais antigo para o mais novo (o nome começa pelo instante em ms)."""
+    return sorted(n for n in os.listdir(pasta) if n.startswith(PREFIXO_DELTA) and n.endswith(".json.gz"))
+
+
+def _podar(pasta):
+    """Aplica os limites do histórico (dias e quantidade); devolve quantos deltas saíram."""
+    arquivos = _arquivos_delta(pasta)
+    corte_ms = (time.time() - HISTORICO_DIAS * 86400) * 1000
+    sair = [n for n in arquivos if int(n[len(PREFIXO_DELTA):].split("_")[0]) < corte_ms]
+    sair += [n for n in arquivos[:max(len(arquivos) - HISTORICO_MAX_DELTAS, 0)] if n not in sair]
+    for nome in sair:
+        os.remove(os.path.join(pasta, nome))
+    return len(sair)
+
+
+def registrar_snapshot(workbook, abas, carregado_em, versao):
+    """Compara o snapshot publicado com a base em disco, grava o delta (se houve mudança) e troca a base."""
+    pasta = _pasta(workbook)
+    exibicoes = {aba: para_exibicao(df) for aba, df in abas.items()}
+    with _trava(pasta):
+        meta, base = _ler_base(pasta)
+        if meta is not None and meta["carregado_em"] >= carregado_em:
+            return None  # outro worker já registrou um snapshot igual ou mais novo
+        delta = None
+        cobertura_desde = meta["cobertura_desde"] if meta else carregado_em
+        if meta is not None:
+            por_aba = {aba: comparar_aba(aba, base.get(aba), exibicoes.get(aba)) for aba in sorted(set(base) | set(exibicoes))}
+            por_aba = {aba: d for aba, d in por_aba.items() if any(d["totais"].values())}
+            if por_aba:
+                delta = {"quando": carregado_em, "anterior": meta["carregado_em"], "versao": versao, "abas": por_aba}
+                nome = f"{PREFIXO_DELTA}{int(carregado_em * 1000)}_{os.getpid()}.json.gz"
+                with gzip.open(os.path.join(pasta, nome + ".tmp"), "wt", encoding="utf-8") as arquivo:
+                    json.dump(delta, arquivo, ensure_ascii=False)
+                os.replace(os.path.join(pasta, nome + ".tmp"), os.path.join(pasta, nome))
+            if _podar(pasta):
+                restantes = _arquivos_delta(pasta)
+                cobertura_desde = _ler_delta(pasta, restantes[0])["anterior"] if restantes else meta["carregado_em"]
+        _gravar_base(pasta, exibicoes, carregado_em, versao, cobertura_desde)
+    if delta:
+        resumo = ", ".join(f"{aba} (+{d['totais']['adicionadas']} -{d['totais']['removidas']} ~{d['totais']['alteradas']})"
+                           for aba, d in delta["abas"].items())
+        print(f"🕓 [{workbook}] Mudanças no snapshot v{versao}: {resumo}")
+    return delta
+
+
+def registrar_no_historico():
+    """Hook de utils: registra o snapshot novo numa thread (parquet/gzip fora do caminho das requisições)."""
+    workbook = utils.workbook_atual()
+    snapshot = utils.snapshot_atual()
+    abas, carregado_em, versao = snapshot["abas"], snapshot["carregado_em"], snapshot["versao"]
+    if not abas:
+        return
+
+    def tarefa():
+        try:
+            registrar_snapshot(workbook, abas, carregado_em, versao)
+        except Exception as e:
+            print(f"⚠️ [{workbook}] Falha ao registrar o histórico do snapshot v{versao}: {e}")
+
+    threading.Thread(target=tarefa, name=f"historico-{workbook}", daemon=True).start()
+
+
+# ==========================================================
+# 🔗 COMPOSIÇÃO DOS DELTAS ("O QUE MUDOU DESDE X")
+# ==========================================================
+def _ler_delta(pasta, nome):
+    with gzip.open(os.path.join(pasta, nome), "rt", encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def deltas_do_workbook(workbook=None):
+    """Deltas em disco do workbook (mais antigo primeiro); só os arquivos novos são lidos."""
+    workbook = workbook or utils.workbook_atual()
+    pasta = _pasta(workbook)
+    arquivos = _arquivos_delta(pasta)
+    with _lock_leitura:
+        lidos = _deltas_lidos.setdefault(workbook, {})
+        for nome in set(lidos) - set(arquivos):  # podados por algum worker
+            del lidos[nome]
+        for nome in arquivos:
+            if nome not in lidos:
+                try:
+                    lidos[nome] = _ler_delta(pasta, nome)
+                except FileNotFoundError:
+                    continue
+        return [lidos[nome] for nome in arquivos if nome in lidos]
+
+
+def cobertura_historico(workbook=None):
+    """Instante a partir do qual o histórico em disco é completo (None antes do primeiro snapshot)."""
+    caminho = os.path.join(_pasta(workbook or utils.workbook_atual()), ARQUIVO_BASE)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)["cobertura_desde"]
+
+
+def _compor_aba(estado, delta_aba):
+    """Aplica o delta de uma aba sobre o estado composto {chave: {"tipo", ...}}."""
+    chave_cols = delta_aba["chave"]
+    for linha in delta_aba["removidas"]:
+        chave = linha[COL_CHAVE]
+        atual = estado.get(chave)
+        if atual is not None and atual["tipo"] == "adicionadas":
+            del estado[chave]  # entrou e saiu dentro da janela
+        else:
+            # Alterada e depois removida: sai a linha como estava antes da janela
+            antes = dict(linha, **{c: v[0] for c, v in atual["colunas"].items()}) if atual else linha
+            estado[chave] = {"tipo": "removidas", "linha": antes}
+    for linha in delta_aba["adicionadas"]:
+        chave = linha[COL_CHAVE]
+        atual = estado.get(chave)
+        if atual is not None and atual["tipo"] == "removidas":
+            # Saiu e voltou: vira alteração (ou nada, se voltou igual)
+            colunas = {c: [atual["linha"].get(c), v] for c, v in linha.items()
+                       if c != COL_CHAVE and atual["linha"].get(c) != v}
+            if colunas:
+                estado[chave] = {"tipo": "alteradas", "id": {c: linha.get(c) for c in chave_cols}, "colunas": colunas}
+            else:
+                del estado[chave]
+        else:
+            estado[chave] = {"tipo": "adicionadas", "linha": linha}
+    for alteracao in delta_aba["alteradas"]:
+        chave = alteracao[COL_CHAVE]
+        atual = estado.get(chave)
+        if atual is not None and atual["tipo"] == "adicionadas":
+            atual["linha"] = dict(atual["linha"], **{c: v[1] for c, v in alteracao["colunas"].items()})
+        elif atual is not None and atual["tipo"] == "alteradas":
+            colunas = dict(atual["colunas"])
+            for c, (antes, depois) in alteracao["colunas"].items():
+                colunas[c] = [colunas[c][0] if c in colunas else antes, depois]  # mantém o "antes" mais antigo
+            colunas = {c: v for c, v in colunas.items() if v[0] != v[1]}
+            if colunas:
+                atual["colunas"] = colunas
+            else:
+                del estado[chave]  # voltou ao que era
+        else:
+            estado[chave] = {"tipo": "alteradas", "id": alteracao["id"], "colunas": alteracao["colunas"]}
+
+
+def mudancas_desde(desde, aba=None, workbook=None):
+    """Mudanças líquidas por aba desde o instante `desde` (epoch), compostas a partir dos deltas em disco.
+
+    {"desde", "ate", "deltas", "cobertura_desde", "incompleto", "abas": {aba: {"chave", "totais", tipo: [...]}}};
+    `incompleto` quando a janela começa antes do histórico guardado ou algum delta foi truncado.
+    """
+    deltas = [d for d in deltas_do_workbook(workbook) if d["quando"] > desde]
+    cobertura = cobertura_historico(workbook)
+    incompleto = cobertura is None or desde < cobertura
+    compostos, chaves = {}, {}
+    for delta in deltas:
+        for nome, delta_aba in delta["abas"].items():
+            if aba is not None and nome != aba:
+                continue
+            incompleto = incompleto or delta_aba["truncado"]
+            chaves[nome] = delta_aba["chave"]
+            _compor_aba(compostos.setdefault(nome, {}), delta_aba)
+
+    abas = {}
+    for nome, estado in compostos.items():
+        saida = {"chave": chaves[nome], **{tipo: [] for tipo in TIPOS}}
+        for chave, item in estado.items():
+            if item["tipo"] == "alteradas":
+                saida["alteradas"].append({COL_CHAVE: chave, "id": item["id"], "colunas": item["colunas"]})
+            else:
+                saida[item["tipo"]].append(item["linha"])
+        saida["totais"] = {tipo: len(saida[tipo]) for tipo in TIPOS}
+        if any(saida["totais"].values()):
+            abas[nome] = saida
+    return {
+        "desde": desde,
+        "ate": deltas[-1]["quando"] if deltas else None,
+        "deltas": len(deltas),
+        "cobertura_desde": cobertura,
+        "incompleto": incompleto,
+        "abas": abas,
+    }
+
+
+def resumo_historico(workbook=None):
+    """Deltas disponíveis (instante, versão e totais por aba), do mais novo para o mais antigo."""
+    return [
+        {
+            "quando": d["quando"],
+            "anterior": d["anterior"],
+            "versao": d["versao"],
+            "abas": {aba: dict(da["totais"], truncado=da["truncado"]) for aba, da in d["abas"].items()},
+        }
+        for d in reversed(deltas_do_workbook(workbook))
+    ]
+
+
+# ==========================================================
+# 🔌 API
+# ==========================================================
+def interpretar_desde(valor):
+    """`desde` da query: epoch em segundos (ou ms) ou data/hora ISO (sem fuso = horário local); None = inválido."""
+    if valor in (None, ""):
+        return time.time() - MUDANCAS_JANELA_PADRAO
+    try:
+        numero = float(valor)
+        return numero / 1000 if numero > 1e11 else numero
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(valor).timestamp()
+    except ValueError:
+        return None
+
+
+def _json(corpo, status=200, headers=None):
+    return Response(json.dumps(corpo, ensure_ascii=False), status=status, mimetype="application/json", headers=headers)
+
+
+def registrar_historico(server):
+    utils.registrar_ao_publicar(registrar_no_historico)
+
+    @server.route("/api/v1/mudancas")
+    def api_mudancas():
+        try:
+            desde = interpretar_desde(request.args.get("desde"))
+            if desde is None:
+                abort(400, description="'desde' inválido. Use epoch (segundos) ou data/hora ISO (ex.: 2025-09-25T08:00).")
+            aba = request.args.get("aba") or None
+            utils.obter_snapshot()  # primeiro acesso do workbook: a base em disco nasce com o snapshot
+            workbook = utils.workbook_atual()
+            ultimo = (_arquivos_delta(_pasta(workbook)) or [""])[-1]
+            etag = '"' + hashlib.sha1(f"{workbook}|{ultimo}|{desde}|{aba}".encode("utf-8")).hexdigest()[:16] + '"'
+            if etag in request.headers.get("If-None-Match", ""):
+                return Response(status=304, headers={"ETag": etag})
+            corpo = {"workbook": workbook, **mudancas_desde(desde, aba, workbook)}
+            return _json(corpo, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        except HTTPException as e:
+            return _json({"erro": e.description}, status=e.code)
+
+    @server.route("/api/v1/historico")
+    def api_historico():
+        workbook = utils.workbook_atual()
+        return _json({
+            "workbook": workbook,
+            "cobertura_desde": cobertura_historico(workbook),
+            "limites": {"deltas": HISTORICO_MAX_DELTAS, "dias": HISTORICO_DIAS, "linhas_por_tipo": HISTORICO_MAX_LINHAS},
+            "deltas": resumo_historico(workbook),
+        })
+
+    return api_mudancas
@@ -0,0 +1,228 @@
+# ==========================================================
+# 🧠 CONTABILIDADE DE MEMÓRIA (SNAPSHOT E CACHES)
+# ==========================================================
+# Relatório do que está residente no worker: RSS do processo, cada aba do
+# snapshot (memory_usage(deep=True)), cada derivado em cache (abas limpas,
+# índices, rollups, top-N...) e, sob demanda, o top-N do tracemalloc.
+#   - GET /admin/memoria            relatório (admin)
+#   - GET /admin/memoria?tracemalloc=20   + maiores alocações (liga o tracemalloc se preciso)
+# Após cada snapshot o resumo vai para o log; se o RSS passar de
+# ROBO_MEMORIA_MAX_MB, os caches derivados são descartados antes que o worker
+# seja morto por falta de memória.
+#
+# Com vários workbooks (utils.py), ROBO_WORKBOOKS_MEMORIA_MB é o orçamento
+# somado de todos (snapshot + derivados de cada um): passou dele, saem
+# workbooks inteiros, do menos para o mais recentemente usado (o da requisição
+# atual nunca sai); o próximo acesso da equipe recarrega a planilha.
+import gc
+import os
+import sys
+import threading
+import time
+
+from flask import jsonify, request
+
+import utils
+from admin import exigir_admin
+from payload import estatisticas_payload
+
+MEMORIA_MAX_MB = int(os.environ.get("ROBO_MEMORIA_MAX_MB", "0"))  # 0 = sem orçamento
+WORKBOOKS_MEMORIA_MB = int(os.environ.get("ROBO_WORKBOOKS_MEMORIA_MB", "0"))  # 0 = sem orçamento
+MEMORIA_INTERVALO_CHECAGEM = 30  # segundos entre checagens do orçamento nas requisições
+MEMORIA_RECUO_SEGUNDOS = 600  # orçamento inalcançável descartando caches: para de tentar por um tempo
+TRACEMALLOC_AO_INICIAR = os.environ.get("ROBO_TRACEMALLOC", "0") == "1"
+
+_MB = 1024 * 1024
+_ultima_checagem = {"quando": 0.0}
+_recuo = {"ate": 0.0, "avisado": False}
+_lock_checagem = threading.Lock()
+
+if TRACEMALLOC_AO_INICIAR:
+    import tracemalloc
+
+    tracemalloc.start(10)
+
+
+def rss_bytes():
+    """Memória residente atual do processo (Linux: /proc; demais: pico via resource)."""
+    try:
+        with open("/proc/self/statm") as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == "darwin" else pico * 1024
+
+
+def tamanho_objeto(obj, _vistos=None):
+    """Bytes aproximados de um valor em cache (DataFrame/Series/ndarray/dict/list aninhados)."""
+    _vistos = set() if _vistos is None else _vistos
+    if id(obj) in _vistos:
+        return 0
+    _vistos.add(id(obj))
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):  # DataFrame
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if hasattr(obj, "memory_usage"):  # Series / Index
+        return int(obj.memory_usage(deep=True))
+    if hasattr(obj, "nbytes"):  # numpy
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(tamanho_objeto(k, _vistos) + tamanho_objeto(v, _vistos) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + sum(tamanho_objeto(v, _vistos) for v in obj)
+    return sys.getsizeof(obj)
+
+
+def tamanho_workbook(estado):
+    """Bytes do snapshot + derivados em cache de um workbook."""
+    vistos = set()
+    total = sum(tamanho_objeto(df, vistos) for df in (estado["snapshot"]["abas"] or {}).values())
+    return total + sum(tamanho_objeto(valor, vistos) for _, valor in list(estado["derivados"].values()))
+
+
+def relatorio_memoria(top_tracemalloc=0):
+    """Dicionário com RSS, abas do snapshot, derivados em cache, workbooks e (opcional) tracemalloc."""
+    estado = utils.estado_workbook()
+    abas = estado["snapshot"]["abas"] or {}
+    versao_atual = estado["snapshot"]["versao"]
+    tamanhos_abas = {nome: tamanho_objeto(df) for nome, df in abas.items()}
+    derivados = {
+        nome: {"bytes": tamanho_objeto(valor), "versao": versao, "antigo": versao != versao_atual}
+        for nome, (versao, valor) in list(estado["derivados"].items())
+    }
+    relatorio = {
+        "pid": os.getpid(),
+        "rss_mb": round(rss_bytes() / _MB, 1),
+        "orcamento_mb": MEMORIA_MAX_MB or None,
+        "workbook": estado["id"],
+        "workbooks_orcamento_mb": WORKBOOKS_MEMORIA_MB or None,
+        "workbooks": {
+            e["id"]: {"mb": round(tamanho_workbook(e) / _MB, 2), "versao": e["snapshot"]["versao"], "ultimo_acesso": e["ultimo_acesso"]}
+            for e in utils.workbooks_carregados()
+        },
+        "versao_snapshot": versao_atual,
+        "snapshot_mb": round(sum(tamanhos_abas.values()) / _MB, 2),
+        "abas": dict(sorted(tamanhos_abas.items(), key=lambda item: item[1], reverse=True)),
+        "derivados_mb": round(sum(d["bytes"] for d in derivados.values()) / _MB, 2),
+        "derivados": dict(sorted(derivados.items(), key=lambda item: item[1]["bytes"], reverse=True)),
+        "callbacks_payload": estatisticas_payload(),
+    }
+    if top_tracemalloc:
+        relatorio["tracemalloc"] = top_alocacoes(top_tracemalloc)
+    return relatorio
+
+
+def top_alocacoes(n):
+    """Maiores alocações vivas por linha de código; liga o tracemalloc na primeira chamada."""
+    import tracemalloc
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(10)
+        return {"aviso": "tracemalloc ligado agora; chame de novo para ver as alocações a partir daqui."}
+    estatisticas = tracemalloc.take_snapshot().statistics("lineno")[:n]
+    atual, pico = tracemalloc.get_traced_memory()
+    return {
+        "rastreado_mb": round(atual / _MB, 1),
+        "pico_mb": round(pico / _MB, 1),
+        "maiores": [{"local": str(e.traceback[0]), "kb": round(e.size / 1024, 1), "blocos": e.count} for e in estatisticas],
+    }
+
+
+def _bytes_derivados_atuais():
+    vistos = set()
+    return sum(tamanho_objeto(valor, vistos)
+               for estado in utils.workbooks_carregados()
+               for versao, valor in list(estado["derivados"].values()) if versao == estado["snapshot"]["versao"])
+
+
+def aplicar_orcamento():
+    """Descarta caches derivados (antigos primeiro) se o RSS passou do orçamento.
+
+    Os da versão atual só saem se o tamanho deles cobre o excesso; se nem assim o RSS
+    volta ao orçamento (base do processo já acima dele, memória que o gc não devolve),
+    recua por MEMORIA_RECUO_SEGUNDOS em vez de esvaziar os caches a cada checagem.
+    """
+    limite = MEMORIA_MAX_MB * _MB
+    if not MEMORIA_MAX_MB or rss_bytes() <= limite:
+        _recuo["avisado"] = False
+        return 0
+    if time.time() < _recuo["ate"]:
+        return 0
+    antes = rss_bytes()
+    descartados = utils.descartar_derivados(apenas_antigos=True)
+    gc.collect()
+    excesso = rss_bytes() - limite
+    if excesso > 0 and _bytes_derivados_atuais() >= excesso:
+        descartados += utils.descartar_derivados()
+        gc.collect()
+    if descartados:
+        print(f"🧹 Memória acima do orçamento ({antes / _MB:.0f}MB > {MEMORIA_MAX_MB}MB): "
+              f"{descartados} derivados descartados, RSS agora {rss_bytes() / _MB:.0f}MB")
+    if rss_bytes() > limite:
+        _recuo["ate"] = time.time() + MEMORIA_RECUO_SEGUNDOS
+        if not _recuo["avisado"]:
+            _recuo["avisado"] = True
+            print(f"⚠️ RSS {rss_bytes() / _MB:.0f}MB segue acima do orçamento ({MEMORIA_MAX_MB}MB) sem caches para descartar: "
+                  f"próxima tentativa em {MEMORIA_RECUO_SEGUNDOS}s")
+    return descartados
+
+
+def aplicar_orcamento_workbooks():
+    """Descarta workbooks inteiros (LRU) enquanto a soma passar de ROBO_WORKBOOKS_MEMORIA_MB; devolve os ids."""
+    if not WORKBOOKS_MEMORIA_MB:
+        return []
+    atual = utils.workbook_atual()
+    estados = utils.workbooks_carregados()  # do menos para o mais recentemente usado
+    tamanhos = {e["id"]: tamanho_workbook(e) for e in estados}
+    total = sum(tamanhos.values())
+    descartados = []
+    for estado in estados:
+        if total <= WORKBOOKS_MEMORIA_MB * _MB:
+            break
+        if estado["id"] == atual:
+            continue
+        if utils.descartar_workbook(estado["id"]):
+            total -= tamanhos[estado["id"]]
+            descartados.append(estado["id"])
+    if descartados:
+        gc.collect()
+        print(f"🧹 Workbooks acima do orçamento ({WORKBOOKS_MEMORIA_MB}MB): descartados {', '.join(descartados)}; "
+              f"restam {total / _MB:.0f}MB em {len(estados) - len(descartados)} workbook(s)")
+    return descartados
+
+
+def registrar_log_memoria():
+    """Após cada snapshot: aplica os orçamentos e registra o resumo de memória."""
+    def ao_publicar():
+        _recuo["ate"] = 0.0  # snapshot novo: os derivados da versão anterior já podem sair
+        aplicar_orcamento_workbooks()
+        aplicar_orcamento()
+        r = relatorio_memoria()
+        print(f"🧠 Memória [{r['workbook']}] v{r['versao_snapshot']}: RSS {r['rss_mb']}MB | snapshot {r['snapshot_mb']}MB | "
+              f"derivados {r['derivados_mb']}MB ({len(r['derivados'])})")
+    return utils.registrar_ao_publicar(ao_publicar)
+
+
+def registrar_rotas_memoria(server):
+    registrar_log_memoria()
+
+    @server.before_request
+    def checar_orcamento():
+        # Checagem barata e espaçada: RSS cresce com derivados calculados entre snapshots
+        if not (MEMORIA_MAX_MB or WORKBOOKS_MEMORIA_MB) or time.time() - _ultima_checagem["quando"] < MEMORIA_INTERVALO_CHECAGEM:
+            return
+        with _lock_checagem:
+            if time.time() - _ultima_checagem["quando"] < MEMORIA_INTERVALO_CHECAGEM:
+                return
+            _ultima_checagem["quando"] = time.time()
+        aplicar_orcamento_workbooks()
+        aplicar_orcamento()
+
+    @server.route("/admin/memoria")
+    def admin_memoria():
+        exigir_admin()
+        top = request.args.get("tracemalloc", default=0, type=int)
+        return jsonify(relatorio_memoria(top_tracemalloc=top))
+
+    return admin_memoria
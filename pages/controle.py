@@ -1,12 +1,17 @@
-import pandas as pd
 import dash
-from dash import dcc, html, Input, Output, register_page
-import plotly.express as px
+from dash import dcc, html, Input, Output, State, register_page
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
 
 # Importa as constantes e funções do arquivo utils.py
-from utils import carregar_dados, CP_COL_AREA, CP_COL_STATUS, CP_COL_UF, CP_COL_DATA_DIST, CP_COL_DISTRIBUIDO, CP_COL_MES_COMP, CP_COL_RESPONSAVEL, CP_COL_SLA, CP_COL_CONSULTOR, COR_CARD_BG, TEMA_DARK
+from resumos import resumos_controle, KPI_TOTAL, KPI_DISTRIBUIDOS, KPI_NAO_DISTRIBUIDOS, VALORES_DISTRIBUIDO
+from busca import registrar_busca
+from amostragem import LIMITE_MARCADORES, ZOOM_RESET, faixa_zoom, recortar_faixa, reduzir_serie
+from render import grafico_px, renderizar
+from sla import COL_DIAS, ROTULOS_FAIXAS, SITUACAO_ATRASADO, SITUACAO_NO_PRAZO, SITUACAO_SEM_DATA, aging_das_linhas, contagens_sla, total_atrasados
+from topn import top_n
+from segundo_plano import adotar_recarga, controles_recarga, registrar_recarga
+from utils import dados_pagina, texto_status_atualizacao, CP_SHEET_NAME, CP_COL_AREA, CP_COL_STATUS, CP_COL_UF, CP_COL_DATA_DIST, CP_COL_DISTRIBUIDO, CP_COL_MES_COMP, CP_COL_RESPONSAVEL, CP_COL_SLA, CP_COL_CONSULTOR, COR_CARD_BG, TEMA_DARK, SUFIXO_ANO_MES, rotulo_ano_mes
 
 # ---------------- REGISTRO DA PÁGINA ----------------
 register_page(
@@ -17,59 +22,92 @@ register_page(
     title='Controle de Processos'
 )
 
+MARGEM_GRAFICOS = dict(l=20, r=20, t=40, b=20)
+
 # ---------------- LAYOUT DA PÁGINA ----------------
-layout = dbc.Container([
-    html.Br(),
-    html.H1("🚀 Dashboard Master - Controle de Processos (Live Sheets)", 
-            className="text-center text-info mb-4"),
-
-    # KPI Cards 
-    html.Div(id="cp-kpis"),
-
-    html.Br(),
-    html.H5("🎛️ Filtros Interativos"),
-    # Linha de filtros 1
-    dbc.Row([
-        dbc.Col(dcc.Dropdown(id="cp_filtro_area", placeholder=f"Filtrar por {CP_COL_AREA}"), md=3),
-        dbc.Col(dcc.Dropdown(id="cp_filtro_status", placeholder=f"Filtrar por {CP_COL_STATUS}"), md=3),
-        dbc.Col(dcc.Dropdown(id="cp_filtro_uf", placeholder=f"Filtrar por {CP_COL_UF}"), md=3),
-        dbc.Col(dcc.Dropdown(id="cp_filtro_mes", placeholder=f"Filtrar por {CP_COL_MES_COMP}"), md=3),
-    ], className="mb-3"),
-    # Linha de filtros 2
-    dbc.Row([
-        dbc.Col(dcc.Dropdown(id="cp_filtro_responsavel", placeholder=f"Filtrar por {CP_COL_RESPONSAVEL}"), md=6),
-        dbc.Col(dcc.Dropdown(id="cp_filtro_consultor", placeholder=f"Filtrar por {CP_COL_CONSULTOR}"), md=6),
-    ], className="mb-4"),
-
-    # GRÁFICOS
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="cp_grafico_area", config={"displayModeBar": False}), lg=6, md=12),
-        dbc.Col(dcc.Graph(id="cp_grafico_status", config={"displayModeBar": False}), lg=6, md=12),
-    ]),
-
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="cp_grafico_tempo", config={"displayModeBar": False}), lg=6, md=12),
-        dbc.Col(dcc.Graph(id="cp_grafico_responsavel", config={"displayModeBar": False}), lg=6, md=12),
-    ]),
-
-    # GRÁFICO DE SLA
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="cp_grafico_sla", config={"displayModeBar": False}), md=12),
-    ]),
-
-    html.Hr(),
-    html.H4("📋 Tabela de Processos (Amostra)", className="text-center"),
-    html.Div(id="cp_tabela_processos", className="mt-3"),
-
-    html.Hr(),
-    html.Div([
-        dbc.Button("🔄 Atualizar Dados", id="cp_btn_recarregar", n_clicks=0, color="success"),
-        html.Span(id="cp_status_recarregamento", style={"marginLeft": "15px", "color": "#8b949e"})
-    ], className="text-center mt-3"),
-
-    dcc.Interval(id="cp_timer_auto", interval=90000, n_intervals=0)
-], fluid=True)
+def layout(**kwargs):
+    return dbc.Container([
+        html.Br(),
+        html.H1("🚀 Dashboard Master - Controle de Processos (Live Sheets)", 
+                className="text-center text-info mb-4"),
+
+        # KPI Cards 
+        html.Div(id="cp-kpis"),
+
+        html.Br(),
+        html.H5("🎛️ Filtros Interativos"),
+        # Linha de filtros 1
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="cp_filtro_area", placeholder=f"Filtrar por {CP_COL_AREA}"), md=3),
+            dbc.Col(dcc.Dropdown(id="cp_filtro_status", placeholder=f"Filtrar por {CP_COL_STATUS}"), md=3),
+            dbc.Col(dcc.Dropdown(id="cp_filtro_uf", placeholder=f"Filtrar por {CP_COL_UF}"), md=3),
+            dbc.Col(dcc.Dropdown(id="cp_filtro_mes", placeholder=f"Filtrar por {CP_COL_MES_COMP}"), md=3),
+        ], className="mb-3"),
+        # Linha de filtros 2
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="cp_filtro_responsavel", placeholder=f"Buscar {CP_COL_RESPONSAVEL} (digite para filtrar)"), md=6),
+            dbc.Col(dcc.Dropdown(id="cp_filtro_consultor", placeholder=f"Buscar {CP_COL_CONSULTOR} (digite para filtrar)"), md=6),
+        ], className="mb-4"),
+
+        # GRÁFICOS
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="cp_grafico_area", config={"displayModeBar": False}), lg=6, md=12),
+            dbc.Col(dcc.Graph(id="cp_grafico_status", config={"displayModeBar": False}), lg=6, md=12),
+        ]),
+
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="cp_grafico_tempo", config={"displayModeBar": False}), lg=6, md=12),
+            dbc.Col(dcc.Graph(id="cp_grafico_responsavel", config={"displayModeBar": False}), lg=6, md=12),
+        ]),
+
+        # GRÁFICO DE SLA
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="cp_grafico_sla", config={"displayModeBar": False}), md=12),
+        ]),
+
+        html.Hr(),
+        html.H4("📋 Tabela de Processos (Amostra)", className="text-center"),
+        html.Div(id="cp_tabela_processos", className="mt-3"),
+
+        html.Hr(),
+        controles_recarga("cp")
+    ], fluid=True)
+
+
+def _filtros(area, status, uf, mes, responsavel, consultor):
+    return {
+        CP_COL_AREA: area,
+        CP_COL_STATUS: status,
+        CP_COL_UF: uf,
+        CP_COL_MES_COMP: mes,
+        CP_COL_RESPONSAVEL: responsavel,
+        CP_COL_CONSULTOR: consultor,
+    }
+
+
+# ---------------- EVOLUÇÃO MENSAL ----------------
+def tarefa_tempo(df, faixa=None):
+    """Tarefa de render.py da linha de distribuições por mês (None se não houver dados).
+
+    Acima do orçamento de pontos a série vai reduzida (amostragem.py); `faixa` = trecho visível após um zoom.
+    """
+    col_ano_mes = CP_COL_DATA_DIST + SUFIXO_ANO_MES
+    if col_ano_mes not in df.columns:
+        return None
+    serie = df.groupby(col_ano_mes).size().reset_index(name="qtd")
+    serie["Mês"] = serie[col_ano_mes].map(rotulo_ano_mes)
+    serie = reduzir_serie(recortar_faixa(serie, "Mês", faixa), "Mês", "qtd")
+    if serie.empty:
+        return None
+    layout = dict(margin=MARGEM_GRAFICOS)
+    if faixa is not None and faixa != ZOOM_RESET:
+        layout["xaxis"] = {"range": list(faixa)}  # mantém o zoom do usuário
+    return (grafico_px, ("line", serie), dict(
+        x="Mês", y="qtd", markers=len(serie) <= LIMITE_MARCADORES, title="📅 Evolução Mensal de Distribuições",
+        labels={"qtd": "Distribuições"}, template="plotly_dark", layout=layout))
+
 
+registrar_recarga("cp")  # 🔄 Atualizar Dados: download e leitura fora da requisição (segundo_plano.py)
 
 # ---------------- CALLBACK DA PÁGINA ----------------
 @dash.callback(
@@ -78,8 +116,6 @@ layout = dbc.Container([
         Output("cp_filtro_status", "options"),
         Output("cp_filtro_uf", "options"),
         Output("cp_filtro_mes", "options"),
-        Output("cp_filtro_responsavel", "options"), 
-        Output("cp_filtro_consultor", "options"), 
         Output("cp-kpis", "children"),
         Output("cp_grafico_area", "figure"), 
         Output("cp_grafico_status", "figure"),
@@ -89,8 +125,8 @@ layout = dbc.Container([
         Output("cp_tabela_processos", "children"),
         Output("cp_status_recarregamento", "children")
     ],
-    [Input("cp_btn_recarregar", "n_clicks"),
-     Input("cp_timer_auto", "n_intervals"),
+    [Input("cp_recarga", "data"),
+     Input("snapshot_evento", "data"),  # aviso SSE de dados novos (eventos.py)
      Input("cp_filtro_area", "value"),
      Input("cp_filtro_status", "value"),
      Input("cp_filtro_uf", "value"),
@@ -98,39 +134,20 @@ layout = dbc.Container([
      Input("cp_filtro_responsavel", "value"), 
      Input("cp_filtro_consultor", "value")]
 )
-def atualizar_dashboard_cp(n_clicks, n_timer, filtro_area, filtro_status, filtro_uf, filtro_mes, filtro_responsavel, filtro_consultor):
-    df = carregar_dados("controle de processos")
+def atualizar_dashboard_cp(recarga, evento_snapshot, filtro_area, filtro_status, filtro_uf, filtro_mes, filtro_responsavel, filtro_consultor):
+    # Imports pesados adiados para o primeiro uso (boot rápido dos workers)
+    import pandas as pd
 
-    if df.empty:
+    # 🔹 Aba limpa do snapshot (compartilhada) filtrada por posição: só as linhas escolhidas são alocadas
+    filtros = _filtros(filtro_area, filtro_status, filtro_uf, filtro_mes, filtro_responsavel, filtro_consultor)
+    adotar_recarga(recarga)  # snapshot da recarga em segundo plano (se mais novo que o deste worker)
+    df = dados_pagina(CP_SHEET_NAME, filtros)
+
+    if df is None:
         error_kpis = dbc.Row(dbc.Col(html.Div([html.H4("❌ Falha Crítica ao Carregar Dados", className="text-center text-danger mb-2")]), width=12), className="mb-4")
         empty_opts = []
         empty_fig = {}
-        return empty_opts, empty_opts, empty_opts, empty_opts, empty_opts, empty_opts, error_kpis, empty_fig, empty_fig, empty_fig, empty_fig, empty_fig, html.Div(), "❌ Falha ao carregar dados"
-
-    # 🔹 Limpeza de strings: Tratamento seguro (Mantendo MAIÚSCULO/ACENTO)
-    cols_to_clean = [CP_COL_AREA, CP_COL_STATUS, CP_COL_UF, CP_COL_MES_COMP, CP_COL_RESPONSAVEL, CP_COL_SLA, CP_COL_DISTRIBUIDO, CP_COL_CONSULTOR]
-    for col in cols_to_clean:
-        if col in df.columns:
-            df[col] = df[col].astype(str).fillna("")
-            df[col] = df[col].str.strip()
-            df[col] = df[col].replace(["NAN", "Na", ""], "")
-            
-    # 🔹 Aplicar filtros
-    df_filtered = df.copy() 
-    if filtro_area:
-        df_filtered = df_filtered[df_filtered[CP_COL_AREA] == filtro_area]
-    if filtro_status:
-        df_filtered = df_filtered[df_filtered[CP_COL_STATUS] == filtro_status]
-    if filtro_uf:
-        df_filtered = df_filtered[df_filtered[CP_COL_UF] == filtro_uf]
-    if filtro_mes:
-        df_filtered = df_filtered[df_filtered[CP_COL_MES_COMP] == filtro_mes]
-    if filtro_responsavel:
-        df_filtered = df_filtered[df_filtered[CP_COL_RESPONSAVEL] == filtro_responsavel]
-    if filtro_consultor:
-        df_filtered = df_filtered[df_filtered[CP_COL_CONSULTOR] == filtro_consultor]
-
-    df = df_filtered
+        return empty_opts, empty_opts, empty_opts, empty_opts, error_kpis, empty_fig, empty_fig, empty_fig, empty_fig, empty_fig, html.Div(), "❌ Falha ao carregar dados"
 
     # 🔹 Dropdown options
     def get_options(column):
@@ -143,16 +160,21 @@ def atualizar_dashboard_cp(n_clicks, n_timer, filtro_area, filtro_status, filtro
     status_opts = get_options(CP_COL_STATUS)
     uf_opts = get_options(CP_COL_UF)
     mes_opts = get_options(CP_COL_MES_COMP)
-    responsavel_opts = get_options(CP_COL_RESPONSAVEL) 
-    consultor_opts = get_options(CP_COL_CONSULTOR) 
+    # Responsável e consultor: opções pela busca no servidor (busca.py), não a lista inteira
+
+    # 🔹 Sem filtros: números conferidos das abas de resumo da planilha (caminho rápido)
+    filtros_ativos = any([filtro_area, filtro_status, filtro_uf, filtro_mes, filtro_responsavel, filtro_consultor])
+    resumo = resumos_controle() if not filtros_ativos else {"kpis": {}, "contagens": {}}
 
     # === KPIs ===
-    total = len(df)
-    distribuidos = df[df[CP_COL_DISTRIBUIDO].isin(["SIM", "CASO_ASTREA"])].shape[0]
-    nao_distribuidos = total - distribuidos
+    total = resumo["kpis"].get(KPI_TOTAL, len(df))
+    distribuidos = resumo["kpis"].get(KPI_DISTRIBUIDOS)
+    if distribuidos is None:
+        distribuidos = df[df[CP_COL_DISTRIBUIDO].isin(VALORES_DISTRIBUIDO)].shape[0]
+    nao_distribuidos = resumo["kpis"].get(KPI_NAO_DISTRIBUIDOS, total - distribuidos)
     percentual = round((distribuidos / total) * 100, 2) if total > 0 else 0
     em_andamento = df[df[CP_COL_STATUS] == "EM ANDAMENTO"].shape[0]
-    sla_atrasado = df[df[CP_COL_SLA].isin(["ATRASADO", "Atrasado"])].shape[0] if CP_COL_SLA in df.columns else 0
+    sla_atrasado = total_atrasados(filtros)  # aging calculado no snapshot contra o limite de cada área
 
     # Layout dos KPIs (6 colunas)
     kpis = dbc.Row([
@@ -167,60 +189,98 @@ def atualizar_dashboard_cp(n_clicks, n_timer, filtro_area, filtro_status, filtro
     # === GRÁFICOS ===
     
     def create_chart_df(column, current_df):
+        if column in resumo["contagens"]:
+            return resumo["contagens"][column].copy()
         if column in current_df.columns and not current_df.empty:
-            df_chart = current_df[current_df[column] != ""].copy()
+            df_chart = current_df[current_df[column] != ""]
             if not df_chart.empty:
                 count_series = df_chart[column].value_counts().reset_index()
                 count_series.columns = ['index', 'Quantidade']
                 return count_series
         return pd.DataFrame() 
 
-    graf_area, graf_status, graf_tempo, graf_responsavel, graf_sla = [{} for _ in range(5)]
+    # Cada gráfico vira uma tarefa independente; render.py monta todos em paralelo
+    margem = MARGEM_GRAFICOS
+    tarefas = {}
 
     # Gráfico 1: Área
     df_area_chart = create_chart_df(CP_COL_AREA, df)
     if not df_area_chart.empty:
-        graf_area = px.bar(df_area_chart, x="index", y="Quantidade", title=f"Processos por {CP_COL_AREA}", color="index", labels={"index": CP_COL_AREA, "Quantidade": "Quantidade"}, template="plotly_dark")
-        graf_area.update_layout(showlegend=False, margin=dict(l=20, r=20, t=40, b=20), xaxis={'categoryorder': 'total descending'})
-    
+        tarefas["area"] = (grafico_px, ("bar", df_area_chart), dict(
+            x="index", y="Quantidade", title=f"Processos por {CP_COL_AREA}", color="index",
+            labels={"index": CP_COL_AREA, "Quantidade": "Quantidade"}, template="plotly_dark",
+            layout=dict(showlegend=False, margin=margem, xaxis={'categoryorder': 'total descending'})))
+
     # Gráfico 2: Status
     df_status_chart = create_chart_df(CP_COL_STATUS, df)
     if not df_status_chart.empty:
-        graf_status = px.pie(df_status_chart, names="index", values="Quantidade", title=f"Distribuição por {CP_COL_STATUS}", template="plotly_dark")
-        graf_status.update_layout(margin=dict(l=20, r=20, t=40, b=20))
-
-    # Gráfico 3: Tempo
-    try:
-        if CP_COL_DATA_DIST in df.columns:
-            df[CP_COL_DATA_DIST] = pd.to_datetime(df[CP_COL_DATA_DIST], errors="coerce")
-            df_dist = df.dropna(subset=[CP_COL_DATA_DIST]).copy()
-            if not df_dist.empty:
-                serie = df_dist.groupby(df_dist[CP_COL_DATA_DIST].dt.to_period("M")).size().reset_index(name="qtd")
-                serie[CP_COL_DATA_DIST] = serie[CP_COL_DATA_DIST].astype(str)
-                graf_tempo = px.line(serie, x=CP_COL_DATA_DIST, y="qtd", markers=True, title="📅 Evolução Mensal de Distribuições", labels={CP_COL_DATA_DIST: "Mês", "qtd": "Distribuições"}, template="plotly_dark")
-                graf_tempo.update_layout(margin=dict(l=20, r=20, t=40, b=20))
-    except Exception:
-        pass
-
-    # Gráfico 4: Responsável
-    df_resp_chart = create_chart_df(CP_COL_RESPONSAVEL, df)
-    if not df_resp_chart.empty and len(df_resp_chart) > 0:
-        graf_responsavel = px.bar(df_resp_chart.head(10), y="index", x="Quantidade", title=f"Processos por {CP_COL_RESPONSAVEL} (Top 10)", labels={"index": CP_COL_RESPONSAVEL, "Quantidade": "Quantidade"}, template="plotly_dark", orientation='h')
-        graf_responsavel.update_layout(showlegend=False, margin=dict(l=20, r=20, t=40, b=20), yaxis={'categoryorder': 'total ascending'})
-
-    # Gráfico 5: SLA
-    df_sla_chart = create_chart_df(CP_COL_SLA, df)
+        tarefas["status"] = (grafico_px, ("pie", df_status_chart), dict(
+            names="index", values="Quantidade", title=f"Distribuição por {CP_COL_STATUS}", template="plotly_dark",
+            layout=dict(margin=margem)))
+
+    # Gráfico 3: Tempo (chave inteira AAAAMM pré-calculada no snapshot; reduzida por LTTB acima do orçamento)
+    tarefa = tarefa_tempo(df)
+    if tarefa is not None:
+        tarefas["tempo"] = tarefa
+
+    # Gráfico 4: Responsável (top-N pré-contado por fatia de filtro no snapshot)
+    df_resp_chart = top_n(CP_SHEET_NAME, CP_COL_RESPONSAVEL, filtros, n=10)
+    if not df_resp_chart.empty:
+        tarefas["responsavel"] = (grafico_px, ("bar", df_resp_chart), dict(
+            y="index", x="Quantidade", title=f"Processos por {CP_COL_RESPONSAVEL} (Top 10)",
+            labels={"index": CP_COL_RESPONSAVEL, "Quantidade": "Quantidade"}, template="plotly_dark", orientation='h',
+            layout=dict(showlegend=False, margin=margem, yaxis={'categoryorder': 'total ascending'})))
+
+    # Gráfico 5: SLA (faixas de aging x situação, pré-contadas por fatia de filtro no snapshot)
+    df_sla_chart = contagens_sla(filtros)
     if not df_sla_chart.empty:
-        graf_sla = px.pie(df_sla_chart, names="index", values="Quantidade", title=f"Distribuição do {CP_COL_SLA}", template="plotly_dark")
-        graf_sla.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+        tarefas["sla"] = (grafico_px, ("bar", df_sla_chart), dict(
+            x="Faixa", y="Quantidade", color="Situação", title="⏱️ Aging do SLA de Distribuição",
+            category_orders={"Faixa": ROTULOS_FAIXAS, "Situação": [SITUACAO_NO_PRAZO, SITUACAO_ATRASADO, SITUACAO_SEM_DATA]},
+            color_discrete_map={SITUACAO_NO_PRAZO: "#2ea043", SITUACAO_ATRASADO: "#f85149", SITUACAO_SEM_DATA: "#8b949e"},
+            template="plotly_dark", layout=dict(margin=margem, barmode="stack")))
+
+    figuras = renderizar(tarefas)
+    graf_area, graf_status, graf_tempo, graf_responsavel, graf_sla = (
+        figuras.get(nome, {}) for nome in ("area", "status", "tempo", "responsavel", "sla"))
 
     # TABELA
     colunas_tabela = [CP_COL_MES_COMP, CP_COL_RESPONSAVEL, CP_COL_CONSULTOR, CP_COL_AREA, CP_COL_UF, CP_COL_DISTRIBUIDO, CP_COL_STATUS, CP_COL_SLA]
     tabela_df = df[[col for col in colunas_tabela if col in df.columns]].head(30)
+    aging = aging_das_linhas(tabela_df)
+    if aging is not None:
+        tabela_df = tabela_df.assign(**{COL_DIAS: aging[COL_DIAS].astype(object).where(aging[COL_DIAS].notna(), "")})
 
     tabela = html.Div()
     if not tabela_df.empty:
         tabela = dbc.Table.from_dataframe(tabela_df, striped=True, bordered=True, hover=True)
 
-    hora = pd.Timestamp.now().strftime("%H:%M:%S")
-    return (area_opts, status_opts, uf_opts, mes_opts, responsavel_opts, consultor_opts, kpis, graf_area, graf_status, graf_tempo, graf_responsavel, graf_sla, tabela, f"🕒 Atualizado às {hora}")
\ No newline at end of file
+    return (area_opts, status_opts, uf_opts, mes_opts, kpis, graf_area, graf_status, graf_tempo, graf_responsavel, graf_sla, tabela, texto_status_atualizacao())
+
+# ---------------- BUSCA NOS FILTROS DE ALTA CARDINALIDADE ----------------
+registrar_busca("cp_filtro_responsavel", CP_SHEET_NAME, CP_COL_RESPONSAVEL)
+registrar_busca("cp_filtro_consultor", CP_SHEET_NAME, CP_COL_CONSULTOR)
+
+
+# ---------------- ZOOM NA EVOLUÇÃO MENSAL ----------------
+@dash.callback(
+    Output("cp_grafico_tempo", "figure", allow_duplicate=True),
+    Input("cp_grafico_tempo", "relayoutData"),
+    [State("cp_filtro_area", "value"),
+     State("cp_filtro_status", "value"),
+     State("cp_filtro_uf", "value"),
+     State("cp_filtro_mes", "value"),
+     State("cp_filtro_responsavel", "value"),
+     State("cp_filtro_consultor", "value")],
+    prevent_initial_call=True
+)
+def zoom_tempo(relayout, filtro_area, filtro_status, filtro_uf, filtro_mes, filtro_responsavel, filtro_consultor):
+    # Zoom em x: serve o trecho visível em resolução total (dentro do orçamento); duplo clique volta à série reduzida
+    faixa = faixa_zoom(relayout)
+    if faixa is None:
+        raise PreventUpdate
+    df = dados_pagina(CP_SHEET_NAME, _filtros(filtro_area, filtro_status, filtro_uf, filtro_mes, filtro_responsavel, filtro_consultor))
+    tarefa = tarefa_tempo(df, faixa) if df is not None else None
+    if tarefa is None:
+        raise PreventUpdate
+    return renderizar({"tempo": tarefa})["tempo"]
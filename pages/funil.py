@@ -1,12 +1,15 @@
-import pandas as pd
 import dash
 from dash import dcc, html, Input, Output, register_page
-import plotly.express as px
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
 
 # NOTE: Supondo que você criou o 'utils.py' na raiz do projeto.
-from utils import carregar_dados, TEMA_DARK, COR_CARD_BG, FP_COL_CONSULTOR, FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_PLATFORM, FP_COL_UF, FP_COL_ORIGEM, FP_COL_MES, FP_COL_NOME, FP_COL_TELEFONE
+from render import grafico_go, grafico_px, renderizar
+from funil_coortes import TRANSICOES, COL_CONVERSAO_TOTAL, coortes, funil_etapas, valores_fatia
+from busca import registrar_busca
+from topn import top_n
+from segundo_plano import adotar_recarga, controles_recarga, registrar_recarga
+from utils import dados_pagina, texto_status_atualizacao, FP_SHEET_NAME, TEMA_DARK, COR_CARD_BG, FP_COL_CONSULTOR, FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_PLATFORM, FP_COL_UF, FP_COL_ORIGEM, FP_COL_MES, FP_COL_NOME, FP_COL_TELEFONE
 
 # ---------------- REGISTRO DA PÁGINA ----------------
 register_page(
@@ -18,54 +21,64 @@ register_page(
 )
 
 # ---------------- LAYOUT DA PÁGINA ----------------
-layout = dbc.Container([
-    html.Br(),
-    html.H1("📈 Dashboard - Funil de Precatório (Live Sheets)", 
-            className="text-center text-warning mb-4"),
-
-    # KPI Cards
-    html.Div(id="fp-kpis"),
-
-    html.Br(),
-    html.H5("🎛️ Filtros Interativos"),
-    # Linha de filtros
-    dbc.Row([
-        dbc.Col(dcc.Dropdown(id="fp_filtro_consultor", placeholder=f"Filtrar por {FP_COL_CONSULTOR}"), md=3),
-        dbc.Col(dcc.Dropdown(id="fp_filtro_platform", placeholder=f"Filtrar por {FP_COL_PLATFORM.title()}"), md=3),
-        dbc.Col(dcc.Dropdown(id="fp_filtro_uf", placeholder=f"Filtrar por {FP_COL_UF}"), md=3),
-        dbc.Col(dcc.Dropdown(id="fp_filtro_mes", placeholder=f"Filtrar por {FP_COL_MES}"), md=3),
-    ], className="mb-4"),
-
-    # Gráfico de Funil e Gráfico de Origem
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="fp_grafico_funil_status", config={"displayModeBar": False}), lg=6, md=12),
-        dbc.Col(dcc.Graph(id="fp_grafico_origem", config={"displayModeBar": False}), lg=6, md=12),
-    ]),
-    
-    # Gráfico de Motivos (Detalhamento)
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="fp_grafico_motivos", config={"displayModeBar": False}), md=12),
-    ]),
+def layout(**kwargs):
+    return dbc.Container([
+        html.Br(),
+        html.H1("📈 Dashboard - Funil de Precatório (Live Sheets)", 
+                className="text-center text-warning mb-4"),
+
+        # KPI Cards
+        html.Div(id="fp-kpis"),
+
+        html.Br(),
+        html.H5("🎛️ Filtros Interativos"),
+        # Linha de filtros
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="fp_filtro_consultor", placeholder=f"Buscar {FP_COL_CONSULTOR} (digite para filtrar)"), md=3),
+            dbc.Col(dcc.Dropdown(id="fp_filtro_platform", placeholder=f"Filtrar por {FP_COL_PLATFORM.title()}"), md=3),
+            dbc.Col(dcc.Dropdown(id="fp_filtro_uf", placeholder=f"Filtrar por {FP_COL_UF}"), md=3),
+            dbc.Col(dcc.Dropdown(id="fp_filtro_mes", placeholder=f"Filtrar por {FP_COL_MES}"), md=3),
+        ], className="mb-4"),
+
+        # Gráfico de Funil e Gráfico de Origem
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="fp_grafico_funil_status", config={"displayModeBar": False}), lg=6, md=12),
+            dbc.Col(dcc.Graph(id="fp_grafico_origem", config={"displayModeBar": False}), lg=6, md=12),
+        ]),
+        
+        # Gráfico de Motivos (Detalhamento)
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="fp_grafico_motivos", config={"displayModeBar": False}), md=12),
+        ]),
 
 
-    html.Hr(),
-    html.H4("📋 Tabela de Leads", className="text-center"),
-    html.Div(id="fp_tabela_funil", className="mt-3"),
+        # Conversão por coorte (mês de entrada) entre as etapas do funil
+        html.Hr(),
+        html.H4("🧪 Conversão por Coorte", className="text-center"),
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="fp_coorte_origem", placeholder="Filtrar por Origem"), md=4),
+        ], className="mb-3"),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="fp_grafico_coortes", config={"displayModeBar": False}), md=12),
+        ]),
 
-    html.Hr(),
-    html.Div([
-        dbc.Button("🔄 Atualizar Dados", id="fp_btn_recarregar", n_clicks=0, color="success"),
-        html.Span(id="fp_status_recarregamento", style={"marginLeft": "15px", "color": "#8b949e"})
-    ], className="text-center mt-3"),
+        html.Hr(),
+        html.H4("📋 Tabela de Leads", className="text-center"),
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="fp_busca_lead", placeholder="Buscar lead por nome ou telefone"), md=6),
+        ], className="mb-3 justify-content-center"),
+        html.Div(id="fp_tabela_funil", className="mt-3"),
 
-    dcc.Interval(id="fp_timer_auto", interval=90000, n_intervals=0)
-], fluid=True)
+        html.Hr(),
+        controles_recarga("fp")
+    ], fluid=True)
 
 
+registrar_recarga("fp")  # 🔄 Atualizar Dados: download e leitura fora da requisição (segundo_plano.py)
+
 # ---------------- CALLBACK DA PÁGINA ----------------
 @dash.callback(
     [
-        Output("fp_filtro_consultor", "options"),
         Output("fp_filtro_platform", "options"),
         Output("fp_filtro_uf", "options"),
         Output("fp_filtro_mes", "options"),
@@ -73,45 +86,36 @@ layout = dbc.Container([
         Output("fp_grafico_funil_status", "figure"),
         Output("fp_grafico_origem", "figure"),
         Output("fp_grafico_motivos", "figure"),
-        Output("fp_tabela_funil", "children"),
         Output("fp_status_recarregamento", "children")
     ],
     [
-        Input("fp_btn_recarregar", "n_clicks"),
-        Input("fp_timer_auto", "n_intervals"),
+        Input("fp_recarga", "data"),
+        Input("snapshot_evento", "data"),  # aviso SSE de dados novos (eventos.py)
         Input("fp_filtro_consultor", "value"),
         Input("fp_filtro_platform", "value"),
         Input("fp_filtro_uf", "value"),
         Input("fp_filtro_mes", "value")
     ]
 )
-def atualizar_dashboard_funil(n_clicks, n_timer, filtro_consultor, filtro_platform, filtro_uf, filtro_mes):
-    df = carregar_dados("Funil de precatorio")
+def atualizar_dashboard_funil(recarga, evento_snapshot, filtro_consultor, filtro_platform, filtro_uf, filtro_mes):
+    # Imports pesados adiados para o primeiro uso (boot rápido dos workers)
+    import pandas as pd
+
+    # 🔹 Aba limpa do snapshot (compartilhada) filtrada por posição: só as linhas escolhidas são alocadas
+    filtros = {
+        FP_COL_CONSULTOR: filtro_consultor,
+        FP_COL_PLATFORM: filtro_platform,
+        FP_COL_UF: filtro_uf,
+        FP_COL_MES: filtro_mes,
+    }
+    adotar_recarga(recarga)  # snapshot da recarga em segundo plano (se mais novo que o deste worker)
+    df = dados_pagina(FP_SHEET_NAME, filtros)
 
-    if df.empty:
+    if df is None:
         error_kpis = dbc.Row(dbc.Col(html.Div([html.H4("❌ Falha Crítica ao Carregar Dados do Funil", className="text-center text-danger mb-2")]), width=12), className="mb-4")
         empty_opts = []
         empty_fig = {}
-        return empty_opts, empty_opts, empty_opts, empty_opts, error_kpis, empty_fig, empty_fig, empty_fig, html.Div(), "❌ Falha ao carregar dados"
-
-    # 🔹 Limpeza de strings: Padronização
-    cols_to_clean = [FP_COL_CONSULTOR, FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_PLATFORM, FP_COL_UF, FP_COL_ORIGEM, FP_COL_MES]
-    for col in cols_to_clean:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip().str.title().replace(["Nan", "Na", ""], "")
-            
-    # 🔹 Aplicação de filtros
-    df_filtered = df.copy() 
-    if filtro_consultor:
-        df_filtered = df_filtered[df_filtered[FP_COL_CONSULTOR] == filtro_consultor]
-    if filtro_platform:
-        df_filtered = df_filtered[df_filtered[FP_COL_PLATFORM] == filtro_platform]
-    if filtro_uf:
-        df_filtered = df_filtered[df_filtered[FP_COL_UF] == filtro_uf]
-    if filtro_mes:
-        df_filtered = df_filtered[df_filtered[FP_COL_MES] == filtro_mes]
-
-    df = df_filtered
+        return empty_opts, empty_opts, empty_opts, error_kpis, empty_fig, empty_fig, empty_fig, "❌ Falha ao carregar dados"
 
     # 🔹 Dropdown options
     def get_options(column):
@@ -120,7 +124,7 @@ def atualizar_dashboard_funil(n_clicks, n_timer, filtro_consultor, filtro_platfo
             return [{"label": v, "value": v} for v in sorted(valid_values)]
         return []
 
-    consultor_opts = get_options(FP_COL_CONSULTOR)
+    # Consultor: opções pela busca no servidor (busca.py), não a lista inteira
     platform_opts = get_options(FP_COL_PLATFORM)
     uf_opts = get_options(FP_COL_UF)
     mes_opts = get_options(FP_COL_MES)
@@ -143,49 +147,79 @@ def atualizar_dashboard_funil(n_clicks, n_timer, filtro_consultor, filtro_platfo
     
     def create_chart_df(column, current_df):
         if column in current_df.columns and not current_df.empty:
-            df_chart = current_df[current_df[column] != ""].copy()
+            df_chart = current_df[current_df[column] != ""]
             if not df_chart.empty:
                 count_series = df_chart[column].value_counts().reset_index()
                 count_series.columns = ['index', 'Quantidade']
                 return count_series
         return pd.DataFrame() 
 
-    # Gráfico 1: Funil de Status (Principal)
-    graf_funil_status = {}
-    df_funil_chart = create_chart_df(FP_COL_STATUS, df)
+    # Cada gráfico vira uma tarefa independente; render.py monta todos em paralelo
+    margem = dict(l=20, r=20, t=40, b=20)
+    tarefas = {}
+
+    # Gráfico 1: Funil de Status (Principal) — leads que alcançaram cada etapa, da matriz de coortes
+    df_funil_chart = funil_etapas(filtros)
     if not df_funil_chart.empty:
-        status_ordem = ["Pendente", "Follow-Up", "Em Andamento", "Negociação", "Fechado", "Perdido"]
-        df_funil_chart['Status'] = pd.Categorical(df_funil_chart['index'], categories=status_ordem, ordered=True)
-        df_funil_chart = df_funil_chart.sort_values('Status').dropna(subset=['Status'])
-        
-        graf_funil_status = px.funnel(df_funil_chart, x="Quantidade", y="Status", title="Funil de Leads por Status", template="plotly_dark")
-        graf_funil_status.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+        df_funil_chart["Texto"] = [f"{leads:,} ({taxa:.1f}% da etapa anterior)" if i else f"{leads:,}"
+                                   for i, (leads, taxa) in enumerate(zip(df_funil_chart["Leads"], df_funil_chart["Taxa Etapa"].fillna(0)))]
+        tarefas["funil_status"] = (grafico_px, ("funnel", df_funil_chart), dict(
+            x="Leads", y="Etapa", text="Texto", title="Funil de Leads por Etapa Alcançada", template="plotly_dark",
+            layout=dict(margin=margem)))
 
     # Gráfico 2: Distribuição por Origem
-    graf_origem = {}
     df_origem_chart = create_chart_df(FP_COL_ORIGEM, df)
     if not df_origem_chart.empty:
         df_origem_chart.columns = ['Origem', 'Quantidade']
-        graf_origem = px.pie(df_origem_chart, names="Origem", values="Quantidade", title="Distribuição por Origem do Precatório", template="plotly_dark")
-        graf_origem.update_layout(margin=dict(l=20, r=20, t=40, b=20))
+        tarefas["origem"] = (grafico_px, ("pie", df_origem_chart), dict(
+            names="Origem", values="Quantidade", title="Distribuição por Origem do Precatório", template="plotly_dark",
+            layout=dict(margin=margem)))
 
-    # Gráfico 3: Motivos (Detalhamento)
-    graf_motivos = {}
-    df_motivos_chart = create_chart_df(FP_COL_MOTIVO, df)
+    # Gráfico 3: Motivos (Detalhamento) — top-N pré-contado por fatia de filtro no snapshot
+    df_motivos_chart = top_n(FP_SHEET_NAME, FP_COL_MOTIVO, filtros, n=10)
     if not df_motivos_chart.empty:
-        graf_motivos = px.bar(
-            df_motivos_chart.head(10), 
+        tarefas["motivos"] = (grafico_px, ("bar", df_motivos_chart), dict(
             x="index", 
             y="Quantidade", 
             title="Motivos Mais Comuns (Top 10)", 
             labels={"index": "Motivo", "Quantidade": "Quantidade"},
             template="plotly_dark",
-            color="index"
-        )
-        graf_motivos.update_layout(showlegend=False, margin=dict(l=20, r=20, t=40, b=20), xaxis={'categoryorder': 'total descending'})
+            color="index",
+            layout=dict(showlegend=False, margin=margem, xaxis={'categoryorder': 'total descending'})))
 
+    figuras = renderizar(tarefas)
+    graf_funil_status, graf_origem, graf_motivos = (
+        figuras.get(nome, {}) for nome in ("funil_status", "origem", "motivos"))
+
+    return (platform_opts, uf_opts, mes_opts, kpis, 
+            graf_funil_status, graf_origem, graf_motivos, texto_status_atualizacao())
+
+
+# ---------------- TABELA DE LEADS ----------------
+# Callback próprio: escolher um lead na busca não recalcula KPIs e gráficos.
+@dash.callback(
+    Output("fp_tabela_funil", "children"),
+    [
+        Input("fp_status_recarregamento", "children"),  # redesenha depois de cada recarga da página
+        Input("fp_filtro_consultor", "value"),
+        Input("fp_filtro_platform", "value"),
+        Input("fp_filtro_uf", "value"),
+        Input("fp_filtro_mes", "value"),
+        Input("fp_busca_lead", "value"),
+    ]
+)
+def atualizar_tabela_funil(_status, filtro_consultor, filtro_platform, filtro_uf, filtro_mes, lead):
+    df = dados_pagina(FP_SHEET_NAME, {
+        FP_COL_CONSULTOR: filtro_consultor,
+        FP_COL_PLATFORM: filtro_platform,
+        FP_COL_UF: filtro_uf,
+        FP_COL_MES: filtro_mes,
+    })
+    if df is None:
+        return html.Div()
+    if lead and FP_COL_NOME in df.columns:
+        df = df[df[FP_COL_NOME].astype(str).str.strip() == lead]  # valores da busca são o texto da célula
 
-    # TABELA
     colunas_tabela = [FP_COL_NOME, FP_COL_CONSULTOR, FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_PLATFORM, FP_COL_UF, FP_COL_TELEFONE, FP_COL_MES]
     tabela_df = df[[col for col in colunas_tabela if col in df.columns]].head(30)
 
@@ -193,6 +227,55 @@ def atualizar_dashboard_funil(n_clicks, n_timer, filtro_consultor, filtro_platfo
     if not tabela_df.empty:
         tabela = dbc.Table.from_dataframe(tabela_df, striped=True, bordered=True, hover=True)
 
-    hora = pd.Timestamp.now().strftime("%H:%M:%S")
-    return (consultor_opts, platform_opts, uf_opts, mes_opts, kpis, 
-            graf_funil_status, graf_origem, graf_motivos, tabela, f"🕒 Atualizado às {hora}")
\ No newline at end of file
+    return tabela
+
+
+# ---------------- BUSCA NOS FILTROS DE ALTA CARDINALIDADE ----------------
+def _rotulo_lead(nome, telefones):
+    return f"{nome} · {', '.join(map(str, telefones[:2]))}" if telefones else str(nome)
+
+
+registrar_busca("fp_filtro_consultor", FP_SHEET_NAME, FP_COL_CONSULTOR)
+registrar_busca("fp_busca_lead", FP_SHEET_NAME, FP_COL_NOME, telefones=FP_COL_TELEFONE, rotulo=_rotulo_lead)
+
+
+# ---------------- CALLBACK DAS COORTES ----------------
+# Só consulta a matriz pré-calculada do snapshot: trocar origem/fatia é uma soma de poucas linhas.
+@dash.callback(
+    [
+        Output("fp_coorte_origem", "options"),
+        Output("fp_grafico_coortes", "figure"),
+    ],
+    [
+        Input("fp_status_recarregamento", "children"),  # redesenha depois de cada recarga da página
+        Input("fp_filtro_consultor", "value"),
+        Input("fp_filtro_platform", "value"),
+        Input("fp_filtro_uf", "value"),
+        Input("fp_coorte_origem", "value"),
+    ]
+)
+def atualizar_coortes_funil(_status, filtro_consultor, filtro_platform, filtro_uf, filtro_origem):
+    origem_opts = [{"label": v, "value": v} for v in valores_fatia(FP_COL_ORIGEM)]
+    tabela = coortes({
+        FP_COL_CONSULTOR: filtro_consultor,
+        FP_COL_PLATFORM: filtro_platform,
+        FP_COL_UF: filtro_uf,
+        FP_COL_ORIGEM: filtro_origem,
+    })
+    if tabela.empty:
+        return origem_opts, {}
+
+    colunas = TRANSICOES + [COL_CONVERSAO_TOTAL]
+    taxas = tabela[colunas]
+    # Sem leads na etapa de origem a taxa fica vazia (não é 0%)
+    textos = [[f"{v:.1f}%" if v == v else "" for v in linha] for linha in taxas.itertuples(index=False)]
+    figura = renderizar({"coortes": (grafico_go, ([("Heatmap", dict(
+        z=taxas.values.tolist(), x=colunas, y=tabela[FP_COL_MES].tolist(), text=textos, texttemplate="%{text}",
+        customdata=tabela[["Pendente"]].values.tolist(),
+        hovertemplate="Coorte %{y}<br>%{x}: %{z:.1f}%<br>Leads na coorte: %{customdata[0]}<extra></extra>",
+        colorscale="Viridis", zmin=0, zmax=100, colorbar=dict(title="%"),
+    ))],), dict(layout=dict(
+        title="Taxa de Conversão entre Etapas por Coorte (mês)", template="plotly_dark",
+        margin=dict(l=20, r=20, t=40, b=20), yaxis=dict(type="category", autorange="reversed"),
+    )))})["coortes"]
+    return origem_opts, figura
@@ -2,26 +2,25 @@
 # 🎯 FUNIL X METAS (CRUZADO) - DASHBOARD OFICIAL
 # =======================================================
 
-import pandas as pd
 import dash
 from dash import dcc, html, Input, Output, register_page
-import plotly.express as px
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
 
 # Importa funções e constantes globais
 # Substitua no início do arquivo, na importação:
+from segundo_plano import adotar_recarga, controles_recarga, registrar_recarga
 from utils import (
-    carregar_dados, COR_CARD_BG, TEMA_DARK,
+    dados_pagina, texto_status_atualizacao, COR_CARD_BG, TEMA_DARK, FM_SHEET_NAME,
     FM_COL_MES, FM_COL_AREA_PASTA_PROXY as FM_COL_AREA,
-    FM_COL_META_MENSAL, FM_COL_META_ATINGIDA,
+    FM_COL_META_ATINGIDA,
     FM_COL_TAXA_CONVERSAO_META, FM_COL_TAXA_CONVERSAO_REAL,
     FM_COL_LEADS_RECEBIDOS as FM_COL_TOTAL_LEADS,
     FM_COL_CONTRATOS_REAL as FM_COL_CONTRATOS_FECHADOS
 )
 
 # ---------------- CONFIGURAÇÕES ----------------
-SHEET_NAME_CRUZADO = "funilxmetas"
+SHEET_NAME_CRUZADO = FM_SHEET_NAME
 
 register_page(
     __name__,
@@ -32,39 +31,37 @@ register_page(
 )
 
 # ---------------- LAYOUT ----------------
-layout = dbc.Container([
-    html.Br(),
-    html.H2("🎯 Cruzamento: Metas de Conversão vs. Funil Real",
-            className="text-center text-danger mb-4"),
-
-    html.Div(id="mf_kpis"),
-    html.Br(),
-
-    html.H5("🎛️ Filtros Interativos"),
-    dbc.Row([
-        dbc.Col(dcc.Dropdown(id="mf_filtro_mes", placeholder="Filtrar por Mês"), md=6),
-        dbc.Col(dcc.Dropdown(id="mf_filtro_pasta", placeholder="Filtrar por Área/Pasta"), md=6),
-    ], className="mb-4"),
-
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="mf_grafico_taxa_conversao", config={"displayModeBar": False}), md=12),
-    ]),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="mf_grafico_contratos", config={"displayModeBar": False}), md=12),
-    ]),
-
-    html.Hr(),
-    html.H4("📋 Tabela de Dados Cruzados", className="text-center"),
-    html.Div(id="mf_tabela_cruzamento", className="mt-3"),
-
-    html.Hr(),
-    html.Div([
-        dbc.Button("🔄 Atualizar Dados", id="mf_btn_recarregar", n_clicks=0, color="success"),
-        html.Span(id="mf_status_recarregamento", style={"marginLeft": "15px", "color": "#8b949e"})
-    ], className="text-center mt-3"),
-
-    dcc.Interval(id="mf_timer_auto", interval=90000, n_intervals=0)
-], fluid=True)
+def layout(**kwargs):
+    return dbc.Container([
+        html.Br(),
+        html.H2("🎯 Cruzamento: Metas de Conversão vs. Funil Real",
+                className="text-center text-danger mb-4"),
+
+        html.Div(id="mf_kpis"),
+        html.Br(),
+
+        html.H5("🎛️ Filtros Interativos"),
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="mf_filtro_mes", placeholder="Filtrar por Mês"), md=6),
+            dbc.Col(dcc.Dropdown(id="mf_filtro_pasta", placeholder="Filtrar por Área/Pasta"), md=6),
+        ], className="mb-4"),
+
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="mf_grafico_taxa_conversao", config={"displayModeBar": False}), md=12),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="mf_grafico_contratos", config={"displayModeBar": False}), md=12),
+        ]),
+
+        html.Hr(),
+        html.H4("📋 Tabela de Dados Cruzados", className="text-center"),
+        html.Div(id="mf_tabela_cruzamento", className="mt-3"),
+
+        html.Hr(),
+        controles_recarga("mf")
+    ], fluid=True)
+
+registrar_recarga("mf")  # 🔄 Atualizar Dados: download e leitura fora da requisição (segundo_plano.py)
 
 # ---------------- CALLBACK ----------------
 @dash.callback(
@@ -78,18 +75,22 @@ layout = dbc.Container([
         Output("mf_status_recarregamento", "children")
     ],
     [
-        Input("mf_btn_recarregar", "n_clicks"),
-        Input("mf_timer_auto", "n_intervals"),
+        Input("mf_recarga", "data"),
+        Input("snapshot_evento", "data"),  # aviso SSE de dados novos (eventos.py)
         Input("mf_filtro_mes", "value"),
         Input("mf_filtro_pasta", "value")
     ]
 )
-def atualizar_dashboard_cruzamento(n_clicks, n_timer, filtro_mes, filtro_pasta):
-    # 1️⃣ Carrega os dados
-    df = carregar_dados(SHEET_NAME_CRUZADO)
+def atualizar_dashboard_cruzamento(recarga, evento_snapshot, filtro_mes, filtro_pasta):
+    # Imports pesados adiados para o primeiro uso (boot rápido dos workers)
+    import plotly.express as px
+
+    # 1️⃣ Aba limpa do snapshot (compartilhada) filtrada por posição
+    adotar_recarga(recarga)  # snapshot da recarga em segundo plano (se mais novo que o deste worker)
+    df = dados_pagina(SHEET_NAME_CRUZADO, {FM_COL_MES: filtro_mes, FM_COL_AREA: filtro_pasta})
 
     # 2️⃣ Validação de dados
-    if df.empty:
+    if df is None:
         error_kpis = dbc.Row(
             dbc.Col(html.Div([
                 html.H4(f"❌ Falha ao carregar a aba '{SHEET_NAME_CRUZADO}'", className="text-center text-danger mb-2")
@@ -97,23 +98,7 @@ def atualizar_dashboard_cruzamento(n_clicks, n_timer, filtro_mes, filtro_pasta):
         )
         return [], [], error_kpis, {}, {}, html.Div(), "❌ Erro ao carregar dados."
 
-    # 3️⃣ Normalização
-    for col in [FM_COL_MES, FM_COL_AREA]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip().str.title().replace(["Nan", "Na", ""], "")
-
-    for col in [FM_COL_META_MENSAL, FM_COL_META_ATINGIDA, FM_COL_TOTAL_LEADS,
-                FM_COL_CONTRATOS_FECHADOS, FM_COL_TAXA_CONVERSAO_META, FM_COL_TAXA_CONVERSAO_REAL]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-
-    # 4️⃣ Aplicar filtros
-    if filtro_mes:
-        df = df[df[FM_COL_MES] == filtro_mes]
-    if filtro_pasta:
-        df = df[df[FM_COL_AREA] == filtro_pasta]
-
-    # 5️⃣ Filtros dinâmicos
+    # 3️⃣ Filtros dinâmicos
     def get_options(column):
         if column in df.columns:
             values = [v for v in df[column].unique() if v != ""]
@@ -123,7 +108,7 @@ def atualizar_dashboard_cruzamento(n_clicks, n_timer, filtro_mes, filtro_pasta):
     mes_opts = get_options(FM_COL_MES)
     pasta_opts = get_options(FM_COL_AREA)
 
-    # 6️⃣ KPIs principais
+    # 4️⃣ KPIs principais
     total_contratos_real = df[FM_COL_CONTRATOS_FECHADOS].sum()
     total_meta_contratos = df[FM_COL_META_ATINGIDA].sum()
     taxa_conversao_real_media = df[FM_COL_TAXA_CONVERSAO_REAL].mean()
@@ -148,7 +133,7 @@ def atualizar_dashboard_cruzamento(n_clicks, n_timer, filtro_mes, filtro_pasta):
         ]), color=COR_CARD_BG), md=3),
     ], className="mb-4")
 
-    # 7️⃣ Gráfico de Taxa de Conversão
+    # 5️⃣ Gráfico de Taxa de Conversão
     df_taxa = df.groupby([FM_COL_AREA, FM_COL_MES]).mean(numeric_only=True).reset_index()
     df_plot_taxa = df_taxa.melt(
         id_vars=[FM_COL_AREA, FM_COL_MES],
@@ -167,7 +152,7 @@ def atualizar_dashboard_cruzamento(n_clicks, n_timer, filtro_mes, filtro_pasta):
         title="📊 Taxa de Conversão: Real vs Meta", template="plotly_dark", markers=True
     )
 
-    # 8️⃣ Gráfico de Contratos
+    # 6️⃣ Gráfico de Contratos
     df_contratos = df.groupby([FM_COL_AREA, FM_COL_MES]).sum(numeric_only=True).reset_index()
     df_plot_contratos = df_contratos.melt(
         id_vars=[FM_COL_AREA, FM_COL_MES],
@@ -185,7 +170,7 @@ def atualizar_dashboard_cruzamento(n_clicks, n_timer, filtro_mes, filtro_pasta):
         facet_col=FM_COL_AREA, title="📈 Contratos Fechados vs Meta", template="plotly_dark"
     )
 
-    # 9️⃣ Tabela
+    # 7️⃣ Tabela
     cols_tabela = [
         FM_COL_MES, FM_COL_AREA, FM_COL_TOTAL_LEADS,
         FM_COL_CONTRATOS_FECHADOS, FM_COL_META_ATINGIDA,
@@ -195,9 +180,8 @@ def atualizar_dashboard_cruzamento(n_clicks, n_timer, filtro_mes, filtro_pasta):
     tabela = dbc.Table.from_dataframe(tabela_df, striped=True, bordered=True, hover=True)
 
     # 🔟 Retorno final
-    hora = pd.Timestamp.now().strftime("%H:%M:%S")
     return (
         mes_opts, pasta_opts, kpis,
         graf_taxa, graf_contratos,
-        tabela, f"🕒 Atualizado às {hora}"
+        tabela, texto_status_atualizacao()
     )
@@ -1,23 +1,15 @@
-import pandas as pd
 import dash
 from dash import dcc, html, Input, Output, register_page
-import plotly.express as px
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
 
-from utils import carregar_dados, COR_CARD_BG, TEMA_DARK
-
-# ---------------- NOMES COLUNAS NORMALIZADOS ----------------
-MP_COL_MES = "mes"
-MP_COL_META_MENSAL = "meta_mensal_pasta"
-MP_COL_META_MINIMA = "meta_mensal_area_minimo_esperado"
-MP_COL_META_ATINGIDA = "meta_mensal_atingida"
-MP_COL_PERCENTUAL_ATINGIMENTO = "_atingimento_contratos"
-MP_COL_LEADS_RECEBIDOS = "leads_recebidos_por_area_mes"
-MP_COL_TAXA_CONVERSAO = "taxa_de_conversao_por_area_mes"
-MP_COL_POTENCIAL_50 = "potencial_a_atingirse_cumprido_a_meta_mensal_individual_em_+_50"
-MP_COL_POTENCIAL_100 = "potencial_a_atingirse_cumprido_a_meta_mensal_individual_em_100"
-PASTA_COL_INDEX = 1  # Segunda coluna da planilha
+from segundo_plano import adotar_recarga, controles_recarga, registrar_recarga
+from utils import dados_pagina, filtrar_aba, texto_status_atualizacao, COR_CARD_BG, TEMA_DARK
+from utils import (
+    MP_SHEET_NAME, MP_COL_MES, MP_COL_META_MENSAL, MP_COL_META_MINIMA, MP_COL_META_ATINGIDA,
+    MP_COL_TAXA_CONVERSAO,
+    MP_COL_POTENCIAL_50, MP_COL_POTENCIAL_100, PASTA_COL_INDEX
+)
 
 # ---------------- REGISTRO DA PÁGINA ----------------
 register_page(
@@ -29,40 +21,38 @@ register_page(
 )
 
 # ---------------- LAYOUT ----------------
-layout = dbc.Container([
-    html.Br(),
-    html.H1("🏆 Dashboard - Metas por Pasta e Desempenho", className="text-center text-success mb-4"),
+def layout(**kwargs):
+    return dbc.Container([
+        html.Br(),
+        html.H1("🏆 Dashboard - Metas por Pasta e Desempenho", className="text-center text-success mb-4"),
 
-    html.Div(id="mp-kpis"),
-    html.Br(),
-    html.H5("🎛️ Filtros Interativos"),
+        html.Div(id="mp-kpis"),
+        html.Br(),
+        html.H5("🎛️ Filtros Interativos"),
 
-    dbc.Row([
-        dbc.Col(dcc.Dropdown(id="mp_filtro_mes", placeholder="Filtrar por Mês"), md=6),
-        dbc.Col(dcc.Dropdown(id="mp_filtro_pasta", placeholder="Filtrar por Área/Pasta"), md=6),
-    ], className="mb-4"),
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="mp_filtro_mes", placeholder="Filtrar por Mês"), md=6),
+            dbc.Col(dcc.Dropdown(id="mp_filtro_pasta", placeholder="Filtrar por Área/Pasta"), md=6),
+        ], className="mb-4"),
 
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="mp_grafico_atingimento", config={"displayModeBar": False}), lg=6, md=12),
-        dbc.Col(dcc.Graph(id="mp_grafico_conversao", config={"displayModeBar": False}), lg=6, md=12),
-    ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="mp_grafico_atingimento", config={"displayModeBar": False}), lg=6, md=12),
+            dbc.Col(dcc.Graph(id="mp_grafico_conversao", config={"displayModeBar": False}), lg=6, md=12),
+        ]),
 
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="mp_grafico_potencial", config={"displayModeBar": False}), md=12),
-    ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="mp_grafico_potencial", config={"displayModeBar": False}), md=12),
+        ]),
 
-    html.Hr(),
-    html.H4("📋 Tabela de Metas Detalhada", className="text-center"),
-    html.Div(id="mp_tabela_metas", className="mt-3"),
+        html.Hr(),
+        html.H4("📋 Tabela de Metas Detalhada", className="text-center"),
+        html.Div(id="mp_tabela_metas", className="mt-3"),
 
-    html.Hr(),
-    html.Div([
-        dbc.Button("🔄 Atualizar Dados", id="mp_btn_recarregar", n_clicks=0, color="success"),
-        html.Span(id="mp_status_recarregamento", style={"marginLeft": "15px", "color": "#8b949e"})
-    ], className="text-center mt-3"),
+        html.Hr(),
+        controles_recarga("mp")
+    ], fluid=True)
 
-    dcc.Interval(id="mp_timer_auto", interval=90000, n_intervals=0)
-], fluid=True)
+registrar_recarga("mp")  # 🔄 Atualizar Dados: download e leitura fora da requisição (segundo_plano.py)
 
 # ---------------- CALLBACK ----------------
 @dash.callback(
@@ -77,16 +67,22 @@ layout = dbc.Container([
         Output("mp_status_recarregamento", "children")
     ],
     [
-        Input("mp_btn_recarregar", "n_clicks"),
-        Input("mp_timer_auto", "n_intervals"),
+        Input("mp_recarga", "data"),
+        Input("snapshot_evento", "data"),  # aviso SSE de dados novos (eventos.py)
         Input("mp_filtro_mes", "value"),
         Input("mp_filtro_pasta", "value")
     ]
 )
-def atualizar_dashboard_metas(n_clicks, n_timer, filtro_mes, filtro_pasta):
-    df = carregar_dados("Metas por pasta")
+def atualizar_dashboard_metas(recarga, evento_snapshot, filtro_mes, filtro_pasta):
+    # Imports pesados adiados para o primeiro uso (boot rápido dos workers)
+    import pandas as pd
+    import plotly.express as px
+
+    # Aba limpa do snapshot (compartilhada); os filtros entram depois por posição
+    adotar_recarga(recarga)  # snapshot da recarga em segundo plano (se mais novo que o deste worker)
+    df = dados_pagina(MP_SHEET_NAME)
 
-    if df.empty:
+    if df is None:
         error_kpis = dbc.Row(
             dbc.Col(html.Div([
                 html.H4("❌ Falha Crítica ao Carregar Dados de Metas", className="text-center text-danger mb-2")
@@ -96,23 +92,7 @@ def atualizar_dashboard_metas(n_clicks, n_timer, filtro_mes, filtro_pasta):
         return empty_opts, empty_opts, error_kpis, empty_fig, empty_fig, empty_fig, html.Div(), "❌ Falha ao carregar dados"
 
     PASTA_COL = df.columns[PASTA_COL_INDEX]
-
-    for col in [MP_COL_MES, PASTA_COL]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip()
-            df[col] = df[col].replace(["Nan", "Na", ""], "")
-
-    for col in [MP_COL_PERCENTUAL_ATINGIMENTO, MP_COL_TAXA_CONVERSAO]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    for col in [MP_COL_META_MENSAL, MP_COL_META_ATINGIDA, MP_COL_LEADS_RECEBIDOS, MP_COL_POTENCIAL_50, MP_COL_POTENCIAL_100]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-
-    if filtro_mes:
-        df = df[df[MP_COL_MES] == filtro_mes]
-    if filtro_pasta:
-        df = df[df[PASTA_COL] == filtro_pasta]
+    df = filtrar_aba(MP_SHEET_NAME, {MP_COL_MES: filtro_mes, PASTA_COL: filtro_pasta})
 
     def get_options(column):
         if column in df.columns:
@@ -188,10 +168,8 @@ def atualizar_dashboard_metas(n_clicks, n_timer, filtro_mes, filtro_pasta):
             template="plotly_dark", barmode='group'
         )
 
-    tabela_df = df.copy()
-    cols_to_display = [col for col in tabela_df.columns if col not in [MP_COL_POTENCIAL_50, MP_COL_POTENCIAL_100, MP_COL_META_MINIMA]]
-    tabela_df = tabela_df[cols_to_display].head(30)
+    cols_to_display = [col for col in df.columns if col not in [MP_COL_POTENCIAL_50, MP_COL_POTENCIAL_100, MP_COL_META_MINIMA]]
+    tabela_df = df[cols_to_display].head(30)
     tabela = dbc.Table.from_dataframe(tabela_df, striped=True, bordered=True, hover=True) if not tabela_df.empty else html.Div()
 
-    hora = pd.Timestamp.now().strftime("%H:%M:%S")
-    return mes_opts, pasta_opts, kpis, graf_atingimento, graf_conversao, graf_potencial, tabela, f"🕒 Atualizado às {hora}"
+    return mes_opts, pasta_opts, kpis, graf_atingimento, graf_conversao, graf_potencial, tabela, texto_status_atualizacao()
@@ -0,0 +1,128 @@
+import time
+
+from dash import dcc, html, Input, Output, register_page
+import dash_bootstrap_components as dbc
+from historico import COL_CHAVE, mudancas_desde
+from segundo_plano import callback_segundo_plano, indicador_progresso, opcoes_progresso
+from utils import criar_card_kpi, obter_snapshot, texto_status_atualizacao
+
+# ---------------- REGISTRO ----------------
+register_page(
+    __name__,
+    name="🕓 Mudanças",
+    path="/mudancas",
+    order=6,
+    title="Mudanças nos Dados"
+)
+
+JANELAS = [
+    {"label": "Desde hoje 00:00", "value": "hoje"},
+    {"label": "Última hora", "value": 3600},
+    {"label": "Últimas 24 horas", "value": 86400},
+    {"label": "Últimos 7 dias", "value": 7 * 86400},
+]
+MAX_LINHAS_TABELA = 50  # por tabela; a lista completa sai em /api/v1/mudancas
+
+# ---------------- LAYOUT ----------------
+def layout(**kwargs):
+    return dbc.Container([
+        html.Br(),
+        html.H1("🕓 Mudanças nos Dados", className="text-center text-warning mb-4"),
+        html.H5("📋 Linhas adicionadas, removidas e alteradas entre os snapshots da planilha", className="text-center text-muted mb-4"),
+
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="md_filtro_desde", options=JANELAS, value="hoje", clearable=False), md=6),
+            dbc.Col(dcc.Dropdown(id="md_filtro_aba", placeholder="Todas as abas"), md=6),
+        ], className="mb-4"),
+
+        indicador_progresso("md"),
+        html.Div(id="md_kpis", className="mb-4"),
+        html.Div(id="md_aviso", className="text-center text-warning mb-3"),
+        html.Div(id="md_detalhes"),
+
+        html.Hr(),
+        html.Div(id="md_status", className="text-center", style={"color": "#8b949e"}),
+    ], fluid=True)
+
+
+def _inicio_janela(janela):
+    if janela == "hoje":
+        agora = time.localtime()
+        return time.mktime((agora.tm_year, agora.tm_mon, agora.tm_mday, 0, 0, 0, 0, 0, -1))
+    return time.time() - int(janela)
+
+
+def _tabela(linhas):
+    import pandas as pd
+
+    df = pd.DataFrame(linhas[:MAX_LINHAS_TABELA]).drop(columns=[COL_CHAVE], errors="ignore")
+    return dbc.Table.from_dataframe(df, striped=True, bordered=True, hover=True, size="sm", class_name="table-dark")
+
+
+def _tabela_alteracoes(alteradas):
+    import pandas as pd
+
+    linhas = [
+        {
+            "linha": " / ".join(str(v) for v in item["id"].values()) or item[COL_CHAVE],
+            "coluna": coluna,
+            "antes": antes,
+            "depois": depois,
+        }
+        for item in alteradas[:MAX_LINHAS_TABELA]
+        for coluna, (antes, depois) in item["colunas"].items()
+    ]
+    return dbc.Table.from_dataframe(pd.DataFrame(linhas), striped=True, bordered=True, hover=True, size="sm", class_name="table-dark")
+
+
+def _secao_aba(aba, mudancas):
+    totais = mudancas["totais"]
+    blocos = [html.H4(f"📄 {aba}", className="text-info mt-4")]
+    for tipo, titulo, cor in [("adicionadas", "➕ Adicionadas", "text-success"), ("removidas", "➖ Removidas", "text-danger")]:
+        if totais[tipo]:
+            blocos += [html.H6(f"{titulo} ({totais[tipo]})", className=cor), _tabela(mudancas[tipo])]
+    if totais["alteradas"]:
+        blocos += [html.H6(f"✏️ Alteradas ({totais['alteradas']})", className="text-warning"), _tabela_alteracoes(mudancas["alteradas"])]
+    return html.Div(blocos)
+
+# ---------------- CALLBACK ----------------
+# Compõe o histórico de todas as abas: roda em segundo plano (segundo_plano.py), com progresso e cancelamento
+@callback_segundo_plano(
+    [
+        Output("md_filtro_aba", "options"),
+        Output("md_kpis", "children"),
+        Output("md_aviso", "children"),
+        Output("md_detalhes", "children"),
+        Output("md_status", "children"),
+    ],
+    [
+        Input("snapshot_evento", "data"),  # aviso SSE de dados novos (eventos.py)
+        Input("md_filtro_desde", "value"),
+        Input("md_filtro_aba", "value"),
+    ],
+    **opcoes_progresso("md"),
+)
+def atualizar_mudancas(set_progress, evento_snapshot, janela, filtro_aba):
+    set_progress((10, "Lendo o histórico..."))
+    abas = obter_snapshot()["abas"]
+    aba_opts = [{"label": aba, "value": aba} for aba in abas]
+
+    # Composição dos deltas gravados a cada snapshot (historico.py): nada de comparar abas inteiras aqui
+    resultado = mudancas_desde(_inicio_janela(janela or "hoje"), filtro_aba)
+    totais = {tipo: sum(m["totais"][tipo] for m in resultado["abas"].values()) for tipo in ("adicionadas", "removidas", "alteradas")}
+    kpis = dbc.Row([
+        dbc.Col(criar_card_kpi("Snapshots com Mudança", f"{resultado['deltas']}", "text-info"), md=3),
+        dbc.Col(criar_card_kpi("Linhas Adicionadas", f"{totais['adicionadas']:,}", "text-success"), md=3),
+        dbc.Col(criar_card_kpi("Linhas Removidas", f"{totais['removidas']:,}", "text-danger"), md=3),
+        dbc.Col(criar_card_kpi("Linhas Alteradas", f"{totais['alteradas']:,}", "text-warning"), md=3),
+    ], className="mb-4")
+
+    set_progress((60, "Montando tabelas..."))
+    aviso = None
+    if resultado["incompleto"]:
+        aviso = "⚠️ O histórico guardado não cobre todo o período (ou algum snapshot teve mudanças demais): os totais podem estar incompletos."
+    if resultado["abas"]:
+        detalhes = [_secao_aba(aba, m) for aba, m in resultado["abas"].items()]
+    else:
+        detalhes = html.P("Nenhuma mudança no período.", className="text-center text-muted")
+    return aba_opts, kpis, aviso, detalhes, texto_status_atualizacao()
@@ -1,18 +1,25 @@
-import pandas as pd
 import dash
-from dash import dcc, html, Input, Output, register_page
-import plotly.express as px
+from dash import dcc, html, Input, Output, State, register_page
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
 
+from segundo_plano import (
+    adotar_recarga, callback_segundo_plano, controles_recarga, indicador_progresso, opcoes_progresso, registrar_recarga,
+    tabela_em_partes
+)
+
 # Importa as constantes e funções do arquivo utils.py
-from utils import carregar_dados, COR_CARD_BG, TEMA_DARK
+from utils import dados_pagina, texto_status_atualizacao, COR_CARD_BG, TEMA_DARK
 from utils import (
     PD_SHEET_NAME, PD_COL_CONSULTOR, PD_COL_DATA, PD_COL_LIGACOES, PD_COL_NOTA_LIGACOES, 
     PD_COL_COTACAO, PD_COL_NOTA_COTACAO, PD_COL_OBSERVACOES,
-    PD_STATUS_ATINGIDA, PD_STATUS_NAO_ATINGIDA, PD_STATUS_PARCIAL
+    PD_STATUS_ATINGIDA, PD_STATUS_NAO_ATINGIDA, PD_STATUS_PARCIAL,
+    rotulo_ano_mes
 )
 
+from amostragem import LIMITE_MARCADORES, ZOOM_RESET, faixa_zoom, recortar_faixa, reduzir_serie
+from rollups import serie_producao, ROTULOS_GRANULARIDADE, PD_COL_ANO_MES
+
 
 # ---------------- REGISTRO DA PÁGINA ----------------
 register_page(
@@ -24,43 +31,85 @@ register_page(
 )
 
 # ---------------- LAYOUT DA PÁGINA ----------------
-layout = dbc.Container([
-    html.Br(),
-    html.H1("📊 Análise de Produção Diária", 
-            className="text-center text-info mb-4"),
-
-    # Filtros
-    dbc.Row([
-        dbc.Col(dcc.Dropdown(id="pd_filtro_consultor", placeholder=f"Filtrar por {PD_COL_CONSULTOR}", multi=True), md=6),
-        dbc.Col(dcc.Dropdown(id="pd_filtro_mes", placeholder="Filtrar por Mês"), md=6),
-    ], className="mb-4"),
-
-    # KPIs de Desempenho
-    html.Div(id="pd_kpis_desempenho", className="mb-4"),
-
-    # Gráfico de Barras por Consultor (Ligações e Cotações)
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="pd_grafico_barras_consultor", config={"displayModeBar": False}), md=12),
-    ], className="mb-4"),
-    
-    # Gráfico de Linha de Tendência (Ligações e Cotações)
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="pd_grafico_tendencia", config={"displayModeBar": False}), md=12),
-    ], className="mb-4"),
+def layout(**kwargs):
+    return dbc.Container([
+        html.Br(),
+        html.H1("📊 Análise de Produção Diária", 
+                className="text-center text-info mb-4"),
+
+        # Filtros
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="pd_filtro_consultor", placeholder=f"Filtrar por {PD_COL_CONSULTOR}", multi=True), md=6),
+            dbc.Col(dcc.Dropdown(id="pd_filtro_mes", placeholder="Filtrar por Mês"), md=6),
+        ], className="mb-4"),
+
+        # KPIs de Desempenho
+        html.Div(id="pd_kpis_desempenho", className="mb-4"),
+
+        # Gráfico de Barras por Consultor (Ligações e Cotações)
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="pd_grafico_barras_consultor", config={"displayModeBar": False}), md=12),
+        ], className="mb-4"),
+        
+        # Gráfico de Linha de Tendência (Ligações e Cotações)
+        dbc.RadioItems(
+            id="pd_granularidade",
+            options=[{"label": rotulo, "value": valor} for valor, rotulo in ROTULOS_GRANULARIDADE.items()],
+            value="dia",
+            inline=True,
+            className="text-center mb-2",
+        ),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="pd_grafico_tendencia", config={"displayModeBar": False}), md=12),
+        ], className="mb-4"),
+
+        html.Hr(),
+        html.H4("📋 Tabela de Produção Detalhada", className="text-center"),
+        indicador_progresso("pd_tabela"),
+        html.Div(id="pd_tabela_detalhada", className="mt-3"),
+
+        html.Hr(),
+        controles_recarga("pd", "🔄 Recarregar Dados")
+    ], fluid=True)
+
+
+# ---------------- GRÁFICO DE TENDÊNCIA ----------------
+def figura_tendencia(granularidade, consultores, ano_mes, faixa=None):
+    """Linha de ligações/cotações por período; acima do orçamento de pontos vai reduzida (amostragem.py).
+
+    `faixa` = trecho visível após um zoom: só ele é servido, em resolução total se couber no orçamento.
+    """
+    import plotly.express as px
+
+    df_tendencia = recortar_faixa(serie_producao(granularidade, consultores, ano_mes), 'periodo', faixa)
+    if df_tendencia is None or df_tendencia.empty:
+        return {}
+    df_tendencia = df_tendencia.rename(columns={PD_COL_LIGACOES: 'Total_Ligacoes', PD_COL_COTACAO: 'Total_Cotacoes'})
 
-    html.Hr(),
-    html.H4("📋 Tabela de Produção Detalhada", className="text-center"),
-    html.Div(id="pd_tabela_detalhada", className="mt-3"),
+    # Melt para Plotly
+    df_plot_tendencia = df_tendencia.melt(id_vars='periodo', 
+                                          value_vars=['Total_Ligacoes', 'Total_Cotacoes'], 
+                                          var_name='Métrica', 
+                                          value_name='Total')
+    df_plot_tendencia = reduzir_serie(df_plot_tendencia, 'periodo', 'Total', por='Métrica')
 
-    html.Hr(),
-    html.Div([
-        dbc.Button("🔄 Recarregar Dados", id="pd_btn_recarregar", n_clicks=0, color="success"),
-        html.Span(id="pd_status_recarregamento", style={"marginLeft": "15px", "color": "#8b949e"})
-    ], className="text-center mt-3"),
+    graf_tendencia = px.line(
+        df_plot_tendencia,
+        x='periodo',
+        y='Total',
+        color='Métrica',
+        title=f'Tendência {ROTULOS_GRANULARIDADE[granularidade]}: Ligações e Cotações',
+        template="plotly_dark",
+        markers=df_plot_tendencia['periodo'].nunique() <= LIMITE_MARCADORES,
+        labels={'Total': 'Total Registrado', 'periodo': 'Período'}
+    )
+    graf_tendencia.update_layout(margin=dict(t=80, b=20), yaxis={'tickformat': ',.0f'})
+    if faixa is not None and faixa != ZOOM_RESET:
+        graf_tendencia.update_layout(xaxis={'range': list(faixa)})  # mantém o zoom do usuário
+    return graf_tendencia
 
-    dcc.Interval(id="pd_timer_auto", interval=120000, n_intervals=0)
-], fluid=True)
 
+registrar_recarga("pd")  # 🔄 Recarregar Dados: download e leitura fora da requisição (segundo_plano.py)
 
 # ---------------- CALLBACK DA PÁGINA ----------------
 @dash.callback(
@@ -70,61 +119,40 @@ layout = dbc.Container([
         Output("pd_kpis_desempenho", "children"),
         Output("pd_grafico_barras_consultor", "figure"),
         Output("pd_grafico_tendencia", "figure"),
-        Output("pd_tabela_detalhada", "children"),
         Output("pd_status_recarregamento", "children")
     ],
     [
-        Input("pd_btn_recarregar", "n_clicks"),
-        Input("pd_timer_auto", "n_intervals"),
+        Input("pd_recarga", "data"),
+        Input("snapshot_evento", "data"),  # aviso SSE de dados novos (eventos.py)
         Input("pd_filtro_consultor", "value"),
-        Input("pd_filtro_mes", "value")
+        Input("pd_filtro_mes", "value"),
+        Input("pd_granularidade", "value")
     ]
 )
-def atualizar_dashboard_producao_diaria(n_clicks, n_timer, filtro_consultor, filtro_mes):
-    # 1. Carregar Dados
-    df = carregar_dados(PD_SHEET_NAME) 
+def atualizar_dashboard_producao_diaria(recarga, evento_snapshot, filtro_consultor, filtro_mes, granularidade):
+    # Imports pesados adiados para o primeiro uso (boot rápido dos workers)
+    import plotly.express as px
+
+    # 1. Aba limpa do snapshot (compartilhada) filtrada por posição: só as linhas escolhidas são alocadas
+    adotar_recarga(recarga)  # snapshot da recarga em segundo plano (se mais novo que o deste worker)
+    df = dados_pagina(PD_SHEET_NAME, {PD_COL_CONSULTOR: filtro_consultor, PD_COL_ANO_MES: filtro_mes})
 
     # 🚨 Tratamento de Erro Crítico
-    if df.empty:
+    if df is None:
         error_kpis = dbc.Row(dbc.Col(html.Div([html.H4(f"❌ Falha Crítica: Aba '{PD_SHEET_NAME}' não encontrada.", className="text-center text-danger mb-2")]), width=12), className="mb-4")
-        return [], [], error_kpis, {}, {}, html.Div(), "❌ Falha ao carregar dados"
+        return [], [], error_kpis, {}, {}, "❌ Falha ao carregar dados"
 
-    # 2. LIMPEZA E CONVERSÃO
-    # Consultor
-    if PD_COL_CONSULTOR in df.columns:
-        df[PD_COL_CONSULTOR] = df[PD_COL_CONSULTOR].astype(str).str.strip().str.title().replace(["Nan", "Na", ""], "Não Atribuído")
-    
-    # Data (Converter para datetime e extrair Mês/Ano)
+    # 2. DATAS VÁLIDAS E ORDEM CRONOLÓGICA
+    # Data (já convertida no snapshot, com chave inteira AAAAMM para o filtro de mês)
     if PD_COL_DATA in df.columns:
-        df[PD_COL_DATA] = pd.to_datetime(df[PD_COL_DATA], errors='coerce')
         df = df.dropna(subset=[PD_COL_DATA]) # Remove linhas com data inválida
-        df['MES_ANO'] = df[PD_COL_DATA].dt.strftime('%Y-%m') # Formato AAAA-MM
-        df = df.sort_values(by=PD_COL_DATA) # Ordena por data para gráficos de tendência
+        df = df.sort_values(by=PD_COL_DATA, kind="stable") # Ordena por data (empates na ordem da planilha)
     else:
         # Se a coluna de data não existir, saia com erro
         error_kpis = dbc.Row(dbc.Col(html.Div([html.H4(f"❌ Falha: Coluna '{PD_COL_DATA}' não encontrada.", className="text-center text-danger mb-2")]), width=12), className="mb-4")
-        return [], [], error_kpis, {}, {}, html.Div(), "❌ Falha: Coluna de data não encontrada"
+        return [], [], error_kpis, {}, {}, "❌ Falha: Coluna de data não encontrada"
 
-    # Métricas numéricas
-    for col in [PD_COL_LIGACOES, PD_COL_COTACAO]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    # Status (padronizar strings)
-    for col in [PD_COL_NOTA_LIGACOES, PD_COL_NOTA_COTACAO]:
-        if col in df.columns:
-            df[col] = df[col].astype(str).str.strip().replace(["Nan", "Na", ""], "Indefinido")
-
-    # 3. APLICAÇÃO DE FILTROS
-    df_filtered = df.copy() 
-    if filtro_consultor:
-        df_filtered = df_filtered[df_filtered[PD_COL_CONSULTOR].isin(filtro_consultor)]
-    if filtro_mes:
-        df_filtered = df_filtered[df_filtered['MES_ANO'] == filtro_mes]
-        
-    df = df_filtered
-
-    # 4. DROPDOWN OPTIONS
+    # 3. DROPDOWN OPTIONS
     def get_options(column):
         if column in df.columns:
             valid_values = df[df[column] != ""][column].unique()
@@ -132,9 +160,9 @@ def atualizar_dashboard_producao_diaria(n_clicks, n_timer, filtro_consultor, fil
         return []
 
     consultor_opts = get_options(PD_COL_CONSULTOR)
-    mes_opts = get_options('MES_ANO')
+    mes_opts = [{"label": rotulo_ano_mes(m), "value": int(m)} for m in sorted(df[PD_COL_ANO_MES].unique())]
 
-    # 5. KPIS DE DESEMPENHO
+    # 4. KPIS DE DESEMPENHO
     total_ligacoes = df[PD_COL_LIGACOES].sum()
     total_cotacoes = df[PD_COL_COTACAO].sum()
     
@@ -168,7 +196,7 @@ def atualizar_dashboard_producao_diaria(n_clicks, n_timer, filtro_consultor, fil
     ], className="mb-4")
 
 
-    # 6. GRÁFICO DE BARRAS POR CONSULTOR (Ligações e Cotações)
+    # 5. GRÁFICO DE BARRAS POR CONSULTOR (Ligações e Cotações)
     df_agrupado_consultor = df.groupby(PD_COL_CONSULTOR).agg(
         Total_Ligacoes=(PD_COL_LIGACOES, 'sum'),
         Total_Cotacoes=(PD_COL_COTACAO, 'sum')
@@ -194,37 +222,52 @@ def atualizar_dashboard_producao_diaria(n_clicks, n_timer, filtro_consultor, fil
     graf_barras_consultor.update_layout(margin=dict(t=80, b=20), yaxis={'tickformat': ',.0f'})
 
 
-    # 7. GRÁFICO DE TENDÊNCIA (Linha - Ligações e Cotações ao longo do tempo)
-    df_tendencia = df.groupby(PD_COL_DATA).agg(
-        Total_Ligacoes=(PD_COL_LIGACOES, 'sum'),
-        Total_Cotacoes=(PD_COL_COTACAO, 'sum')
-    ).reset_index()
+    # 6. GRÁFICO DE TENDÊNCIA (servido pelos rollups na granularidade escolhida, reduzido por LTTB)
+    granularidade = granularidade or "dia"
+    graf_tendencia = figura_tendencia(granularidade, filtro_consultor, filtro_mes)
 
-    # Melt para Plotly
-    df_plot_tendencia = df_tendencia.melt(id_vars=PD_COL_DATA, 
-                                          value_vars=['Total_Ligacoes', 'Total_Cotacoes'], 
-                                          var_name='Métrica', 
-                                          value_name='Total')
+    return (consultor_opts, mes_opts, kpis_desempenho, graf_barras_consultor, graf_tendencia, texto_status_atualizacao())
 
-    graf_tendencia = px.line(
-        df_plot_tendencia,
-        x=PD_COL_DATA,
-        y='Total',
-        color='Métrica',
-        title='Tendência Diária: Ligações e Cotações',
-        template="plotly_dark",
-        markers=True,
-        labels={'Total': 'Total Registrado', PD_COL_DATA: 'Data'}
-    )
-    graf_tendencia.update_layout(margin=dict(t=80, b=20), yaxis={'tickformat': ',.0f'})
 
-    # 8. TABELA DETALHADA
+# ---------------- TABELA DETALHADA (EM SEGUNDO PLANO) ----------------
+# Uma linha por registro de produção: a parte mais pesada da página (montagem e payload)
+# roda fora da requisição, com progresso e cancelamento
+@callback_segundo_plano(
+    Output("pd_tabela_detalhada", "children"),
+    [
+        Input("pd_status_recarregamento", "children"),  # redesenha depois de cada recarga da página
+        Input("pd_filtro_consultor", "value"),
+        Input("pd_filtro_mes", "value"),
+    ],
+    **opcoes_progresso("pd_tabela"),
+)
+def atualizar_tabela_producao(set_progress, _status, filtro_consultor, filtro_mes):
+    set_progress((5, "Filtrando registros..."))
+    df = dados_pagina(PD_SHEET_NAME, {PD_COL_CONSULTOR: filtro_consultor, PD_COL_ANO_MES: filtro_mes})
+    if df is None:
+        return html.Div()
+
     cols_tabela = [PD_COL_DATA, PD_COL_CONSULTOR, PD_COL_LIGACOES, PD_COL_NOTA_LIGACOES, PD_COL_COTACAO, PD_COL_NOTA_COTACAO, PD_COL_OBSERVACOES]
     tabela_df = df[[col for col in cols_tabela if col in df.columns]]
-    
-    tabela = html.Div()
-    if not tabela_df.empty:
-        tabela = dbc.Table.from_dataframe(tabela_df, striped=True, bordered=True, hover=True, class_name="table-dark")
+    if tabela_df.empty:
+        return html.Div()
+    return tabela_em_partes(tabela_df, set_progress, inicio=10, striped=True, bordered=True, hover=True, class_name="table-dark")
+
 
-    hora = pd.Timestamp.now().strftime("%H:%M:%S")
-    return (consultor_opts, mes_opts, kpis_desempenho, graf_barras_consultor, graf_tendencia, tabela, f"🕒 Atualizado às {hora}")
\ No newline at end of file
+# ---------------- ZOOM NA TENDÊNCIA ----------------
+@dash.callback(
+    Output("pd_grafico_tendencia", "figure", allow_duplicate=True),
+    Input("pd_grafico_tendencia", "relayoutData"),
+    [
+        State("pd_filtro_consultor", "value"),
+        State("pd_filtro_mes", "value"),
+        State("pd_granularidade", "value")
+    ],
+    prevent_initial_call=True
+)
+def zoom_tendencia(relayout, filtro_consultor, filtro_mes, granularidade):
+    # Zoom em x: serve o trecho visível em resolução total (dentro do orçamento); duplo clique volta à série reduzida
+    faixa = faixa_zoom(relayout)
+    if faixa is None:
+        raise PreventUpdate
+    return figura_tendencia(granularidade or "dia", filtro_consultor, filtro_mes, faixa)
@@ -1,11 +1,10 @@
-import pandas as pd
 import dash
 from dash import dcc, html, Input, Output, register_page
-import plotly.express as px
-import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
-from utils import carregar_dados, RK_SHEET_NAME
+from render import grafico_go, grafico_px, renderizar
+from segundo_plano import adotar_recarga, controles_recarga, registrar_recarga
+from utils import dados_pagina, texto_status_atualizacao, RK_SHEET_NAME, RK_COL_MES, RK_COL_CONSULTOR
 
 # ---------------- REGISTRO ----------------
 register_page(
@@ -17,45 +16,43 @@ register_page(
 )
 
 # ---------------- LAYOUT ----------------
-layout = dbc.Container([
-    html.Br(),
-    html.H1("🏆 Ranking Completo de Consultores", className="text-center text-warning mb-4"),
-    html.H5("📊 Pódio e métricas de desempenho consolidadas", className="text-center text-muted mb-4"),
-
-    dbc.Row([
-        dbc.Col(dcc.Dropdown(id="rk_filtro_mes", placeholder="Filtrar por Mês"), md=6),
-        dbc.Col(dcc.Dropdown(id="rk_filtro_consultor", placeholder="Filtrar por Consultor"), md=6),
-    ], className="mb-4"),
-
-    html.Div(id="rk_kpis_gerais", className="mb-4"),
-
-    html.Hr(),
-    html.H3("🥇 Pódio - Top 3 Consultores", className="text-center text-light mb-4"),
-    dcc.Graph(id="rk_podio", config={"displayModeBar": False}),
-
-    html.Hr(),
-    html.H3("📈 Rankings Detalhados", className="text-center text-info mb-4"),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="rk_grafico_contratos"), md=6),
-        dbc.Col(dcc.Graph(id="rk_grafico_conversao"), md=6),
-    ]),
-    dbc.Row([
-        dbc.Col(dcc.Graph(id="rk_grafico_atingimento"), md=6),
-        dbc.Col(dcc.Graph(id="rk_grafico_reunioes"), md=6),
-    ]),
-
-    html.Hr(),
-    html.H4("📋 Tabela Detalhada", className="text-center text-light"),
-    html.Div(id="rk_tabela_detalhada", className="mt-3"),
-
-    html.Hr(),
-    html.Div([
-        dbc.Button("🔄 Atualizar Dados", id="rk_btn_recarregar", n_clicks=0, color="success"),
-        html.Span(id="rk_status_recarregamento", style={"marginLeft": "15px", "color": "#8b949e"})
-    ], className="text-center mt-3"),
-
-    dcc.Interval(id="rk_timer_auto", interval=180000, n_intervals=0)
-], fluid=True)
+def layout(**kwargs):
+    return dbc.Container([
+        html.Br(),
+        html.H1("🏆 Ranking Completo de Consultores", className="text-center text-warning mb-4"),
+        html.H5("📊 Pódio e métricas de desempenho consolidadas", className="text-center text-muted mb-4"),
+
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="rk_filtro_mes", placeholder="Filtrar por Mês"), md=6),
+            dbc.Col(dcc.Dropdown(id="rk_filtro_consultor", placeholder="Filtrar por Consultor"), md=6),
+        ], className="mb-4"),
+
+        html.Div(id="rk_kpis_gerais", className="mb-4"),
+
+        html.Hr(),
+        html.H3("🥇 Pódio - Top 3 Consultores", className="text-center text-light mb-4"),
+        dcc.Graph(id="rk_podio", config={"displayModeBar": False}),
+
+        html.Hr(),
+        html.H3("📈 Rankings Detalhados", className="text-center text-info mb-4"),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="rk_grafico_contratos"), md=6),
+            dbc.Col(dcc.Graph(id="rk_grafico_conversao"), md=6),
+        ]),
+        dbc.Row([
+            dbc.Col(dcc.Graph(id="rk_grafico_atingimento"), md=6),
+            dbc.Col(dcc.Graph(id="rk_grafico_reunioes"), md=6),
+        ]),
+
+        html.Hr(),
+        html.H4("📋 Tabela Detalhada", className="text-center text-light"),
+        html.Div(id="rk_tabela_detalhada", className="mt-3"),
+
+        html.Hr(),
+        controles_recarga("rk")
+    ], fluid=True)
+
+registrar_recarga("rk")  # 🔄 Atualizar Dados: download e leitura fora da requisição (segundo_plano.py)
 
 # ---------------- CALLBACK ----------------
 @dash.callback(
@@ -72,41 +69,19 @@ layout = dbc.Container([
         Output("rk_status_recarregamento", "children"),
     ],
     [
-        Input("rk_btn_recarregar", "n_clicks"),
-        Input("rk_timer_auto", "n_intervals"),
+        Input("rk_recarga", "data"),
+        Input("snapshot_evento", "data"),  # aviso SSE de dados novos (eventos.py)
         Input("rk_filtro_mes", "value"),
         Input("rk_filtro_consultor", "value"),
     ]
 )
-def atualizar_dashboard(n_clicks, n_timer, filtro_mes, filtro_consultor):
-    df = carregar_dados(RK_SHEET_NAME)
-    if df.empty:
+def atualizar_dashboard(recarga, evento_snapshot, filtro_mes, filtro_consultor):
+    # Aba limpa do snapshot (compartilhada) filtrada por posição
+    adotar_recarga(recarga)  # snapshot da recarga em segundo plano (se mais novo que o deste worker)
+    df = dados_pagina(RK_SHEET_NAME, {RK_COL_MES: filtro_mes, RK_COL_CONSULTOR: filtro_consultor})
+    if df is None:
         raise PreventUpdate
 
-    df.columns = [c.strip().lower() for c in df.columns]
-
-    # 🧩 Detecta e junta automaticamente as duas metades da planilha (consultor e consultor.1)
-    if "consultor.1" in df.columns:
-        metade1 = [c for c in df.columns if not c.endswith(".1")]
-        metade2 = [c for c in df.columns if c.endswith(".1")]
-
-        df1 = df[metade1].copy()
-        df2 = df[metade2].copy()
-        df2.columns = [c.replace(".1", "") for c in metade2]
-
-        df = pd.concat([df1, df2], ignore_index=True)
-
-    # Limpa e normaliza
-    df = df.fillna(0)
-    df["consultor"] = df["consultor"].astype(str).str.strip().str.title()
-    df["mes"] = df["mes"].astype(str).str.strip()
-
-    # Filtros
-    if filtro_mes:
-        df = df[df["mes"] == filtro_mes]
-    if filtro_consultor:
-        df = df[df["consultor"] == filtro_consultor]
-
     mes_opts = [{"label": m, "value": m} for m in sorted(df["mes"].unique())]
     cons_opts = [{"label": c, "value": c} for c in sorted(df["consultor"].unique())]
 
@@ -147,35 +122,37 @@ def atualizar_dashboard(n_clicks, n_timer, filtro_mes, filtro_consultor):
     df_ranking["_atingimento_contratos_mes"] *= 100
     df_ranking = df_ranking.sort_values(by="total_contratos", ascending=False)
 
-    # 🥇 Pódio
+    # 🥇 Pódio + 📊 Gráficos Detalhados: tarefas independentes, montadas em paralelo (render.py)
     podio = df_ranking.head(3)
-    fig_podio = go.Figure(data=[
-        go.Bar(
-            x=podio["consultor"],
-            y=podio["total_contratos"],
-            text=[f"{v:,.0f}" for v in podio["total_contratos"]],
-            textposition="outside",
-            marker=dict(color=["#FFD700", "#C0C0C0", "#CD7F32"])
-        )
-    ])
-    fig_podio.update_layout(
-        title="🏅 Top 3 Consultores",
-        template="plotly_dark",
-        xaxis_title="Consultor",
-        yaxis_title="Total de Contratos"
-    )
-
-    # 📊 Gráficos Detalhados
-    graf_contratos = px.bar(df_ranking, x="total_contratos", y="consultor", orientation="h",
-                            color="total_contratos", title="Ranking por Contratos", template="plotly_dark")
-    graf_conversao = px.bar(df_ranking, x="taxa_conversao_total", y="consultor", orientation="h",
-                            color="taxa_conversao_total", title="Ranking por Conversão (%)", template="plotly_dark")
-    graf_atingimento = px.bar(df_ranking, x="_atingimento_contratos_mes", y="consultor", orientation="h",
-                              color="_atingimento_contratos_mes", title="Ranking por Atingimento (%)", template="plotly_dark")
-    graf_reunioes = px.bar(df_ranking, x="total_reunioes_realizadas_mes", y="consultor", orientation="h",
-                           color="total_reunioes_realizadas_mes", title="Ranking por Reuniões", template="plotly_dark")
+    tarefas = {
+        "podio": (grafico_go, ([
+            ("Bar", dict(
+                x=podio["consultor"].tolist(),
+                y=podio["total_contratos"].tolist(),
+                text=[f"{v:,.0f}" for v in podio["total_contratos"]],
+                textposition="outside",
+                marker=dict(color=["#FFD700", "#C0C0C0", "#CD7F32"])
+            ))
+        ],), dict(layout=dict(
+            title="🏅 Top 3 Consultores",
+            template="plotly_dark",
+            xaxis_title="Consultor",
+            yaxis_title="Total de Contratos"
+        ))),
+    }
+    for nome, coluna, titulo in [
+        ("contratos", "total_contratos", "Ranking por Contratos"),
+        ("conversao", "taxa_conversao_total", "Ranking por Conversão (%)"),
+        ("atingimento", "_atingimento_contratos_mes", "Ranking por Atingimento (%)"),
+        ("reunioes", "total_reunioes_realizadas_mes", "Ranking por Reuniões"),
+    ]:
+        tarefas[nome] = (grafico_px, ("bar", df_ranking), dict(
+            x=coluna, y="consultor", orientation="h", color=coluna, title=titulo, template="plotly_dark"))
+
+    figuras = renderizar(tarefas)
+    fig_podio, graf_contratos, graf_conversao, graf_atingimento, graf_reunioes = (
+        figuras[nome] for nome in ("podio", "contratos", "conversao", "atingimento", "reunioes"))
 
     tabela = dbc.Table.from_dataframe(df_ranking, striped=True, bordered=True, hover=True, class_name="table-dark")
 
-    hora = pd.Timestamp.now().strftime("%H:%M:%S")
-    return mes_opts, cons_opts, kpis, fig_podio, graf_contratos, graf_conversao, graf_atingimento, graf_reunioes, tabela, f"🕒 Atualizado às {hora}"
+    return mes_opts, cons_opts, kpis, fig_podio, graf_contratos, graf_conversao, graf_atingimento, graf_reunioes, tabela, texto_status_atualizacao()
@@ -0,0 +1,72 @@
+# ==========================================================
+# 📦 ORÇAMENTO DE PAYLOAD DOS CALLBACKS
+# ==========================================================
+# Mede o tamanho (antes da compressão) de cada resposta de callback e, quando
+# passa do orçamento, registra no log a página e as saídas mais pesadas.
+# Útil para as TVs que acessam pela VPN, onde o tamanho domina a latência.
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+from flask import request
+
+PAYLOAD_ORCAMENTO_KB = int(os.environ.get("ROBO_PAYLOAD_ORCAMENTO_KB", "300"))
+PAYLOAD_SAIDAS_NO_LOG = 3
+
+_estatisticas = {}  # {saída do callback: {"chamadas", "bytes_total", "bytes_max", "excessos"}}
+_lock_estatisticas = threading.Lock()
+
+
+def tamanhos_por_saida(corpo):
+    """Resposta de /_dash-update-component -> {"id.prop": bytes}, do maior para o menor."""
+    resposta = json.loads(corpo).get("response", {})
+    tamanhos = {
+        f"{componente}.{prop}": len(json.dumps(valor, separators=(",", ":")))
+        for componente, props in resposta.items()
+        for prop, valor in props.items()
+    }
+    return dict(sorted(tamanhos.items(), key=lambda item: item[1], reverse=True))
+
+
+def _registrar(saida, tamanho, excedeu):
+    with _lock_estatisticas:
+        estat = _estatisticas.setdefault(saida, {"chamadas": 0, "bytes_total": 0, "bytes_max": 0, "excessos": 0})
+        estat["chamadas"] += 1
+        estat["bytes_total"] += tamanho
+        estat["bytes_max"] = max(estat["bytes_max"], tamanho)
+        estat["excessos"] += int(excedeu)
+
+
+def estatisticas_payload():
+    """Cópia das estatísticas por callback (chamadas, média, máximo, excessos)."""
+    with _lock_estatisticas:
+        return {
+            saida: {**estat, "bytes_medio": estat["bytes_total"] // max(estat["chamadas"], 1)}
+            for saida, estat in _estatisticas.items()
+        }
+
+
+def registrar_orcamento_payload(server):
+    """after_request que mede as respostas de callback; roda antes da compressão."""
+    limite = PAYLOAD_ORCAMENTO_KB * 1024
+
+    @server.after_request
+    def medir_payload(resposta):
+        if request.path != "/_dash-update-component" or resposta.status_code != 200 or resposta.direct_passthrough:
+            return resposta
+        tamanho = resposta.content_length or len(resposta.get_data())
+        saida = (request.get_json(silent=True) or {}).get("output", "?")
+        excedeu = limite > 0 and tamanho > limite
+        _registrar(saida, tamanho, excedeu)
+        if excedeu:
+            pagina = urlparse(request.referrer or "").path or "?"
+            try:
+                maiores = list(tamanhos_por_saida(resposta.get_data()).items())[:PAYLOAD_SAIDAS_NO_LOG]
+            except ValueError:
+                maiores = []
+            detalhes = ", ".join(f"{nome}={bytes_ // 1024}KB" for nome, bytes_ in maiores)
+            print(f"⚠️ Payload acima do orçamento em {pagina}: {tamanho // 1024}KB > {PAYLOAD_ORCAMENTO_KB}KB ({detalhes})")
+        return resposta
+
+    return medir_payload
@@ -0,0 +1,182 @@
+# ==========================================================
+# 🔬 PERFIL DOS CALLBACKS SOB DEMANDA (cProfile)
+# ==========================================================
+# Ligado por ROBO_PERFIL=1 (amostrado por ROBO_PERFIL_AMOSTRA) ou, numa única
+# requisição, pelo cabeçalho "X-Perfil: 1" junto do token admin. Cada chamada
+# perfilada de /_dash-update-component gera no disco:
+#   - <id>.prof    (pstats: snakeviz, `python -m pstats`)
+#   - <id>.folded  (pilhas colapsadas: flamegraph.pl, speedscope)
+# e entra na lista das chamadas recentes em GET /admin/perfis (mais lentas por página).
+# Só a thread do callback é medida; gráficos montados no pool (render.py) aparecem
+# como espera.
+import collections
+import cProfile
+import os
+import random
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+from flask import g, jsonify, request, send_from_directory
+
+from admin import exigir_admin, requisicao_admin
+
+PERFIL_ATIVO = os.environ.get("ROBO_PERFIL", "0") == "1"
+PERFIL_AMOSTRA = float(os.environ.get("ROBO_PERFIL_AMOSTRA", "1.0"))
+PERFIL_DIR = os.environ.get("ROBO_PERFIL_DIR", os.path.join(tempfile.gettempdir(), "robo_excel_perfis"))
+PERFIL_MAX_ARQUIVOS = int(os.environ.get("ROBO_PERFIL_MAX_ARQUIVOS", "200"))
+PERFIL_CABECALHO = "X-Perfil"
+PERFIL_MAIS_LENTAS = 10
+
+_recentes = collections.deque(maxlen=PERFIL_MAX_ARQUIVOS)
+_lock_recentes = threading.Lock()
+
+
+def _deve_perfilar():
+    if request.headers.get(PERFIL_CABECALHO) == "1" and requisicao_admin():
+        return True
+    return PERFIL_ATIVO and random.random() < PERFIL_AMOSTRA
+
+
+# ==========================================================
+# 🔥 PILHAS COLAPSADAS
+# ==========================================================
+def _nome_funcao(funcao):
+    arquivo, linha, nome = funcao
+    if arquivo == "~":  # builtins
+        return nome.strip("<>")
+    return f"{os.path.basename(arquivo)}:{nome}:{linha}"
+
+
+def pilhas_colapsadas(estatisticas, profundidade_max=64, minimo_segundos=1e-5):
+    """pstats.Stats -> {"a;b;c": microssegundos de tempo próprio}.
+
+    O cProfile só guarda arestas chamador -> chamado; as pilhas são reconstruídas
+    a partir das funções raiz, repartindo o tempo de cada função entre os
+    chamadores na proporção do tempo acumulado de cada aresta. Ramos abaixo de
+    `minimo_segundos` são podados (o número de caminhos cresce rápido).
+    """
+    stats = estatisticas.stats
+    chamados = collections.defaultdict(list)
+    for funcao, (_, _, _, _, chamadores) in stats.items():
+        for chamador, aresta in chamadores.items():
+            chamados[chamador].append((funcao, aresta[3]))
+    raizes = [f for f, (_, _, _, _, chamadores) in stats.items() if not chamadores]
+
+    pilhas = collections.Counter()
+
+    def descer(funcao, fracao, caminho, visitados):
+        _, _, proprio, acumulado, _ = stats[funcao]
+        if acumulado * fracao < minimo_segundos:
+            return
+        caminho = caminho + [_nome_funcao(funcao)]
+        if proprio * fracao > 0:
+            pilhas[";".join(caminho)] += int(proprio * fracao * 1e6)
+        if len(caminho) >= profundidade_max:
+            return
+        for chamado, acumulado_aresta in chamados.get(funcao, []):
+            if chamado in visitados or acumulado <= 0:
+                continue
+            total_chamado = stats[chamado][3] or 1e-12
+            descer(chamado, fracao * min(acumulado_aresta / total_chamado, 1.0), caminho, visitados | {chamado})
+
+    for raiz in raizes:
+        descer(raiz, 1.0, [], {raiz})
+    return {pilha: us for pilha, us in pilhas.items() if us > 0}
+
+
+# ==========================================================
+# 💾 GRAVAÇÃO E LISTAGEM
+# ==========================================================
+def _limpar_antigos():
+    arquivos = sorted(
+        (os.path.join(PERFIL_DIR, n) for n in os.listdir(PERFIL_DIR)),
+        key=os.path.getmtime,
+    )
+    for caminho in arquivos[:max(len(arquivos) - 2 * PERFIL_MAX_ARQUIVOS, 0)]:  # .prof + .folded
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+
+
+def salvar_perfil(perfilador, pagina, saida, duracao_ms):
+    import pstats
+
+    os.makedirs(PERFIL_DIR, exist_ok=True)
+    base = f"{time.strftime('%Y%m%d-%H%M%S')}_{os.getpid()}_{int(duracao_ms)}ms_{abs(hash(saida)) % 10**8}"
+    perfilador.dump_stats(os.path.join(PERFIL_DIR, base + ".prof"))
+    pilhas = pilhas_colapsadas(pstats.Stats(perfilador))
+    with open(os.path.join(PERFIL_DIR, base + ".folded"), "w", encoding="utf-8") as arquivo:
+        arquivo.writelines(f"{pilha} {us}\n" for pilha, us in sorted(pilhas.items()))
+    with _lock_recentes:
+        _recentes.append({
+            "pagina": pagina,
+            "saida": saida,
+            "duracao_ms": round(duracao_ms, 1),
+            "quando": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "prof": base + ".prof",
+            "folded": base + ".folded",
+        })
+    _limpar_antigos()
+
+
+def chamadas_mais_lentas(pagina=None, n=PERFIL_MAIS_LENTAS):
+    """{página: [chamadas perfiladas mais lentas]} entre as recentes deste processo."""
+    with _lock_recentes:
+        recentes = list(_recentes)
+    por_pagina = collections.defaultdict(list)
+    for chamada in recentes:
+        if pagina is None or chamada["pagina"] == pagina:
+            por_pagina[chamada["pagina"]].append(chamada)
+    return {p: sorted(c, key=lambda x: x["duracao_ms"], reverse=True)[:n] for p, c in por_pagina.items()}
+
+
+def registrar_perfil(server):
+    @server.before_request
+    def iniciar_perfil():
+        if request.path != "/_dash-update-component" or not _deve_perfilar():
+            return
+        g.perfilador = cProfile.Profile()
+        g.perfil_inicio = time.perf_counter()
+        g.perfilador.enable()
+
+    @server.after_request
+    def encerrar_perfil(resposta):
+        perfilador = g.pop("perfilador", None)
+        if perfilador is None:
+            return resposta
+        perfilador.disable()
+        duracao_ms = (time.perf_counter() - g.pop("perfil_inicio")) * 1000
+        pagina = urlparse(request.referrer or "").path or "?"
+        saida = (request.get_json(silent=True) or {}).get("output", "?")
+        try:
+            salvar_perfil(perfilador, pagina, saida, duracao_ms)
+        except Exception as e:
+            print(f"⚠️ Falha ao salvar perfil de {pagina}: {e}")
+        return resposta
+
+    @server.teardown_request
+    def descartar_perfil(_erro):
+        # Exceção no callback pula o after_request: não deixar o profiler ligado na thread
+        perfilador = g.pop("perfilador", None)
+        if perfilador is not None:
+            perfilador.disable()
+
+    @server.route("/admin/perfis")
+    def admin_perfis():
+        exigir_admin()
+        return jsonify(
+            ativo=PERFIL_ATIVO,
+            amostra=PERFIL_AMOSTRA,
+            diretorio=PERFIL_DIR,
+            mais_lentas=chamadas_mais_lentas(request.args.get("pagina")),
+        )
+
+    @server.route("/admin/perfis/<path:arquivo>")
+    def admin_perfil_arquivo(arquivo):
+        exigir_admin()
+        return send_from_directory(PERFIL_DIR, arquivo, as_attachment=True)
+
+    return admin_perfis
@@ -0,0 +1,65 @@
+"""
+Relatório de tempo de importação do app.
+
+Uso:
+    python relatorio_importacao.py            # top 25 módulos por tempo acumulado
+    python relatorio_importacao.py --top 50
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+
+def medir_importacao(modulo="app"):
+    """Roda `python -X importtime -c "import <modulo>"` num processo limpo e devolve (linhas, segundos)."""
+    inicio = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        capture_output=True, text=True,
+    )
+    total = time.perf_counter() - inicio
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "falha ao importar")
+
+    linhas = []
+    for linha in proc.stderr.splitlines():
+        if not linha.startswith("import time:") or "|" not in linha:
+            continue
+        partes = linha[len("import time:"):].split("|")
+        try:
+            proprio, acumulado = int(partes[0]), int(partes[1])
+        except ValueError:
+            continue  # cabeçalho
+        nome = partes[2].rstrip()
+        linhas.append({"modulo": nome.strip(), "nivel": (len(nome) - len(nome.lstrip())) // 2,
+                       "proprio_ms": proprio / 1000, "acumulado_ms": acumulado / 1000})
+    return linhas, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de importação do app (boot dos workers).")
+    parser.add_argument("--modulo", default="app")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    linhas, total = medir_importacao(args.modulo)
+    print(f"⏱️ Boot de '{args.modulo}': {total:.2f}s (processo completo)\n")
+
+    print(f"{'acumulado':>10} {'próprio':>9}  módulo")
+    for l in sorted(linhas, key=lambda l: l["acumulado_ms"], reverse=True)[:args.top]:
+        print(f"{l['acumulado_ms']:>8.1f}ms {l['proprio_ms']:>7.1f}ms  {'  ' * l['nivel']}{l['modulo']}")
+
+    # O Dash executa os módulos de pages/ via importlib (fora do importtime),
+    # então o custo das páginas aparece no tempo "próprio" do app.
+    app = next((l for l in linhas if l["modulo"] == args.modulo), None)
+    if app:
+        print(f"\n📄 Páginas + layout do app: {app['proprio_ms']:.1f}ms")
+
+    pesados = [m for m in ("pandas", "plotly.express", "unidecode") if any(l["modulo"] == m for l in linhas)]
+    if pesados:
+        print(f"\n⚠️ Importados no boot (deveriam ser adiados): {', '.join(pesados)}")
+
+
+if __name__ == "__main__":
+    main()
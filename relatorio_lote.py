@@ -0,0 +1,240 @@
+"""
+Relatório estático (HTML) de todas as páginas, em lote, sem subir o servidor.
+
+Carrega UM snapshot e executa os callbacks de cada página (como o navegador
+faria, via test client do Flask, igual ao aquecimento) para a visão padrão e
+para cada valor dos filtros pedidos (um filtro por vez). Figuras e tabelas de
+cada combinação viram um trecho HTML num pool de processos; cada página sai num
+arquivo autocontido (plotly.js embutido uma vez, sem CDN), mais um index.html
+com os tempos.
+
+Uso:
+    python relatorio_lote.py                                  # filtros mes e area, saída em relatorios/<data>
+    python relatorio_lote.py --filtro mes --filtro pasta --saida /tmp/rel
+    python relatorio_lote.py --pagina /ranking --max-valores 3 --workbook comercial
+    python relatorio_lote.py --planilha dados.xlsx            # outra planilha (arquivo ou URL)
+
+Os filtros casam com os dropdowns `<prefixo>_filtro_<nome>` das páginas
+(`area` = cp_filtro_area, a área da pasta no controle de processos).
+"""
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+
+FILTROS_PADRAO = ["mes", "area"]
+PROPS_IGNORADAS = {"options", "data", "value", "search_value"}  # saídas que não vão para o relatório
+
+CSS = """
+body { background: #222; color: #ddd; font-family: system-ui, sans-serif; margin: 24px; }
+h1, h2, h3, h4, h5, h6 { color: #f0ad4e; } .text-muted, .text-secondary { color: #999; }
+.text-success { color: #00bc8c; } .text-info { color: #3498db; } .text-warning { color: #f39c12; }
+.text-danger { color: #e74c3c; } .text-primary { color: #375a7f; } .text-center { text-align: center; }
+.row { display: flex; flex-wrap: wrap; gap: 12px; margin-bottom: 12px; } .row > div { flex: 1 1 0; min-width: 220px; }
+.card { background: #303030; border-radius: 12px; padding: 12px; }
+table { border-collapse: collapse; width: 100%; font-size: 13px; margin: 8px 0 16px; }
+th, td { border: 1px solid #444; padding: 4px 8px; } tr:nth-child(even) { background: #2c2c2c; }
+section { border-top: 1px solid #444; margin-top: 32px; padding-top: 8px; }
+.tempo { color: #888; font-size: 12px; }
+"""
+
+TAGS_VAZIAS = {"br", "hr", "img", "input"}
+TAGS_DBC = {"Table": "table", "Row": "div", "Col": "div", "Card": "div", "CardBody": "div"}
+CLASSES_DBC = {"Row": "row", "Card": "card", "CardBody": "card-body"}
+_RE_MAIUSCULA = re.compile(r"[A-Z]")
+
+
+# ==========================================================
+# 🧱 COMPONENTES DASH (JSON) -> HTML
+# ==========================================================
+def _estilo(estilo):
+    """{"marginLeft": "15px"} -> "margin-left: 15px"."""
+    return "; ".join(f"{_RE_MAIUSCULA.sub(lambda m: '-' + m.group().lower(), k)}: {v}" for k, v in (estilo or {}).items())
+
+
+def componente_html(no):
+    """Árvore de componentes serializada (como sai do callback) -> HTML estático."""
+    if no is None or isinstance(no, bool):
+        return ""
+    if isinstance(no, (list, tuple)):
+        return "".join(componente_html(filho) for filho in no)
+    if not isinstance(no, dict) or "type" not in no:
+        return html.escape(str(no))
+
+    tipo, props = no["type"], no.get("props") or {}
+    if tipo == "Graph":
+        return figura_html(props.get("figure"))
+    if no.get("namespace") == "dash_html_components":
+        tag = tipo.lower()
+    else:
+        tag = TAGS_DBC.get(tipo, "div")
+    classes = " ".join(c for c in (CLASSES_DBC.get(tipo), props.get("className"), props.get("class_name")) if c)
+    atributos = f' class="{html.escape(classes)}"' if classes else ""
+    if props.get("style"):
+        atributos += f' style="{html.escape(_estilo(props["style"]))}"'
+    if tag in TAGS_VAZIAS:
+        return f"<{tag}{atributos}>"
+    return f"<{tag}{atributos}>{componente_html(props.get('children'))}</{tag}>"
+
+
+def figura_html(figura):
+    import plotly.io as pio
+
+    if not figura or not figura.get("data"):
+        return ""
+    return pio.to_html(figura, include_plotlyjs=False, full_html=False, validate=False, config={"displaylogo": False})
+
+
+def renderizar_secao(titulo, saidas):
+    """(Processo do pool) {id: {prop: valor}} de uma combinação de filtros -> (<section> HTML, ms)."""
+    inicio = time.perf_counter()
+    partes = [f"<section><h2>{html.escape(titulo)}</h2>"]
+    for id_, props in saidas.items():
+        for prop, valor in props.items():
+            if prop in PROPS_IGNORADAS:
+                continue
+            partes.append(figura_html(valor) if prop == "figure" else f'<div id="{html.escape(id_)}">{componente_html(valor)}</div>')
+    partes.append("</section>")
+    return "".join(partes), (time.perf_counter() - inicio) * 1000
+
+
+# ==========================================================
+# 🧭 EXECUÇÃO DOS CALLBACKS DE CADA PÁGINA
+# ==========================================================
+def executar_callbacks(cliente, callbacks, valores):
+    """Roda os callbacks da página com `valores`; devolve ({id: {prop: valor}}, ms, status com erro)."""
+    from aquecimento import _payload
+
+    saidas, erros = {}, []
+    inicio = time.perf_counter()
+    for dep in callbacks:
+        resposta = cliente.post("/_dash-update-component", json=_payload(dep, valores))
+        if resposta.status_code == 200:
+            for id_, props in (resposta.get_json() or {}).get("response", {}).items():
+                saidas.setdefault(id_, {}).update(props)
+        elif resposta.status_code != 204:  # 204 = PreventUpdate (ex.: zoom sem relayoutData)
+            erros.append(resposta.status_code)
+    return saidas, (time.perf_counter() - inicio) * 1000, erros
+
+
+def combinacoes(componentes, saidas_padrao, filtros, max_valores):
+    """[(titulo, {(id, "value"): valor})]: visão padrão + cada valor de cada filtro pedido presente na página."""
+    lista = [("Visão geral (sem filtros)", {})]
+    for filtro in filtros:
+        for id_ in sorted(i for i in componentes if str(i).endswith(f"_filtro_{filtro}")):
+            opcoes = [o for o in saidas_padrao.get(id_, {}).get("options") or getattr(componentes[id_], "options", None) or []
+                      if isinstance(o, dict)]
+            for opcao in opcoes[:max_valores or None]:
+                lista.append((f"{filtro} = {opcao.get('label', opcao['value'])}", {(id_, "value"): opcao["value"]}))
+    return lista
+
+
+def _nome_arquivo(caminho):
+    return (caminho.strip("/") or "inicio").replace("/", "_") + ".html"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório HTML estático de todas as páginas, por filtro.")
+    parser.add_argument("--filtro", action="append", help=f"nome do filtro (repetível; padrão: {', '.join(FILTROS_PADRAO)})")
+    parser.add_argument("--pagina", action="append", help="caminho da página (repetível; padrão: todas)")
+    parser.add_argument("--max-valores", type=int, default=0, help="limite de valores por filtro (0 = todos)")
+    parser.add_argument("--saida", default=os.path.join("relatorios", time.strftime("%Y-%m-%d")))
+    parser.add_argument("--processos", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--workbook", help="id do workbook (ROBO_WORKBOOKS); padrão: o inicial")
+    parser.add_argument("--planilha", help="arquivo ou URL da planilha, no lugar da configurada")
+    args = parser.parse_args()
+    filtros = args.filtro or FILTROS_PADRAO
+
+    # Um snapshot para o relatório inteiro: sem aquecimento nem revalidação no meio do lote
+    os.environ.setdefault("ROBO_AQUECIMENTO", "0")
+    os.environ.setdefault("ROBO_SEGUNDO_PLANO", "0")  # visões pesadas como callbacks comuns, respondidos na hora
+    os.environ["ROBO_CACHE_TTL"] = str(10 ** 9)
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    import dash
+    import plotly.offline
+
+    import utils
+    from aquecimento import _callbacks_da_pagina, _componentes
+    if args.planilha:
+        utils.SHEETS_URL = args.planilha
+    from app import app
+
+    os.makedirs(args.saida, exist_ok=True)
+    with utils.usando_workbook(args.workbook or utils.WORKBOOK_INICIAL), \
+            ProcessPoolExecutor(max_workers=args.processos, mp_context=multiprocessing.get_context("spawn")) as pool:
+        inicio_total = time.perf_counter()
+        snapshot = utils.obter_snapshot()
+        if not snapshot["abas"]:
+            sys.exit(f"❌ Snapshot indisponível: {snapshot['ultimo_erro']}")
+        info = utils.info_snapshot()
+        print(f"📦 Snapshot v{info['versao']} ({info['workbook']}) em {(time.perf_counter() - inicio_total):.1f}s")
+
+        cliente = app.server.test_client()
+        dependencias = cliente.get("/_dash-dependencies").get_json()
+        ids_globais = set(_componentes(app.layout))
+
+        paginas = []
+        for pagina in dash.page_registry.values():
+            if args.pagina and pagina["path"] not in args.pagina:
+                continue
+            componentes = _componentes(pagina["layout"])
+            callbacks = _callbacks_da_pagina(dependencias, set(componentes), ids_globais)
+            valores = {(e["id"], e["property"]): getattr(componentes.get(e["id"]), e["property"], None)
+                       for dep in callbacks for e in dep["inputs"] + dep.get("state", [])}
+
+            # Cálculo aqui (snapshot em memória); HTML no pool, enquanto a próxima combinação calcula
+            inicio = time.perf_counter()
+            saidas, _, erros = executar_callbacks(cliente, callbacks, valores)
+            secoes = []
+            for n, (titulo, extras) in enumerate(combinacoes(componentes, saidas, filtros, args.max_valores)):
+                if n:
+                    saidas, _, novos_erros = executar_callbacks(cliente, callbacks, {**valores, **extras})
+                    erros += novos_erros
+                secoes.append(pool.submit(renderizar_secao, titulo, saidas))
+            calculo_ms = (time.perf_counter() - inicio) * 1000
+            paginas.append({"pagina": pagina, "secoes": secoes, "calculo_ms": calculo_ms, "erros": erros})
+
+        plotlyjs = plotly.offline.get_plotlyjs()
+        resumo = []
+        for item in paginas:
+            pagina = item["pagina"]
+            resultados = [futuro.result() for futuro in item["secoes"]]
+            render_ms = sum(ms for _, ms in resultados)
+            corpo = "".join(trecho for trecho, _ in resultados)
+            arquivo = _nome_arquivo(pagina["path"])
+            with open(os.path.join(args.saida, arquivo), "w", encoding="utf-8") as saida:
+                saida.write(
+                    f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(pagina['name'])}</title>"
+                    f"<style>{CSS}</style><script>{plotlyjs}</script></head><body>"
+                    f"<h1>{html.escape(pagina['name'])}</h1>"
+                    f"<p class='tempo'>Snapshot v{info['versao']} ({info['workbook']}) · gerado em {time.strftime('%d/%m/%Y %H:%M')}</p>"
+                    f"{corpo}</body></html>"
+                )
+            resumo.append({"pagina": pagina["name"], "arquivo": arquivo, "combinacoes": len(resultados),
+                           "calculo_ms": round(item["calculo_ms"]), "render_ms": round(render_ms),
+                           "erros": item["erros"]})
+            print(f"📄 {pagina['name']}: {len(resultados)} combinação(ões) | cálculo {item['calculo_ms']:.0f}ms | "
+                  f"render {render_ms:.0f}ms (soma no pool) | {arquivo}" + (f" | ⚠️ status {item['erros']}" if item["erros"] else ""))
+
+        linhas = "".join(
+            f"<tr><td><a href='{r['arquivo']}'>{html.escape(r['pagina'])}</a></td><td>{r['combinacoes']}</td>"
+            f"<td>{r['calculo_ms']}</td><td>{r['render_ms']}</td></tr>" for r in resumo)
+        with open(os.path.join(args.saida, "index.html"), "w", encoding="utf-8") as saida:
+            saida.write(
+                f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Relatório</title><style>{CSS}</style></head><body>"
+                f"<h1>📊 Relatório das páginas</h1><p class='tempo'>Snapshot v{info['versao']} ({info['workbook']})</p>"
+                f"<table><tr><th>Página</th><th>Combinações</th><th>Cálculo (ms)</th><th>Render (ms)</th></tr>{linhas}</table>"
+                f"</body></html>"
+            )
+        with open(os.path.join(args.saida, "tempos.json"), "w", encoding="utf-8") as saida:
+            json.dump({"snapshot": info, "paginas": resumo}, saida, ensure_ascii=False, indent=2)
+    print(f"✅ Relatório em {args.saida} ({time.perf_counter() - inicio_total:.1f}s no total)")
+
+
+if __name__ == "__main__":
+    main()
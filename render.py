@@ -0,0 +1,90 @@
+# ==========================================================
+# 🎨 RENDERIZAÇÃO PARALELA DE GRÁFICOS
+# ==========================================================
+# Os gráficos de um callback são independentes entre si: cada um vira uma
+# tarefa (construtor, argumentos) executada num pool limitado, e o callback
+# espera só pelo mais lento. Os construtores ficam aqui, no nível do módulo e
+# sem depender do Dash, para também rodarem em processos (ROBO_RENDER_PROCESSOS=1)
+# quando montar as figuras pesar na CPU. Cada tarefa devolve a figura já
+# serializada em JSON, que é o que atravessa a fronteira do processo.
+import json
+import os
+import threading
+
+RENDER_WORKERS = int(os.environ.get("ROBO_RENDER_WORKERS", "4"))
+RENDER_PROCESSOS = os.environ.get("ROBO_RENDER_PROCESSOS", "0") == "1"
+
+_executor = None
+_lock_executor = threading.Lock()
+
+
+def _descartar_executor():
+    """Processo filho (fork de callback em segundo plano): as threads do pool não vieram junto, o próximo uso cria outro."""
+    global _executor, _lock_executor
+    _executor = None
+    _lock_executor = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_descartar_executor)
+
+
+def _obter_executor():
+    """Pool criado no primeiro uso (depois do fork dos workers do gunicorn)."""
+    global _executor
+    with _lock_executor:
+        if _executor is None:
+            if RENDER_PROCESSOS:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+
+                _executor = ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+
+                _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+        return _executor
+
+
+# ==========================================================
+# 🧱 CONSTRUTORES (FUNÇÕES PURAS -> JSON)
+# ==========================================================
+def grafico_px(tipo, df, layout=None, **kwargs):
+    """plotly.express.<tipo>(df, **kwargs) + update_layout(**layout), serializado."""
+    import plotly.express as px
+
+    fig = getattr(px, tipo)(df, **kwargs)
+    if layout:
+        fig.update_layout(**layout)
+    return fig.to_json()
+
+
+def grafico_go(tracos, layout=None):
+    """Figura graph_objects a partir de [(tipo_do_traço, kwargs)], serializada."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[getattr(go, tipo)(**kwargs) for tipo, kwargs in tracos])
+    if layout:
+        fig.update_layout(**layout)
+    return fig.to_json()
+
+
+# ==========================================================
+# 🚀 EXECUÇÃO
+# ==========================================================
+def renderizar(tarefas):
+    """{nome: (construtor, args, kwargs)} -> {nome: figura (dict)}, em paralelo.
+
+    Um gráfico que falha vira {} (gráfico vazio) sem derrubar os demais.
+    """
+    if not tarefas:
+        return {}
+    executor = _obter_executor()
+    futuros = {nome: executor.submit(funcao, *args, **kwargs) for nome, (funcao, args, kwargs) in tarefas.items()}
+    figuras = {}
+    for nome, futuro in futuros.items():
+        try:
+            figuras[nome] = json.loads(futuro.result())
+        except Exception as e:
+            print(f"⚠️ Falha ao renderizar o gráfico '{nome}': {e}")
+            figuras[nome] = {}
+    return figuras
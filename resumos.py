@@ -0,0 +1,80 @@
+# ==========================================================
+# 📑 ABAS DE RESUMO DA PLANILHA (CAMINHO RÁPIDO SEM FILTROS)
+# ==========================================================
+# As abas de resumo são mantidas pelos donos da planilha. Cada número é
+# conferido uma vez por snapshot contra as linhas de "controle de processos";
+# só os que batem são usados pela página quando nenhum filtro está ativo.
+from utils import (
+    aba_limpa, derivado, CP_SHEET_NAME, CP_COL_AREA, CP_COL_STATUS, CP_COL_UF, CP_COL_DISTRIBUIDO
+)
+
+ABA_RESUMO_METRICAS = "Resumo de Métricas"
+# "Tabela dinâmica 2" não tem layout fixo (hoje vem vazia), por isso não entra aqui.
+ABAS_CONTAGEM = {
+    CP_COL_AREA: "Por Área",
+    CP_COL_STATUS: "Status Final",
+    CP_COL_UF: "Por UF",
+}
+VALORES_DISTRIBUIDO = ["SIM", "CASO_ASTREA"]
+
+KPI_TOTAL = "Total de Registros"
+KPI_DISTRIBUIDOS = "Total Distribuídos"
+KPI_NAO_DISTRIBUIDOS = "Total Não Distribuídos"
+
+
+def _ler_aba_contagem(df):
+    """Aba de 2 colunas (rótulo, quantidade) -> {rótulo: quantidade}."""
+    if df is None or df.empty or len(df.columns) < 2:
+        return None
+    rotulos = df.iloc[:, 0].astype(str).str.strip()
+    return dict(zip(rotulos, df.iloc[:, 1]))
+
+
+def construir_resumos(abas):
+    """{"kpis": {nome: valor}, "contagens": {coluna: DataFrame(index, Quantidade)}} só com o que bate com as linhas."""
+    import pandas as pd
+
+    resultado = {"kpis": {}, "contagens": {}, "divergencias": []}
+    linhas = aba_limpa(CP_SHEET_NAME)
+    if linhas is None or linhas.empty:
+        return resultado
+
+    total = len(linhas)
+    distribuidos = int(linhas[CP_COL_DISTRIBUIDO].isin(VALORES_DISTRIBUIDO).sum()) if CP_COL_DISTRIBUIDO in linhas.columns else None
+    calculado = {
+        KPI_TOTAL: total,
+        KPI_DISTRIBUIDOS: distribuidos,
+        KPI_NAO_DISTRIBUIDOS: total - distribuidos if distribuidos is not None else None,
+    }
+    resumo = _ler_aba_contagem(abas.get(ABA_RESUMO_METRICAS)) or {}
+    for nome, valor_linhas in calculado.items():
+        valor_aba = pd.to_numeric(resumo.get(nome), errors="coerce")
+        if valor_linhas is not None and pd.notna(valor_aba) and int(round(valor_aba)) == valor_linhas:
+            resultado["kpis"][nome] = valor_linhas
+        elif nome in resumo:
+            resultado["divergencias"].append(f"{nome}: aba={resumo[nome]} linhas={valor_linhas}")
+
+    for col, aba in ABAS_CONTAGEM.items():
+        contagem_aba = _ler_aba_contagem(abas.get(aba))
+        if contagem_aba is None or col not in linhas.columns:
+            continue
+        serie = linhas.loc[linhas[col] != "", col].value_counts()
+        quantidades = pd.to_numeric(pd.Series(list(contagem_aba.values()), dtype=object), errors="coerce")
+        if quantidades.isna().any():
+            # Célula vazia ou não numérica: a aba não serve de atalho, a página calcula pelas linhas
+            resultado["divergencias"].append(f"{aba}: quantidade vazia ou não numérica")
+            continue
+        contagem_aba = dict(zip(contagem_aba, quantidades.round().astype(int).tolist()))
+        if contagem_aba == serie.to_dict():
+            tabela = pd.DataFrame({"index": list(contagem_aba), "Quantidade": list(contagem_aba.values())})
+            resultado["contagens"][col] = tabela.sort_values("Quantidade", ascending=False, ignore_index=True)
+        else:
+            resultado["divergencias"].append(f"{aba}: difere das linhas de '{CP_SHEET_NAME}'")
+
+    if resultado["divergencias"]:
+        print(f"⚠️ Abas de resumo divergentes (usando cálculo por linha): {'; '.join(resultado['divergencias'])}")
+    return resultado
+
+
+def resumos_controle():
+    return derivado("resumos_controle", construir_resumos)
@@ -0,0 +1,79 @@
+# ==========================================================
+# 📦 ROLLUPS DE PRODUÇÃO (DIA / SEMANA ISO / MÊS POR CONSULTOR)
+# ==========================================================
+# Construídos uma vez por snapshot; a página só filtra e soma poucas linhas.
+from utils import (
+    aba_limpa, derivado, PD_SHEET_NAME, PD_COL_CONSULTOR, PD_COL_DATA, PD_COL_LIGACOES, PD_COL_COTACAO,
+    PD_COL_NOTA_LIGACOES, PD_COL_NOTA_COTACAO, PD_STATUS_ATINGIDA, PD_STATUS_NAO_ATINGIDA, PD_STATUS_PARCIAL,
+    SUFIXO_ANO_MES, SUFIXO_SEMANA, SUFIXO_DIA
+)
+
+PD_COL_ANO_MES = PD_COL_DATA + SUFIXO_ANO_MES
+
+GRANULARIDADES = {
+    "dia": PD_COL_DATA + SUFIXO_DIA,
+    "semana": PD_COL_DATA + SUFIXO_SEMANA,
+    "mes": PD_COL_ANO_MES,
+}
+ROTULOS_GRANULARIDADE = {"dia": "Diária", "semana": "Semanal", "mes": "Mensal"}
+STATUS_PRODUCAO = [PD_STATUS_ATINGIDA, PD_STATUS_NAO_ATINGIDA, PD_STATUS_PARCIAL]
+
+
+def _inicio_periodo(datas, granularidade):
+    import pandas as pd
+
+    if granularidade == "dia":
+        return datas.dt.normalize()
+    if granularidade == "semana":
+        return datas.dt.normalize() - pd.to_timedelta(datas.dt.weekday, unit="D")
+    return datas.dt.to_period("M").dt.start_time
+
+
+def construir_rollups_producao(abas):
+    """{granularidade: DataFrame} com somas de ligações/cotações e contagem de status por consultor e período.
+
+    Toda granularidade também é chaveada por ano-mês (semanas que cruzam a virada
+    do mês viram duas linhas), para o filtro de mês continuar exato.
+    """
+    import pandas as pd
+
+    df = aba_limpa(PD_SHEET_NAME)
+    if df is None or PD_COL_DATA not in df.columns:
+        return {}
+    df = df.dropna(subset=[PD_COL_DATA])
+
+    medidas = {}
+    for col in [PD_COL_LIGACOES, PD_COL_COTACAO]:
+        if col in df.columns:
+            medidas[col] = df[col]
+    for col in [PD_COL_NOTA_LIGACOES, PD_COL_NOTA_COTACAO]:
+        if col in df.columns:
+            for status in STATUS_PRODUCAO:
+                medidas[f"{col}_{status}"] = (df[col] == status).astype("int32")
+    base = pd.DataFrame(medidas)
+    base["registros"] = 1
+
+    rollups = {}
+    for granularidade, chave in GRANULARIDADES.items():
+        chaves = [df[PD_COL_CONSULTOR], df[PD_COL_ANO_MES]] if chave == PD_COL_ANO_MES else [df[PD_COL_CONSULTOR], df[PD_COL_ANO_MES], df[chave]]
+        tabela = base.assign(periodo=_inicio_periodo(df[PD_COL_DATA], granularidade)).groupby(chaves).agg(
+            {**{c: "sum" for c in base.columns}, "periodo": "first"}
+        ).reset_index()
+        rollups[granularidade] = tabela.sort_values("periodo", ignore_index=True)
+    return rollups
+
+
+def rollups_producao():
+    return derivado("rollups_producao", construir_rollups_producao)
+
+
+def serie_producao(granularidade, consultores=None, ano_mes=None):
+    """Série temporal (período x ligações/cotações) servida a partir do rollup."""
+    tabela = rollups_producao().get(granularidade)
+    if tabela is None:
+        return None
+    if consultores:
+        tabela = tabela[tabela[PD_COL_CONSULTOR].isin(consultores)]
+    if ano_mes:
+        tabela = tabela[tabela[PD_COL_ANO_MES] == ano_mes]
+    return tabela.groupby("periodo")[[PD_COL_LIGACOES, PD_COL_COTACAO]].sum().reset_index()
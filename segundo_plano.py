@@ -0,0 +1,208 @@
+# ==========================================================
+# ⏳ CALLBACKS EM SEGUNDO PLANO (RECARGA E VISÕES PESADAS)
+# ==========================================================
+# O "🔄 Atualizar Dados" baixava e lia a planilha inteira dentro da requisição,
+# segurando a thread do worker do gunicorn (e arriscando o timeout). Agora a
+# recarga e as visões mais pesadas (tabela completa de produção, composição
+# das mudanças entre abas) são callbacks em segundo plano do Dash: o
+# DiskcacheManager roda a função num processo filho (fork do worker, com o
+# snapshot herdado) e guarda progresso e resultado em disco, num diretório
+# compartilhado pelos workers; o navegador acompanha por polling, com barra de
+# progresso e botão de cancelar (que encerra o processo filho).
+#
+# Recarga: o filho baixa e lê a planilha e grava as abas num arquivo
+# (ROBO_SEGUNDO_PLANO_DIR/recargas); o callback devolve só o nome dele num
+# dcc.Store. O callback da página, no worker que atender, adota esse snapshot
+# (utils.adotar_snapshot, que roda os pós-processamentos de sempre) se for mais
+# novo que o seu.
+#
+# ROBO_SEGUNDO_PLANO=0 (ou sem diskcache instalado) volta aos callbacks comuns,
+# na própria requisição (o aquecimento e o relatório em lote usam esse modo).
+import functools
+import os
+import pickle
+import re
+import tempfile
+import time
+import uuid
+
+import dash
+from dash import Input, Output, dcc, html
+import dash_bootstrap_components as dbc
+
+import utils
+
+SEGUNDO_PLANO = os.environ.get("ROBO_SEGUNDO_PLANO", "1") == "1"
+SEGUNDO_PLANO_DIR = os.environ.get("ROBO_SEGUNDO_PLANO_DIR", os.path.join(tempfile.gettempdir(), "robo_segundo_plano"))
+SEGUNDO_PLANO_EXPIRA = 3600  # segundos: resultados no cache e arquivos de recarga
+RECARGAS_MANTIDAS = 3  # por workbook
+LINHAS_POR_PARTE = 250  # tabelas grandes: progresso a cada N linhas
+
+OCULTO = {"display": "none"}
+ESTILO_BARRA = {"maxWidth": "480px", "margin": "8px auto 0"}
+_RE_ARQUIVO_RECARGA = re.compile(r"^[\w-]+\.pkl$")
+
+_gerenciador = {"instancia": None, "iniciado": False}
+
+
+def gerenciador():
+    """DiskcacheManager compartilhado pelos workers (mesmo diretório); None se desligado ou sem diskcache."""
+    if not _gerenciador["iniciado"]:
+        _gerenciador["iniciado"] = True
+        if SEGUNDO_PLANO:
+            try:
+                import diskcache
+                from dash import DiskcacheManager
+
+                cache = diskcache.Cache(os.path.join(SEGUNDO_PLANO_DIR, "cache"))
+                # Chave única por chamada (com o workbook): duas pessoas na mesma página, ou em
+                # workbooks diferentes, nunca recebem o resultado uma da outra
+                _gerenciador["instancia"] = DiskcacheManager(
+                    cache, cache_by=[lambda: f"{utils.workbook_atual()}:{uuid.uuid4().hex}"], expire=SEGUNDO_PLANO_EXPIRA)
+            except ImportError as e:
+                print(f"⚠️ Callbacks em segundo plano desligados ({e}): rodando na própria requisição")
+    return _gerenciador["instancia"]
+
+
+def _sem_progresso(*_):
+    pass
+
+
+def callback_segundo_plano(*args, progresso=None, cancelar=None, executando=None, **kwargs):
+    """dash.callback rodando em processo separado, com progresso e cancelamento.
+
+    A função recebe `set_progress` como primeiro argumento. Sem o gerenciador vira um
+    callback comum e `set_progress` não faz nada.
+    """
+    def decorador(funcao):
+        manager = gerenciador()
+        if manager is None:
+            @functools.wraps(funcao)
+            def na_requisicao(*valores):
+                return funcao(_sem_progresso, *valores)
+
+            return dash.callback(*args, running=executando, **kwargs)(na_requisicao)
+        return dash.callback(*args, background=True, manager=manager, progress=progresso, cancel=cancelar,
+                             running=executando, **kwargs)(funcao)
+
+    return decorador
+
+
+# ==========================================================
+# 📊 PROGRESSO E CANCELAMENTO (COMPONENTES)
+# ==========================================================
+def indicador_progresso(id_base):
+    """Barra de progresso + botão de cancelar, ocultos até o callback começar."""
+    return html.Div([
+        dbc.Progress(id=f"{id_base}_progresso", value=0, label="", striped=True, animated=True, style={**ESTILO_BARRA, **OCULTO}),
+        dbc.Button("✖ Cancelar", id=f"{id_base}_cancelar", n_clicks=0, size="sm", color="secondary", outline=True,
+                   className="mt-2", style=OCULTO),
+    ], className="text-center")
+
+
+def opcoes_progresso(id_base, executando=()):
+    """kwargs de callback_segundo_plano ligados ao indicador_progresso(id_base)."""
+    return dict(
+        progresso=[Output(f"{id_base}_progresso", "value"), Output(f"{id_base}_progresso", "label")],
+        cancelar=[Input(f"{id_base}_cancelar", "n_clicks")],
+        executando=[
+            (Output(f"{id_base}_progresso", "style"), ESTILO_BARRA, {**ESTILO_BARRA, **OCULTO}),
+            (Output(f"{id_base}_cancelar", "style"), {}, OCULTO),
+            *executando,
+        ],
+    )
+
+
+def tabela_em_partes(df, set_progress, inicio=0, fim=100, **kwargs):
+    """dbc.Table do DataFrame montada em partes, avançando a barra de `inicio` a `fim` (%)."""
+    cabecalho = html.Thead(html.Tr([html.Th(str(c)) for c in df.columns]))
+    linhas = []
+    valores = df.itertuples(index=False, name=None)
+    total = max(len(df), 1)
+    for i, linha in enumerate(valores, start=1):
+        linhas.append(html.Tr([html.Td(v) for v in linha]))
+        if i % LINHAS_POR_PARTE == 0:
+            set_progress((inicio + (fim - inicio) * i // total, f"Montando tabela ({i:,}/{len(df):,})"))
+    return dbc.Table([cabecalho, html.Tbody(linhas)], **kwargs)
+
+
+# ==========================================================
+# 🔄 RECARGA DA PLANILHA
+# ==========================================================
+def _pasta_recargas():
+    pasta = os.path.join(SEGUNDO_PLANO_DIR, "recargas")
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+def _podar_recargas(pasta, workbook):
+    arquivos = sorted((n for n in os.listdir(pasta) if n.startswith(f"{workbook}_")), reverse=True)
+    limite = time.time() - SEGUNDO_PLANO_EXPIRA
+    for i, nome in enumerate(arquivos):
+        caminho = os.path.join(pasta, nome)
+        if i >= RECARGAS_MANTIDAS or os.path.getmtime(caminho) < limite:
+            os.remove(caminho)
+
+
+def baixar_recarga(set_progress):
+    """(Processo filho) Baixa e lê a planilha do workbook atual; devolve (dados do Store, mensagem de erro)."""
+    workbook = utils.workbook_atual()
+    set_progress((5, "Baixando planilha..."))
+
+    def progresso(feitas, total, aba):
+        set_progress((10 + 85 * feitas // max(total, 1), f"Lendo abas ({feitas}/{total})" + (f": {aba}" if aba else "")))
+
+    try:
+        abas = utils._baixar_planilha(utils.url_workbook(workbook), progresso)
+    except Exception as e:
+        print(f"❌ [{workbook}] Falha na recarga em segundo plano: {e}")
+        return dash.no_update, f"❌ Falha ao recarregar: {e}"
+
+    set_progress((97, "Publicando..."))
+    pasta = _pasta_recargas()
+    carregado_em = time.time()
+    nome = f"{workbook}_{int(carregado_em * 1000)}_{os.getpid()}.pkl"
+    with open(os.path.join(pasta, nome + ".tmp"), "wb") as arquivo:
+        pickle.dump({"workbook": workbook, "carregado_em": carregado_em, "abas": abas}, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(os.path.join(pasta, nome + ".tmp"), os.path.join(pasta, nome))
+    _podar_recargas(pasta, workbook)
+    return {"recarga": nome}, None
+
+
+def adotar_recarga(dados):
+    """No callback da página: publica neste worker o snapshot da recarga, se for do workbook atual e mais novo."""
+    nome = (dados or {}).get("recarga")
+    # O nome vem do navegador: só arquivos nossos, na pasta de recargas
+    if not nome or not _RE_ARQUIVO_RECARGA.match(nome) or not nome.startswith(f"{utils.workbook_atual()}_"):
+        return False
+    try:
+        with open(os.path.join(_pasta_recargas(), nome), "rb") as arquivo:
+            recarga = pickle.load(arquivo)
+    except FileNotFoundError:
+        return False  # expirou; o snapshot segue pelo TTL
+    return utils.adotar_snapshot(recarga["abas"], recarga["carregado_em"], recarga["workbook"])
+
+
+def controles_recarga(prefixo, rotulo="🔄 Atualizar Dados"):
+    """Botão de recarga da página (ids `<prefixo>_btn_recarregar`, `<prefixo>_status_recarregamento`) + progresso."""
+    return html.Div([
+        dbc.Button(rotulo, id=f"{prefixo}_btn_recarregar", n_clicks=0, color="success"),
+        html.Span(id=f"{prefixo}_status_recarregamento", style={"marginLeft": "15px", "color": "#8b949e"}),
+        indicador_progresso(f"{prefixo}_recarga"),
+        html.Div(id=f"{prefixo}_erro_recarga", className="text-danger mt-2"),
+        dcc.Store(id=f"{prefixo}_recarga"),
+    ], className="text-center mt-3")
+
+
+def registrar_recarga(prefixo):
+    """Recarga em segundo plano do botão de controles_recarga(prefixo); o resultado vai para o Store `<prefixo>_recarga`."""
+    @callback_segundo_plano(
+        [Output(f"{prefixo}_recarga", "data"), Output(f"{prefixo}_erro_recarga", "children")],
+        Input(f"{prefixo}_btn_recarregar", "n_clicks"),
+        prevent_initial_call=True,
+        **opcoes_progresso(f"{prefixo}_recarga", executando=[(Output(f"{prefixo}_btn_recarregar", "disabled"), True, False)]),
+    )
+    def recarregar(set_progress, n_clicks):
+        return baixar_recarga(set_progress)
+
+    return recarregar
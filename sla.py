@@ -0,0 +1,161 @@
+# ==========================================================
+# ⏱️ SLA DE DISTRIBUIÇÃO (AGING CALCULADO NO APP)
+# ==========================================================
+# O relógio do SLA começa na assinatura do contrato e para na distribuição:
+#   - processo distribuído: dias = data_distribuicao - data_assinatura_contrato
+#   - ainda não distribuído: dias = hoje - data_assinatura_contrato (em aberto)
+# Cada processo cai numa faixa de aging e é marcado como atrasado quando passa
+# do limite da sua área (ROBO_SLA_DIAS_AREA, senão ROBO_SLA_DIAS). Sem data de
+# assinatura (ou distribuído sem data) fica em "Sem Data".
+#
+# Tudo é vetorizado e materializado uma vez por snapshot (e por dia, porque os
+# processos em aberto envelhecem): contagens por faixa para cada combinação dos
+# filtros da página, servidas por soma como no top-N.
+import os
+import time
+
+from resumos import VALORES_DISTRIBUIDO
+from utils import (
+    ESQUEMA_ABAS, aba_limpa, derivado, selecionar_fatias, CP_SHEET_NAME, CP_COL_AREA, CP_COL_RESPONSAVEL,
+    CP_COL_DATA_DIST, CP_COL_DATA_ASSINATURA, CP_COL_DISTRIBUIDO
+)
+
+SLA_DIAS_PADRAO = int(os.environ.get("ROBO_SLA_DIAS", "10"))  # a planilha marca ATRASADO a partir de ~11 dias
+
+
+def _chave_area(area):
+    import unidecode
+
+    return unidecode.unidecode(str(area)).strip().lower()
+
+
+def _ler_limites_area(texto):
+    """"Trabalhista=10,Previdenciario=20" -> {"trabalhista": 10, "previdenciario": 20}."""
+    limites = {}
+    for item in texto.split(","):
+        area, _, dias = item.partition("=")
+        if area.strip() and dias.strip().isdigit():
+            limites[_chave_area(area)] = int(dias)
+    return limites
+
+
+SLA_DIAS_POR_AREA = _ler_limites_area(os.environ.get("ROBO_SLA_DIAS_AREA", ""))
+
+# Faixas de aging: (limite superior em dias, rótulo); a última é aberta
+FAIXAS_AGING = [(7, "0-7 dias"), (15, "8-15 dias"), (30, "16-30 dias"), (60, "31-60 dias"), (None, "60+ dias")]
+FAIXA_SEM_DATA = "Sem Data"
+ROTULOS_FAIXAS = [rotulo for _, rotulo in FAIXAS_AGING] + [FAIXA_SEM_DATA]
+
+COL_DIAS = "sla_dias"
+COL_LIMITE = "sla_limite_dias"
+COL_FAIXA = "sla_faixa"
+COL_ATRASADO = "sla_atrasado"
+COL_ABERTO = "sla_aberto"
+SITUACAO_ATRASADO = "Atrasado"
+SITUACAO_NO_PRAZO = "No Prazo"
+SITUACAO_SEM_DATA = FAIXA_SEM_DATA
+
+
+def limite_area(area):
+    """Dias de SLA da área (configuração por área ou o padrão)."""
+    return SLA_DIAS_POR_AREA.get(_chave_area(area), SLA_DIAS_PADRAO)
+
+
+def calcular_aging(df, hoje):
+    """DataFrame alinhado a `df` com dias, limite, faixa, atrasado e aberto de cada processo."""
+    import numpy as np
+    import pandas as pd
+
+    inicio = pd.to_datetime(df[CP_COL_DATA_ASSINATURA], errors="coerce")
+    distribuido = df[CP_COL_DISTRIBUIDO].isin(VALORES_DISTRIBUIDO)
+    fim = pd.to_datetime(df[CP_COL_DATA_DIST], errors="coerce").where(distribuido, hoje)
+    dias = (fim - inicio).dt.days.clip(lower=0)
+
+    # Limite por área: mapeia os poucos valores distintos, não linha a linha
+    areas = df[CP_COL_AREA].astype(str)
+    limite = areas.map({a: limite_area(a) for a in areas.unique()}).astype("int32")
+
+    cortes = [-1] + [teto for teto, _ in FAIXAS_AGING[:-1]] + [np.inf]
+    faixa = pd.cut(dias, bins=cortes, labels=[rotulo for _, rotulo in FAIXAS_AGING])
+    faixa = faixa.cat.add_categories([FAIXA_SEM_DATA]).fillna(FAIXA_SEM_DATA)
+    return pd.DataFrame({
+        COL_DIAS: dias.astype("Int32"),
+        COL_LIMITE: limite,
+        COL_FAIXA: faixa,
+        COL_ATRASADO: (dias > limite).fillna(False).astype(bool),
+        COL_ABERTO: ~distribuido,
+    }, index=df.index)
+
+
+def _hoje():
+    import pandas as pd
+
+    return pd.Timestamp(time.strftime("%Y-%m-%d"))
+
+
+def sla_processos():
+    """{"dia", "aging" por linha (alinhado à aba limpa), "fatias", "contagens", "por_area_responsavel"} por snapshot e dia."""
+    hoje = _hoje()
+
+    def construir(abas):
+        df = aba_limpa(CP_SHEET_NAME)
+        colunas = [CP_COL_DATA_ASSINATURA, CP_COL_DATA_DIST, CP_COL_DISTRIBUIDO, CP_COL_AREA]
+        if df is None or any(c not in df.columns for c in colunas):
+            return None
+        aging = calcular_aging(df, hoje)
+        fatias = [c for c in ESQUEMA_ABAS[CP_SHEET_NAME]["filtros"] if c in df.columns]
+        chaves = [df[c] for c in fatias] + [aging[COL_FAIXA], aging[COL_ATRASADO], aging[COL_ABERTO]]
+        contagens = aging.groupby(chaves, sort=False, observed=True, dropna=False).size().rename("Quantidade").reset_index()
+        consolidado = [c for c in (CP_COL_AREA, CP_COL_RESPONSAVEL) if c in fatias] + [COL_FAIXA, COL_ATRASADO, COL_ABERTO]
+        por_area_resp = contagens.groupby(consolidado, observed=True)["Quantidade"].sum().reset_index()
+        return {
+            "dia": hoje,
+            "aging": aging,
+            "fatias": fatias,
+            "contagens": contagens,
+            "por_area_responsavel": por_area_resp[por_area_resp["Quantidade"] > 0].reset_index(drop=True),
+        }
+    # Uma entrada só, recalculada quando muda o dia (não uma chave por dia acumulando na mesma versão)
+    return derivado("sla", construir, valido=lambda sla: sla is None or sla["dia"] == hoje)
+
+
+def contagens_sla(filtros=None, por=None):
+    """Quantidade por faixa de aging e situação (No Prazo/Atrasado/Sem Data), opcionalmente também por `por` (área, responsável...)."""
+    import pandas as pd
+
+    sla = sla_processos()
+    if sla is None or sla["contagens"].empty:
+        return pd.DataFrame()
+    linhas = selecionar_fatias(sla["contagens"], filtros or {})
+    chaves = ([por] if por else []) + [COL_FAIXA, COL_ATRASADO]
+    tabela = linhas.groupby(chaves, observed=True)["Quantidade"].sum().reset_index()
+    tabela = tabela[tabela["Quantidade"] > 0]
+    tabela["Situação"] = tabela[COL_ATRASADO].map({True: SITUACAO_ATRASADO, False: SITUACAO_NO_PRAZO})
+    tabela.loc[tabela[COL_FAIXA] == FAIXA_SEM_DATA, "Situação"] = SITUACAO_SEM_DATA
+    return tabela.rename(columns={COL_FAIXA: "Faixa"}).drop(columns=COL_ATRASADO).reset_index(drop=True)
+
+
+def total_atrasados(filtros=None, apenas_abertos=False):
+    """Processos fora do SLA da sua área (todos ou só os ainda não distribuídos)."""
+    sla = sla_processos()
+    if sla is None:
+        return 0
+    linhas = selecionar_fatias(sla["contagens"], filtros or {})
+    linhas = linhas[linhas[COL_ATRASADO] & (linhas[COL_ABERTO] | (not apenas_abertos))]
+    return int(linhas["Quantidade"].sum())
+
+
+def aging_das_linhas(df):
+    """Colunas de aging para as linhas de um recorte da aba limpa (mesmos rótulos de índice)."""
+    sla = sla_processos()
+    if sla is None:
+        return None
+    return sla["aging"].loc[df.index]
+
+
+def por_area_responsavel():
+    """Contagens por área, responsável, faixa e situação (materializadas no snapshot)."""
+    import pandas as pd
+
+    sla = sla_processos()
+    return pd.DataFrame() if sla is None else sla["por_area_responsavel"]
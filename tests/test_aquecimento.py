@@ -0,0 +1,23 @@
+import os
+import types
+
+from flask import Flask
+
+import aquecimento
+import utils
+
+PLANILHA_EXEMPLO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "talita.xlsx")
+
+
+def test_health_sem_aquecimento_carrega_o_snapshot(monkeypatch):
+    monkeypatch.setattr(aquecimento, "AQUECIMENTO", "0")
+    monkeypatch.setattr(utils, "SHEETS_URL", PLANILHA_EXEMPLO)
+    utils.descartar_workbook(utils.WORKBOOK_INICIAL)  # worker recém-criado: nada carregado
+    server = Flask(__name__)
+    aquecimento.registrar_aquecimento(types.SimpleNamespace(server=server))
+
+    resposta = server.test_client().get("/health")
+
+    assert resposta.status_code == 200
+    assert resposta.get_json()["status"] == "ok"
+    assert utils.snapshot_atual()["abas"]
@@ -0,0 +1,72 @@
+# ==========================================================
+# 🏆 TOP-N POR FATIA DE FILTRO (HEAVY HITTERS)
+# ==========================================================
+# Para colunas de alta cardinalidade (motivo, responsável), as contagens são
+# calculadas uma vez por snapshot para cada combinação dos filtros da página
+# (fatia). Um pedido de top-N só soma as fatias que batem com os filtros: a aba
+# não é varrida de novo a cada combinação de dropdowns.
+#
+# Em abas muito grandes (modo aproximado), cada fatia guarda só os K valores
+# mais frequentes e o maior contador descartado (erro). Esses resumos se somam
+# como um Misra-Gries: a contagem real de um valor fica entre a estimada e a
+# estimada + soma dos erros das fatias usadas.
+import os
+
+from utils import ESQUEMA_ABAS, aba_limpa, derivado, selecionar_fatias
+
+TOPN_SKETCH_LINHAS = int(os.environ.get("ROBO_TOPN_SKETCH_LINHAS", "200000"))
+TOPN_SKETCH_K = int(os.environ.get("ROBO_TOPN_SKETCH_K", "50"))
+
+
+def construir_tabela_contagens(df, coluna, fatias, k=None):
+    """Linhas (fatia..., valor, Quantidade) com as contagens de `coluna` por fatia.
+
+    Com `k`, cada fatia mantém só os k maiores contadores; devolve também o
+    erro máximo por fatia (maior contador descartado, 0 se nada foi cortado).
+    """
+    import pandas as pd
+
+    validos = df[df[coluna].notna() & (df[coluna] != "")]
+    contagens = validos.groupby(fatias + [coluna], sort=False, dropna=False).size().rename("Quantidade").reset_index()
+    if k is None or contagens.empty:
+        return contagens, pd.DataFrame(columns=fatias + ["erro"])
+
+    contagens = contagens.sort_values("Quantidade", ascending=False, kind="mergesort")
+    posicao = contagens.groupby(fatias, sort=False, dropna=False).cumcount()
+    descartados = contagens[posicao >= k]
+    erros = descartados.groupby(fatias, sort=False, dropna=False)["Quantidade"].max().rename("erro").reset_index()
+    return contagens[posicao < k].reset_index(drop=True), erros
+
+
+def tabela_contagens(aba, coluna):
+    """Tabela de contagens por fatia (filtros da página) para `coluna`, por snapshot."""
+    def construir(abas):
+        df = aba_limpa(aba)
+        if df is None or coluna not in df.columns:
+            return None
+        fatias = [c for c in ESQUEMA_ABAS[aba]["filtros"] if c in df.columns and c != coluna]
+        k = TOPN_SKETCH_K if len(df) >= TOPN_SKETCH_LINHAS else None
+        contagens, erros = construir_tabela_contagens(df, coluna, fatias, k)
+        return {"fatias": fatias, "contagens": contagens, "erros": erros, "aproximado": k is not None}
+    return derivado(f"topn:{aba}:{coluna}", construir)
+
+
+def top_n(aba, coluna, filtros=None, n=10):
+    """Os `n` valores mais frequentes de `coluna` na aba filtrada: DataFrame(index, Quantidade).
+
+    Filtros sobre a própria `coluna` também são aceitos (restringem os valores).
+    No modo aproximado, traz ainda a coluna "erro" (folga máxima da contagem).
+    """
+    import pandas as pd
+
+    tabela = tabela_contagens(aba, coluna)
+    if tabela is None or tabela["contagens"].empty:
+        return pd.DataFrame()
+    filtros = filtros or {}
+    contagens = selecionar_fatias(tabela["contagens"], filtros)
+    somadas = contagens.groupby(coluna, sort=False)["Quantidade"].sum()
+    somadas = somadas.sort_values(ascending=False, kind="mergesort").head(n)
+    resultado = pd.DataFrame({"index": somadas.index, "Quantidade": somadas.values})
+    if tabela["aproximado"]:
+        resultado["erro"] = int(selecionar_fatias(tabela["erros"], filtros)["erro"].sum())
+    return resultado
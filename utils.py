@@ -1,8 +1,21 @@
-import pandas as pd
-import unidecode
+import contextlib
+import hashlib
+import os
+import threading
+import time
+
 import dash_bootstrap_components as dbc
+import pandas as pd
 from dash import html
 
+# Copy-on-write ligado uma vez, antes de qualquer DataFrame existir: frames derivados
+# do snapshot (limpeza, filtros, views) nunca alteram o original, então ele pode ser
+# compartilhado entre threads sem cópias, venha do download ou de adotar_snapshot.
+# (Com --preload o pandas é importado uma vez no master, não em cada worker.)
+pd.set_option("mode.copy_on_write", True)
+
+# unidecode e as bibliotecas de análise são importados dentro das funções.
+
 # ==========================================================
 # 🔧 CONFIGURAÇÕES GLOBAIS
 # ==========================================================
@@ -10,50 +23,434 @@ SHEETS_URL = "https://docs.google.com/spreadsheets/d/1SEeX-g_Wdl0XpdXt90nDgDBPrj
 TEMA_DARK = "#0d1117"
 COR_CARD_BG = "#161b22"
 
+# Snapshot em memória: após o TTL os dados continuam sendo servidos (stale)
+# enquanto uma thread revalida a planilha em segundo plano.
+CACHE_TTL_SEGUNDOS = int(os.environ.get("ROBO_CACHE_TTL", "90"))
+# Disjuntor: após N falhas seguidas, para de consultar o Google por um tempo.
+DISJUNTOR_MAX_FALHAS = int(os.environ.get("ROBO_DISJUNTOR_FALHAS", "3"))
+DISJUNTOR_PAUSA_SEGUNDOS = int(os.environ.get("ROBO_DISJUNTOR_PAUSA", "300"))
+# Backend das consultas agregadas (consultas.py): "pandas" (padrão) ou "sqlite".
+BACKEND_CONSULTAS = os.environ.get("ROBO_BACKEND", "pandas").lower()
+
 # ==========================================================
 # 📥 FUNÇÃO DE CARREGAMENTO UNIVERSAL
 # ==========================================================
-def carregar_dados(sheet_name):
-    """Carrega uma aba do Google Sheets e normaliza colunas (sem acento, sem símbolo)."""
+def normalizar_colunas(colunas):
+    """Normaliza nomes de colunas (sem acento, sem símbolo) para evitar erro nos callbacks."""
+    import unidecode
+
+    return [
+        unidecode.unidecode(str(c).strip())
+        .replace(":", "")
+        .replace("%", "")
+        .replace("/", "_")
+        .replace("?", "")
+        .replace("(", "")
+        .replace(")", "")
+        .replace(" ", "_")
+        .replace("-", "_")
+        .lower()
+        for c in colunas
+    ]
+
+
+def _baixar_planilha(url, progresso=None):
+    """Baixa a planilha inteira uma única vez e devolve {aba: DataFrame normalizado}.
+
+    `progresso(feitas, total, aba)` é chamado após o download (0) e a cada aba lida.
+    """
+    xls = pd.ExcelFile(url)
+    total = len(xls.sheet_names)
+    if progresso:
+        progresso(0, total, None)
+    abas = {}
+    for i, nome in enumerate(xls.sheet_names, start=1):
+        df = pd.read_excel(xls, sheet_name=nome)
+        df.columns = normalizar_colunas(df.columns)
+        for col in COLUNAS_DATA.get(nome, []):
+            if col in df.columns:
+                adicionar_dimensao_tempo(df, col)
+        abas[nome] = df
+        if progresso:
+            progresso(i, total, nome)
+    return abas
+
+
+def adicionar_dimensao_tempo(df, col):
+    """Converte `col` para datetime64 (formato explícito) e cria as chaves inteiras ano-mês, semana ISO e dia."""
+    datas = pd.to_datetime(df[col], format=FORMATO_DATA, errors="coerce")
+    iso = datas.dt.isocalendar()
+    df[col] = datas
+    df[col + SUFIXO_ANO_MES] = (datas.dt.year * 100 + datas.dt.month).astype("Int32")
+    df[col + SUFIXO_SEMANA] = (iso["year"] * 100 + iso["week"]).astype("Int32")
+    df[col + SUFIXO_DIA] = (datas.dt.year * 10000 + datas.dt.month * 100 + datas.dt.day).astype("Int32")
+    return df
+
+
+def rotulo_ano_mes(chave):
+    """202509 -> '2025-09'"""
+    return f"{int(chave) // 100:04d}-{int(chave) % 100:02d}"
+
+
+# ==========================================================
+# 📚 PLANILHAS POR EQUIPE (WORKBOOKS)
+# ==========================================================
+# Cada equipe tem sua cópia da planilha: ROBO_WORKBOOKS="equipe_a=<url>,equipe_b=<url>".
+# Sem a variável há um único workbook ("padrao") lendo SHEETS_URL. Cada workbook
+# tem seu próprio snapshot, disjuntor e cache de derivados (abas limpas, índices,
+# rollups...); a requisição escolhe o workbook (workbooks.py grava em flask.g) e
+# as threads de fundo usam `usando_workbook`. Um orçamento global
+# (ROBO_WORKBOOKS_MEMORIA_MB, em memoria.py) descarta workbooks inteiros, do
+# menos usado recentemente para o mais.
+WORKBOOK_PADRAO = "padrao"
+
+
+def _ler_workbooks(texto):
+    """"equipe_a=https://...,equipe_b=https://..." -> {"equipe_a": url, ...} (a URL pode ter "=")."""
+    workbooks = {}
+    for item in texto.split(","):
+        id_, _, url = item.strip().partition("=")
+        if id_.strip() and url.strip():
+            workbooks[id_.strip().lower()] = url.strip()
+    return workbooks
+
+
+WORKBOOKS = _ler_workbooks(os.environ.get("ROBO_WORKBOOKS", ""))
+WORKBOOK_INICIAL = os.environ.get("ROBO_WORKBOOK_PADRAO", "").lower() or next(iter(WORKBOOKS), WORKBOOK_PADRAO)
+
+
+def ids_workbooks():
+    return list(WORKBOOKS) or [WORKBOOK_PADRAO]
+
+
+def url_workbook(id_):
+    """URL da planilha do workbook (o padrão lê SHEETS_URL na hora, para poder ser trocado)."""
+    return WORKBOOKS.get(id_) or SHEETS_URL
+
+
+_contexto = threading.local()
+
+
+def workbook_atual():
+    """Workbook em uso: o de `usando_workbook` (threads de fundo), o da requisição (flask.g) ou o inicial."""
+    from flask import g, has_app_context
+
+    explicito = getattr(_contexto, "workbook", None)
+    if explicito:
+        return explicito
+    if has_app_context() and g.get("workbook"):
+        return g.workbook
+    return WORKBOOK_INICIAL
+
+
+@contextlib.contextmanager
+def usando_workbook(id_):
+    """Fixa o workbook da thread atual (revalidação, hooks de publicação, CLIs)."""
+    anterior = getattr(_contexto, "workbook", None)
+    _contexto.workbook = id_
     try:
-        xls = pd.ExcelFile(SHEETS_URL)
-        if sheet_name not in xls.sheet_names:
-            raise Exception(f"Aba '{sheet_name}' não encontrada.")
-        df = pd.read_excel(xls, sheet_name=sheet_name)
-        df.columns = [col.strip() for col in df.columns]
-
-        # 🧹 Normaliza nomes de colunas (para evitar erro nos callbacks)
-        df.columns = [
-            unidecode.unidecode(c)
-           .replace(":", "")
-.replace("%", "")
-.replace("/", "_")
-.replace("?", "")
-.replace("(", "")
-.replace(")", "")
-.replace(" ", "_")
-.replace("-", "_")
-.lower()
-
-            for c in df.columns
-        ]
-
-        print(f"✅ Dados de '{sheet_name}' carregados com sucesso! {len(df)} linhas, {len(df.columns)} colunas")
-        print(f"🔍 Colunas detectadas: {list(df.columns)[:10]}")
-        return df
+        yield id_
+    finally:
+        _contexto.workbook = anterior
+
+
+# ==========================================================
+# 🗄️ SNAPSHOT EM MEMÓRIA (stale-while-revalidate + disjuntor)
+# ==========================================================
+_workbooks = {}  # {id: estado}; criado no primeiro acesso, descartado inteiro pelo orçamento
+# Última versão publicada de cada workbook: sobrevive ao descarte, para um workbook recarregado
+# não voltar a v1 (arquivos SQLite, logs e clientes comparando versões não confundem snapshots)
+_ultimas_versoes = {}
+_lock_estado = threading.Lock()
+_ao_publicar = []
+
+
+def _apos_fork():
+    """Processo filho (callback em segundo plano): locks podem ter vindo travados por threads que não existem aqui.
+
+    O filho vive só o tempo de um callback e lê o snapshot herdado: nada de revalidar a planilha nele.
+    """
+    global _lock_estado
+    _lock_estado = threading.Lock()
+    for estado in _workbooks.values():
+        estado["lock_download"] = threading.Lock()
+        estado["locks_derivados"] = {}
+        estado["revalidando"] = threading.Event()
+        estado["revalidando"].set()  # marca "já revalidando": obter_snapshot não dispara outra
+
+
+os.register_at_fork(after_in_child=_apos_fork)
+
+
+def _novo_estado(id_):
+    return {
+        "id": id_,
+        "snapshot": {"abas": {}, "versao": _ultimas_versoes.get(id_, 0), "impressao": None, "carregado_em": None,
+                     "ultimo_erro": None},
+        "disjuntor": {"falhas": 0, "aberto_ate": 0.0},
+        "derivados": {},
+        "locks_derivados": {},  # {nome: Lock}: um cálculo por vez de cada derivado
+        "lock_download": threading.Lock(),
+        "revalidando": threading.Event(),
+        "ultimo_acesso": time.time(),
+    }
+
+
+def estado_workbook(id_=None):
+    """Estado (snapshot, disjuntor, derivados) do workbook; marca o acesso para o LRU."""
+    id_ = id_ or workbook_atual()
+    with _lock_estado:
+        estado = _workbooks.get(id_)
+        if estado is None:
+            estado = _workbooks[id_] = _novo_estado(id_)
+        estado["ultimo_acesso"] = time.time()
+    return estado
+
+
+def workbooks_carregados():
+    """Estados em memória, do menos para o mais recentemente usado."""
+    with _lock_estado:
+        return sorted(_workbooks.values(), key=lambda estado: estado["ultimo_acesso"])
+
+
+def descartar_workbook(id_):
+    """Tira o workbook inteiro da memória; o próximo acesso baixa a planilha de novo."""
+    with _lock_estado:
+        return _workbooks.pop(id_, None) is not None
+
+
+def snapshot_atual():
+    """Snapshot do workbook atual (sem disparar carregamento)."""
+    return estado_workbook()["snapshot"]
+
+
+def registrar_ao_publicar(funcao):
+    """Registra `funcao()` para rodar logo após cada snapshot novo ser publicado (com o workbook dele em uso)."""
+    if funcao not in _ao_publicar:
+        _ao_publicar.append(funcao)
+    return funcao
+
+
+def _disjuntor_aberto(estado):
+    return time.time() < estado["disjuntor"]["aberto_ate"]
+
+
+def impressao_snapshot(abas):
+    """Hash do conteúdo de todas as abas: downloads idênticos não viram versão nova."""
+    h = hashlib.blake2b(digest_size=16)
+    for nome in sorted(abas):
+        df = abas[nome]
+        h.update(nome.encode())
+        h.update("\x1f".join(map(str, df.columns)).encode())
+        try:
+            h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        except TypeError:
+            h.update(df.to_csv(index=False).encode())
+    return h.hexdigest()
+
+
+def _revalidar(estado):
+    """Baixa um snapshot novo. Em caso de falha mantém o último snapshot bom.
+
+    Um download por vez por workbook: quem esperava no lock usa o resultado do download
+    que acabou de terminar (sucesso ou falha) em vez de baixar de novo.
+    """
+    snapshot, disjuntor = estado["snapshot"], estado["disjuntor"]
+    carregado_antes, falhas_antes = snapshot["carregado_em"], disjuntor["falhas"]
+    with estado["lock_download"]:
+        if snapshot["carregado_em"] != carregado_antes:
+            return True
+        if disjuntor["falhas"] > falhas_antes or _disjuntor_aberto(estado):
+            return False
+        try:
+            abas = _baixar_planilha(url_workbook(estado["id"]))
+        except Exception as e:
+            with _lock_estado:
+                snapshot["ultimo_erro"] = str(e)
+                disjuntor["falhas"] += 1
+                if disjuntor["falhas"] >= DISJUNTOR_MAX_FALHAS:
+                    disjuntor["aberto_ate"] = time.time() + DISJUNTOR_PAUSA_SEGUNDOS
+                    print(f"⛔ [{estado['id']}] Disjuntor aberto por {DISJUNTOR_PAUSA_SEGUNDOS}s após {disjuntor['falhas']} falhas seguidas")
+            print(f"❌ [{estado['id']}] Erro crítico ao carregar planilha: {e}")
+            return False
+
+        novo = _gravar_snapshot(estado, abas, time.time())
+
+    if novo:
+        _rodar_ao_publicar(estado)
+    return True
+
+
+def _gravar_snapshot(estado, abas, carregado_em):
+    """Publica as abas; devolve False se o conteúdo é igual ao atual (só renova `carregado_em`).
+
+    Sem versão nova os derivados (abas limpas, índices, rollups, SQLite...) continuam
+    valendo e os pós-processamentos não rodam.
+    """
+    snapshot, disjuntor = estado["snapshot"], estado["disjuntor"]
+    impressao = impressao_snapshot(abas)
+    with _lock_estado:
+        novo = impressao != snapshot["impressao"]
+        if novo:
+            snapshot["abas"] = abas
+            snapshot["versao"] += 1
+            _ultimas_versoes[estado["id"]] = snapshot["versao"]
+            snapshot["impressao"] = impressao
+        snapshot["carregado_em"] = carregado_em
+        snapshot["ultimo_erro"] = None
+        disjuntor["falhas"] = 0
+        disjuntor["aberto_ate"] = 0.0
+    if novo:
+        print(f"✅ [{estado['id']}] Snapshot v{snapshot['versao']} carregado: {', '.join(f'{n} ({len(d)})' for n, d in abas.items())}")
+    else:
+        print(f"♻️ [{estado['id']}] Planilha sem mudanças: snapshot v{snapshot['versao']} renovado")
+    return novo
+
+
+def _rodar_ao_publicar(estado):
+    if _workbooks.get(estado["id"]) is not estado:
+        return  # descartado pelo orçamento durante o download: ninguém mais lê este estado
+    # Fora dos locks: pré-cálculos pesados não seguram quem só quer ler o snapshot
+    with usando_workbook(estado["id"]):
+        for ao_publicar in _ao_publicar:
+            try:
+                ao_publicar()
+            except Exception as e:
+                print(f"⚠️ Falha no pós-processamento do snapshot ({getattr(ao_publicar, '__name__', ao_publicar)}): {e}")
+
+
+def adotar_snapshot(abas, carregado_em, id_=None):
+    """Publica abas baixadas fora deste processo (recarga em segundo plano); ignora se o snapshot atual é mais novo."""
+    estado = estado_workbook(id_)
+    with estado["lock_download"]:
+        atual = estado["snapshot"]["carregado_em"]
+        if atual is not None and atual >= carregado_em:
+            return False
+        novo = _gravar_snapshot(estado, abas, carregado_em)
+    if novo:
+        _rodar_ao_publicar(estado)
+    return True
+
 
-    except Exception as e:
-        print(f"❌ Erro crítico ao carregar planilha '{sheet_name}': {e}")
+def _revalidar_em_segundo_plano(estado):
+    """Dispara no máximo uma revalidação por vez (por workbook), sem bloquear o callback."""
+    if estado["revalidando"].is_set() or _disjuntor_aberto(estado):
+        return
+    estado["revalidando"].set()
+
+    def tarefa():
+        try:
+            _revalidar(estado)
+        finally:
+            estado["revalidando"].clear()
+
+    threading.Thread(target=tarefa, name=f"revalidar-planilha-{estado['id']}", daemon=True).start()
+
+
+def obter_snapshot(forcar=False):
+    """Devolve o snapshot do workbook atual. Só bloqueia no primeiro carregamento ou quando `forcar=True`."""
+    estado = estado_workbook()
+    snapshot = estado["snapshot"]
+    if snapshot["carregado_em"] is None or forcar:
+        _revalidar(estado)
+    elif time.time() - snapshot["carregado_em"] > CACHE_TTL_SEGUNDOS:
+        _revalidar_em_segundo_plano(estado)
+    return snapshot
+
+
+def derivado(nome, construir, valido=None):
+    """Memoiza `construir(abas)` por workbook e versão de snapshot (rollups, índices, tabelas pré-calculadas).
+
+    Um cálculo por vez por (workbook, nome): as requisições que chegam juntas depois de um
+    snapshot novo esperam o primeiro cálculo e usam o resultado dele. `valido(valor)` falso
+    recalcula mesmo na versão atual (valores que dependem também do dia, por exemplo).
+    """
+    obter_snapshot()
+    estado = estado_workbook()
+    with _lock_estado:
+        versao, abas = estado["snapshot"]["versao"], estado["snapshot"]["abas"]
+        lock = estado["locks_derivados"].setdefault(nome, threading.Lock())
+    def em_dia(em_cache):
+        return em_cache is not None and em_cache[0] == versao and (valido is None or valido(em_cache[1]))
+
+    em_cache = estado["derivados"].get(nome)
+    if em_dia(em_cache):
+        return em_cache[1]
+    with lock:
+        em_cache = estado["derivados"].get(nome)
+        if em_dia(em_cache):
+            return em_cache[1]
+        valor = construir(abas)
+        estado["derivados"][nome] = (versao, valor)
+    return valor
+
+
+def descartar_derivados(apenas_antigos=False, id_=None):
+    """Esvazia o cache de derivados de um workbook (ou de todos; ou só os de versões anteriores); devolve quantos saíram."""
+    estados = [estado for estado in workbooks_carregados() if id_ is None or estado["id"] == id_]
+    total = 0
+    for estado in estados:
+        versao_atual = estado["snapshot"]["versao"]
+        nomes = [n for n, (versao, _) in list(estado["derivados"].items()) if not apenas_antigos or versao != versao_atual]
+        for nome in nomes:
+            estado["derivados"].pop(nome, None)
+        total += len(nomes)
+    return total
+
+
+def info_snapshot():
+    """Metadados do snapshot servido: workbook, versão, idade, se está desatualizado e estado do disjuntor."""
+    estado = estado_workbook()
+    snapshot = estado["snapshot"]
+    carregado_em = snapshot["carregado_em"]
+    idade = time.time() - carregado_em if carregado_em else None
+    return {
+        "workbook": estado["id"],
+        "versao": snapshot["versao"],
+        "impressao": snapshot["impressao"],
+        "carregado_em": carregado_em,
+        "idade_segundos": idade,
+        "stale": idade is not None and idade > CACHE_TTL_SEGUNDOS,
+        "ultimo_erro": snapshot["ultimo_erro"],
+        "disjuntor_aberto": _disjuntor_aberto(estado),
+    }
+
+
+def carregar_dados(sheet_name, forcar=False):
+    """Devolve a aba bruta do snapshot em memória (DataFrame vazio se indisponível).
+
+    A "cópia" é rasa: com copy-on-write, alterar o resultado não afeta o snapshot.
+    """
+    abas = obter_snapshot(forcar)["abas"]
+    if sheet_name not in abas:
+        if abas:
+            print(f"❌ Aba '{sheet_name}' não encontrada.")
         return pd.DataFrame()
+    return abas[sheet_name].copy(deep=False)
+
+
+def texto_status_atualizacao():
+    """Texto do rodapé das páginas, sinalizando quando os dados servidos estão desatualizados."""
+    info = info_snapshot()
+    if info["carregado_em"] is None:
+        return "❌ Falha ao carregar dados"
+    hora = time.strftime("%H:%M:%S", time.localtime(info["carregado_em"]))
+    origem = f" ({info['workbook']})" if len(ids_workbooks()) > 1 else ""
+    if info["ultimo_erro"] or info["disjuntor_aberto"]:
+        minutos = int(info["idade_segundos"] // 60)
+        return f"⚠️ Fonte indisponível — exibindo dados de {hora}{origem} (há {minutos} min)"
+    return f"🕒 Atualizado às {hora}{origem}"
 
 # ==========================================================
 # 📊 NOMES DE COLUNAS PADRÃO (PÓS-NORMALIZAÇÃO)
 # ==========================================================
 # Controle de Processos
+CP_SHEET_NAME = "controle de processos"
 CP_COL_AREA = "area_pasta"
 CP_COL_STATUS = "status_final"
 CP_COL_UF = "uf_municipio"
 CP_COL_DATA_DIST = "data_distribuicao"
+CP_COL_DATA_ASSINATURA = "data_assinatura_contrato"
 CP_COL_DISTRIBUIDO = "processo_distribuido"
 CP_COL_MES_COMP = "mes_competencia"
 CP_COL_RESPONSAVEL = "responsavel_juridico"
@@ -61,6 +458,7 @@ CP_COL_SLA = "status_sla_distribuicao"
 CP_COL_CONSULTOR = "consultor"
 
 # Funil x Metas
+FM_SHEET_NAME = "funilxmetas"
 FM_COL_MES = "mes"
 FM_COL_AREA_PASTA_PROXY = "consultor"
 FM_COL_META_MENSAL = "meta_mensal_pasta"
@@ -71,6 +469,7 @@ FM_COL_TAXA_CONVERSAO_REAL = "taxa_de_conversao_por_area_mes"
 FM_COL_CONTRATOS_REAL = "meta_mensal_atingida"
 
 # Funil de Precatório
+FP_SHEET_NAME = "Funil de precatorio"
 FP_COL_CONSULTOR = "consultor"
 FP_COL_STATUS = "status"
 FP_COL_MOTIVO = "motivo"
@@ -81,6 +480,19 @@ FP_COL_MES = "mes"
 FP_COL_NOME = "nome"
 FP_COL_TELEFONE = "telefone"
 
+# Metas por Pasta
+MP_SHEET_NAME = "Metas por pasta"
+MP_COL_MES = "mes"
+MP_COL_META_MENSAL = "meta_mensal_pasta"
+MP_COL_META_MINIMA = "meta_mensal_area_minimo_esperado"
+MP_COL_META_ATINGIDA = "meta_mensal_atingida"
+MP_COL_PERCENTUAL_ATINGIMENTO = "_atingimento_contratos"
+MP_COL_LEADS_RECEBIDOS = "leads_recebidos_por_area_mes"
+MP_COL_TAXA_CONVERSAO = "taxa_de_conversao_por_area_mes"
+MP_COL_POTENCIAL_50 = "potencial_a_atingirse_cumprido_a_meta_mensal_individual_em_+_50"
+MP_COL_POTENCIAL_100 = "potencial_a_atingirse_cumprido_a_meta_mensal_individual_em_100"
+PASTA_COL_INDEX = 1  # Segunda coluna da planilha
+
 # Ranking
 RK_SHEET_NAME = "ranking"
 RK_COL_CONSULTOR = "consultor"
@@ -107,6 +519,178 @@ PD_STATUS_ATINGIDA = "meta_atingida"
 PD_STATUS_NAO_ATINGIDA = "nao_atingida"
 PD_STATUS_PARCIAL = "parcial"
 
+# ==========================================================
+# 📅 DIMENSÃO DE TEMPO (PARSEADA UMA VEZ NO SNAPSHOT)
+# ==========================================================
+# Datas em texto seguem o padrão brasileiro; células de data do Excel já chegam como datetime.
+FORMATO_DATA = "%d/%m/%Y"
+COLUNAS_DATA = {
+    CP_SHEET_NAME: [CP_COL_DATA_DIST, CP_COL_DATA_ASSINATURA],
+    PD_SHEET_NAME: [PD_COL_DATA],
+}
+# Chaves inteiras derivadas: <coluna>_ano_mes (AAAAMM), <coluna>_semana (AAAASS ISO), <coluna>_dia (AAAAMMDD)
+SUFIXO_ANO_MES = "_ano_mes"
+SUFIXO_SEMANA = "_semana"
+SUFIXO_DIA = "_dia"
+
+# ==========================================================
+# 🧹 LIMPEZA POR ABA (COMPARTILHADA ENTRE PÁGINAS E PRÉ-CÁLCULOS)
+# ==========================================================
+def limpar_controle(df):
+    """Limpeza de strings do Controle de Processos: tratamento seguro (mantendo MAIÚSCULO/ACENTO)."""
+    cols_to_clean = [CP_COL_AREA, CP_COL_STATUS, CP_COL_UF, CP_COL_MES_COMP, CP_COL_RESPONSAVEL, CP_COL_SLA, CP_COL_DISTRIBUIDO, CP_COL_CONSULTOR]
+    for col in cols_to_clean:
+        if col in df.columns:
+            df[col] = df[col].astype(str).fillna("")
+            df[col] = df[col].str.strip()
+            df[col] = df[col].replace(["NAN", "nan", "Na", ""], "")
+    return df
+
+
+def limpar_funil(df):
+    """Limpeza do Funil de Precatório: padronização em Title Case."""
+    cols_to_clean = [FP_COL_CONSULTOR, FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_PLATFORM, FP_COL_UF, FP_COL_ORIGEM, FP_COL_MES]
+    for col in cols_to_clean:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().str.title().replace(["Nan", "Na", ""], "")
+    return df
+
+
+def limpar_funil_metas(df):
+    """Limpeza do Funil x Metas: mês/área em Title Case e métricas numéricas."""
+    for col in [FM_COL_MES, FM_COL_AREA_PASTA_PROXY]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().str.title().replace(["Nan", "Na", ""], "")
+
+    for col in [FM_COL_META_MENSAL, FM_COL_META_ATINGIDA, FM_COL_LEADS_RECEBIDOS,
+                FM_COL_CONTRATOS_REAL, FM_COL_TAXA_CONVERSAO_META, FM_COL_TAXA_CONVERSAO_REAL]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+
+def limpar_metas(df):
+    """Limpeza de Metas por Pasta: mês/pasta como texto e métricas numéricas."""
+    if len(df.columns) <= PASTA_COL_INDEX:
+        return df
+    PASTA_COL = df.columns[PASTA_COL_INDEX]
+
+    for col in [MP_COL_MES, PASTA_COL]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip()
+            df[col] = df[col].replace(["Nan", "Na", ""], "")
+
+    for col in [MP_COL_PERCENTUAL_ATINGIMENTO, MP_COL_TAXA_CONVERSAO]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    for col in [MP_COL_META_MENSAL, MP_COL_META_ATINGIDA, MP_COL_LEADS_RECEBIDOS, MP_COL_POTENCIAL_50, MP_COL_POTENCIAL_100]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+
+def limpar_ranking(df):
+    """Limpeza do Ranking: junta as duas metades da planilha (consultor e consultor.1) e normaliza."""
+    df.columns = [c.strip().lower() for c in df.columns]
+
+    # 🧩 Detecta e junta automaticamente as duas metades da planilha (consultor e consultor.1)
+    if "consultor.1" in df.columns:
+        metade1 = [c for c in df.columns if not c.endswith(".1")]
+        metade2 = [c for c in df.columns if c.endswith(".1")]
+
+        df1 = df[metade1].copy()
+        df2 = df[metade2].copy()
+        df2.columns = [c.replace(".1", "") for c in metade2]
+
+        df = pd.concat([df1, df2], ignore_index=True)
+
+    # Limpa e normaliza
+    df = df.fillna(0)
+    df[RK_COL_CONSULTOR] = df[RK_COL_CONSULTOR].astype(str).str.strip().str.title()
+    df[RK_COL_MES] = df[RK_COL_MES].astype(str).str.strip()
+    return df
+
+
+def limpar_producao(df):
+    """Limpeza da Produção Diária: consultor, métricas numéricas e status das metas."""
+    if PD_COL_CONSULTOR in df.columns:
+        df[PD_COL_CONSULTOR] = df[PD_COL_CONSULTOR].astype(str).str.strip().str.title().replace(["Nan", "Na", ""], "Não Atribuído")
+    for col in [PD_COL_LIGACOES, PD_COL_COTACAO]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    for col in [PD_COL_NOTA_LIGACOES, PD_COL_NOTA_COTACAO]:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().replace(["Nan", "Na", ""], "Indefinido")
+    return df
+
+
+# ==========================================================
+# 🗂️ ESQUEMA DAS ABAS (LIMPEZA + FILTROS DE CADA PÁGINA)
+# ==========================================================
+# Usado por quem precisa reproduzir fora dos callbacks exatamente o que a página
+# mostra (exportação, API). "filtros" são os dropdowns da página; "dimensoes"
+# são colunas extras de agrupamento e "medidas" as colunas numéricas agregáveis.
+ESQUEMA_ABAS = {
+    CP_SHEET_NAME: {
+        "limpeza": limpar_controle,
+        "filtros": [CP_COL_AREA, CP_COL_STATUS, CP_COL_UF, CP_COL_MES_COMP, CP_COL_RESPONSAVEL, CP_COL_CONSULTOR],
+        "dimensoes": [CP_COL_DISTRIBUIDO, CP_COL_SLA, CP_COL_DATA_DIST + SUFIXO_ANO_MES],
+        "medidas": [],
+    },
+    FP_SHEET_NAME: {
+        "limpeza": limpar_funil,
+        "filtros": [FP_COL_CONSULTOR, FP_COL_PLATFORM, FP_COL_UF, FP_COL_MES],
+        "dimensoes": [FP_COL_STATUS, FP_COL_MOTIVO, FP_COL_ORIGEM],
+        "medidas": [],
+    },
+    FM_SHEET_NAME: {
+        "limpeza": limpar_funil_metas,
+        "filtros": [FM_COL_MES, FM_COL_AREA_PASTA_PROXY],
+        "dimensoes": [],
+        "medidas": [FM_COL_META_MENSAL, FM_COL_META_ATINGIDA, FM_COL_LEADS_RECEBIDOS, FM_COL_TAXA_CONVERSAO_REAL],
+    },
+    MP_SHEET_NAME: {
+        "limpeza": limpar_metas,
+        "filtros": [MP_COL_MES, MP_COL_META_MENSAL],  # meta_mensal_pasta = coluna da pasta (PASTA_COL_INDEX)
+        "dimensoes": [],
+        "medidas": [MP_COL_META_ATINGIDA, MP_COL_PERCENTUAL_ATINGIMENTO, MP_COL_LEADS_RECEBIDOS, MP_COL_TAXA_CONVERSAO,
+                    MP_COL_POTENCIAL_50, MP_COL_POTENCIAL_100],
+    },
+    RK_SHEET_NAME: {
+        "limpeza": limpar_ranking,
+        "filtros": [RK_COL_MES, RK_COL_CONSULTOR],
+        "dimensoes": [RK_COL_PASTA],
+        "medidas": [RK_COL_META, RK_COL_CONTRATOS, RK_COL_TAXA_CONVERSAO, RK_COL_ATINGIMENTO, RK_COL_REUNIOES],
+    },
+    PD_SHEET_NAME: {
+        "limpeza": limpar_producao,
+        "filtros": [PD_COL_CONSULTOR, PD_COL_DATA + SUFIXO_ANO_MES],
+        "dimensoes": [PD_COL_DATA + SUFIXO_SEMANA, PD_COL_DATA + SUFIXO_DIA, PD_COL_NOTA_LIGACOES, PD_COL_NOTA_COTACAO],
+        "medidas": [PD_COL_LIGACOES, PD_COL_COTACAO],
+    },
+}
+
+
+def dimensoes_da_aba(aba):
+    """Colunas permitidas em filtros e group-by fora das páginas (filtros da página + dimensões extras)."""
+    return ESQUEMA_ABAS[aba]["filtros"] + ESQUEMA_ABAS[aba]["dimensoes"]
+
+
+def aplicar_filtros(df, filtros):
+    """Aplica {coluna: valor ou lista de valores} por igualdade; valores vazios são ignorados.
+
+    Valores em texto (vindos de query string) são convertidos para colunas numéricas.
+    """
+    for col, valor in filtros.items():
+        if valor is None or valor == "" or valor == [] or col not in df.columns:
+            continue
+        valores = list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+        if pd.api.types.is_numeric_dtype(df[col]) and any(isinstance(v, str) for v in valores):
+            valores = pd.to_numeric(pd.Series(valores), errors="coerce").dropna().tolist()
+        df = df[df[col].isin(valores)]
+    return df
+
+
 # ==========================================================
 # 💡 UI UTIL
 # ==========================================================
@@ -120,3 +704,82 @@ def criar_card_kpi(titulo, valor, cor="text-light"):
         inverse=True,
         class_name="shadow-lg rounded-4"
     )
+
+
+# ==========================================================
+# 🔎 ABAS LIMPAS E ÍNDICES POR SNAPSHOT
+# ==========================================================
+def aba_limpa(aba):
+    """Aba já limpa conforme ESQUEMA_ABAS (+ consultor_id), calculada uma vez por snapshot (não modificar)."""
+    def construir(abas):
+        if aba not in abas:
+            return None
+        # Cópia rasa: a limpeza só aloca as colunas que troca (copy-on-write)
+        df = ESQUEMA_ABAS[aba]["limpeza"](abas[aba].copy(deep=False))
+        if "consultor" in df.columns:
+            # Chave inteira da dimensão compartilhada (consultores.py importa este módulo)
+            from consultores import COL_CONSULTOR_ID, codificar_consultores
+
+            df[COL_CONSULTOR_ID] = codificar_consultores(df["consultor"])
+        return df
+    return derivado(f"aba_limpa:{aba}", construir)
+
+
+def indice_posicoes(aba):
+    """{coluna: {valor: posições}} para cada dimensão da aba limpa, por snapshot."""
+    def construir(abas):
+        df = aba_limpa(aba)
+        if df is None:
+            return {}
+        return {col: df.groupby(col, sort=False).indices for col in dimensoes_da_aba(aba) if col in df.columns}
+    return derivado(f"indice_posicoes:{aba}", construir)
+
+
+def filtrar_aba(aba, filtros):
+    """Aba limpa filtrada por {coluna: valor(es)} usando os índices de posição (sem varrer a aba inteira)."""
+    import numpy as np
+
+    df = aba_limpa(aba)
+    if df is None:
+        return pd.DataFrame()
+    indices = indice_posicoes(aba)
+    posicoes = None
+    for col, valor in filtros.items():
+        if valor is None or valor == "" or valor == [] or col not in indices:
+            continue
+        valores = list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+        if pd.api.types.is_numeric_dtype(df[col]) and any(isinstance(v, str) for v in valores):
+            valores = pd.to_numeric(pd.Series(valores), errors="coerce").dropna().tolist()
+        partes = [indices[col][v] for v in valores if v in indices[col]]
+        selecao = np.concatenate(partes) if partes else np.array([], dtype=np.intp)
+        posicoes = selecao if posicoes is None else np.intersect1d(posicoes, selecao, assume_unique=True)
+    if posicoes is None:
+        return df
+    return df.take(np.sort(posicoes))
+
+
+def selecionar_fatias(tabela, filtros):
+    """Linhas de uma tabela pré-agregada (top-N, coortes...) que batem com {coluna: valor(es)}.
+
+    Filtros vazios ou sobre colunas que a tabela não tem são ignorados.
+    """
+    for col, valor in filtros.items():
+        if valor is None or valor == "" or valor == [] or col not in tabela.columns:
+            continue
+        valores = list(valor) if isinstance(valor, (list, tuple, set)) else [valor]
+        tabela = tabela[tabela[col].isin(valores)]
+    return tabela
+
+
+def dados_pagina(aba, filtros=None, forcar=False):
+    """Aba limpa do snapshot filtrada por posição, para os callbacks; None se a aba não veio.
+
+    Substitui carregar_dados + limpar_* + aplicar_filtros: a aba inteira não é copiada,
+    só as linhas selecionadas são alocadas. O resultado é compartilhado (copy-on-write):
+    pode ser alterado localmente sem afetar o snapshot nem outras threads.
+    """
+    obter_snapshot(forcar)
+    base = aba_limpa(aba)
+    if base is None or base.empty:
+        return None
+    return filtrar_aba(aba, filtros or {})
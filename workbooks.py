@@ -0,0 +1,77 @@
+# ==========================================================
+# 📚 ESCOLHA DO WORKBOOK POR REQUISIÇÃO
+# ==========================================================
+# Cada requisição serve um workbook de ROBO_WORKBOOKS (utils.py), escolhido
+# nesta ordem:
+#   1. ?workbook=<id> na URL (página, API, exportação) ou cabeçalho X-Workbook
+#   2. a página que disparou o callback/SSE (?workbook= no Referer)
+#   3. o cookie gravado na última escolha explícita pela URL
+#   4. ROBO_WORKBOOK_PADRAO (ou o primeiro configurado)
+# O id vai para flask.g; utils.workbook_atual() o lê em snapshot, derivados e
+# caches. Id pedido explicitamente e desconhecido = 404.
+import urllib.parse
+
+from flask import abort, g, jsonify, request
+
+import utils
+
+PARAMETRO_WORKBOOK = "workbook"
+CABECALHO_WORKBOOK = "X-Workbook"
+COOKIE_WORKBOOK = "robo_workbook"
+COOKIE_DURACAO_SEGUNDOS = 30 * 24 * 3600
+
+
+def _da_pagina():
+    """?workbook= da página de origem (callbacks e SSE herdam a URL da aba pelo Referer)."""
+    origem = request.headers.get("Referer")
+    if not origem:
+        return None
+    return urllib.parse.parse_qs(urllib.parse.urlsplit(origem).query).get(PARAMETRO_WORKBOOK, [None])[0]
+
+
+def resolver_workbook():
+    """Id do workbook da requisição atual (ver ordem no topo do módulo)."""
+    validos = utils.ids_workbooks()
+    pedido = request.args.get(PARAMETRO_WORKBOOK) or request.headers.get(CABECALHO_WORKBOOK)
+    if pedido:
+        if pedido.lower() not in validos:
+            abort(404, description=f"Workbook '{pedido}' não configurado. Use: {', '.join(validos)}")
+        return pedido.lower()
+    for candidato in (_da_pagina(), request.cookies.get(COOKIE_WORKBOOK)):
+        if candidato and candidato.lower() in validos:
+            return candidato.lower()
+    return utils.WORKBOOK_INICIAL
+
+
+def registrar_workbooks(server):
+    # Registrado antes dos demais before_request (aquecimento, orçamento de memória...)
+    @server.before_request
+    def escolher_workbook():
+        g.workbook = resolver_workbook()
+
+    @server.after_request
+    def lembrar_workbook(resposta):
+        # Navegar pela navbar perde o ?workbook= da URL: o cookie mantém a escolha
+        escolhido = request.args.get(PARAMETRO_WORKBOOK)
+        if escolhido and g.get("workbook") and request.cookies.get(COOKIE_WORKBOOK) != g.workbook:
+            resposta.set_cookie(COOKIE_WORKBOOK, g.workbook, max_age=COOKIE_DURACAO_SEGUNDOS, samesite="Lax")
+        return resposta
+
+    @server.route("/api/v1/workbooks")
+    def api_workbooks():
+        carregados = {estado["id"]: estado for estado in utils.workbooks_carregados()}
+        linhas = []
+        for id_ in utils.ids_workbooks():
+            estado = carregados.get(id_)
+            linhas.append({
+                "workbook": id_,
+                "padrao": id_ == utils.WORKBOOK_INICIAL,
+                "em_memoria": estado is not None and estado["snapshot"]["carregado_em"] is not None,
+                "versao_snapshot": estado["snapshot"]["versao"] if estado else None,
+                "impressao_snapshot": estado["snapshot"]["impressao"] if estado else None,
+                "carregado_em": estado["snapshot"]["carregado_em"] if estado else None,
+                "ultimo_acesso": estado["ultimo_acesso"] if estado else None,
+            })
+        return jsonify({"atual": g.workbook, "workbooks": linhas})
+
+    return escolher_workbook